@@ -0,0 +1,204 @@
+# -*- coding: utf-8 -*-
+
+""" Encapsulates Budgets on the Executions Analysing Code Snippets. """
+
+import threading
+
+from config import ANALYSIS_SNIPPET_CPU_TIME
+from config import ANALYSIS_SNIPPET_MAX_EXECUTIONS
+from config import ANALYSIS_SNIPPET_MEMORY_LIMIT
+from config import ANALYSIS_SNIPPET_WALL_TIME
+from config import ANALYSIS_TASK_CPU_TIME
+from config import ANALYSIS_TASK_MAX_EXECUTIONS
+from config import ANALYSIS_TASK_WALL_TIME
+
+
+class AnalysisBudgetExceededError(Exception):
+    """ Raised When the Analysis of a Code Snippet Has Used Up Its Budget, or That of Its Task.
+
+    :attr budget: The budget that was used up.
+    :type budget: AnalysisBudget
+    :attr reason: What was used up, such as `'wall time'`.
+    :type reason: str
+    """
+    def __init__(self, budget, reason):
+        """ Initializes the `AnalysisBudgetExceededError` object.
+
+        :param budget: The budget that was used up.
+        :type budget: AnalysisBudget
+        :param reason: What was used up, such as `'wall time'`.
+        :type reason: str
+        """
+        Exception.__init__(self, '%s budget exceeded its %s' % (budget.name, reason))
+        self.budget = budget
+        self.reason = reason
+
+
+class AnalysisBudget(object):
+    """ Encapsulates a Budget on the Executions Analysing Code Snippets.
+
+    A budget caps the wall time, CPU time and number of the executions charged to it, and the memory each of them may
+    use. A snippet's budget has its task's budget as parent, so the executions of a snippet are charged to both, and
+    a task whose snippets keep running long stops analysing them even if no single snippet used up its own budget.
+    Every execution is given at most the time left in the budgets, and one that times out or runs out of memory uses
+    up the budget, so a snippet that loops forever or blocks costs a single timeout rather than one per execution.
+
+    :attr name: The name of the budget, such as `'snippet'`.
+    :type name: str
+    :attr memory_limit: The maximum number of bytes of memory a single execution may use.
+    :type memory_limit: int
+    :attr wall_time: The number of seconds of wall time charged so far.
+    :type wall_time: float
+    :attr cpu_time: The number of seconds of CPU time charged so far.
+    :type cpu_time: float
+    :attr num_executions: The number of executions charged so far.
+    :type num_executions: int
+    :attr _max_wall_time: The number of seconds of wall time that may be charged.
+    :type _max_wall_time: float
+    :attr _max_cpu_time: The number of seconds of CPU time that may be charged.
+    :type _max_cpu_time: float
+    :attr _max_executions: The number of executions that may be charged.
+    :type _max_executions: int
+    :attr _parent: The budget every execution is also charged to, or `None`.
+    :type _parent: AnalysisBudget
+    :attr _exceeded_reason: What was used up, or `None` while the budget lasts.
+    :type _exceeded_reason: str
+    :attr _lock: A lock guarding the charges, as the snippets of a task are analysed concurrently.
+    :type _lock: threading.Lock
+    """
+    SNIPPET_BUDGET_NAME = 'snippet'
+    TASK_BUDGET_NAME = 'task'
+
+    WALL_TIME_REASON = 'wall time'
+    CPU_TIME_REASON = 'CPU time'
+    EXECUTIONS_REASON = 'executions'
+    MEMORY_REASON = 'memory'
+
+    def __init__(self, name, max_wall_time, max_cpu_time, max_executions, memory_limit=None, parent=None):
+        """ Initializes the `AnalysisBudget` object.
+
+        :param name: The name of the budget, such as `'snippet'`.
+        :type name: str
+        :param max_wall_time: The number of seconds of wall time that may be charged.
+        :type max_wall_time: float
+        :param max_cpu_time: The number of seconds of CPU time that may be charged.
+        :type max_cpu_time: float
+        :param max_executions: The number of executions that may be charged.
+        :type max_executions: int
+        :param memory_limit: The maximum number of bytes of memory a single execution may use (default: None).
+        :type memory_limit: int
+        :param parent: The budget every execution is also charged to (default: None).
+        :type parent: AnalysisBudget
+        """
+        self.name = name
+        self.memory_limit = memory_limit
+        self.wall_time = 0.0
+        self.cpu_time = 0.0
+        self.num_executions = 0
+        self._max_wall_time = max_wall_time
+        self._max_cpu_time = max_cpu_time
+        self._max_executions = max_executions
+        self._parent = parent
+        self._exceeded_reason = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def for_task():
+        """ Returns a budget for analysing the snippets of a single task, as configured.
+
+        :return: A budget for analysing the snippets of a single task.
+        :rtype: AnalysisBudget
+        """
+        return AnalysisBudget(
+            AnalysisBudget.TASK_BUDGET_NAME,
+            ANALYSIS_TASK_WALL_TIME,
+            ANALYSIS_TASK_CPU_TIME,
+            ANALYSIS_TASK_MAX_EXECUTIONS,
+        )
+
+    @staticmethod
+    def for_snippet(task_budget=None):
+        """ Returns a budget for analysing a single snippet, as configured.
+
+        :param task_budget: The budget of the snippet's task (default: None).
+        :type task_budget: AnalysisBudget
+
+        :return: A budget for analysing a single snippet.
+        :rtype: AnalysisBudget
+        """
+        return AnalysisBudget(
+            AnalysisBudget.SNIPPET_BUDGET_NAME,
+            ANALYSIS_SNIPPET_WALL_TIME,
+            ANALYSIS_SNIPPET_CPU_TIME,
+            ANALYSIS_SNIPPET_MAX_EXECUTIONS,
+            ANALYSIS_SNIPPET_MEMORY_LIMIT,
+            task_budget,
+        )
+
+    def _check(self, is_starting):
+        """ Raises if the budget was used up. The caller must hold `_lock`.
+
+        :param is_starting: Whether an execution is about to start, rather than having just finished.
+        :type is_starting: bool
+
+        :raises AnalysisBudgetExceededError: If the budget was used up.
+        """
+        if self._exceeded_reason is None:
+            if is_starting and self.num_executions >= self._max_executions:
+                self._exceeded_reason = AnalysisBudget.EXECUTIONS_REASON
+            elif self.wall_time >= self._max_wall_time:
+                self._exceeded_reason = AnalysisBudget.WALL_TIME_REASON
+            elif self.cpu_time >= self._max_cpu_time:
+                self._exceeded_reason = AnalysisBudget.CPU_TIME_REASON
+        if self._exceeded_reason is not None:
+            raise AnalysisBudgetExceededError(self, self._exceeded_reason)
+
+    def start_execution(self, timeout):
+        """ Returns the number of seconds an execution about to start may run, given the time left in the budgets.
+
+        :param timeout: The number of seconds the execution would otherwise be given.
+        :type timeout: float
+
+        :return: The number of seconds the execution may run.
+        :rtype: float
+
+        :raises AnalysisBudgetExceededError: If this budget, or its parent, was used up.
+        """
+        if self._parent is not None:
+            timeout = self._parent.start_execution(timeout)
+        with self._lock:
+            self._check(True)
+            return min(timeout, self._max_wall_time - self.wall_time, self._max_cpu_time - self.cpu_time)
+
+    def charge(self, wall_time, cpu_time, timed_out=False, memory_exceeded=False):
+        """ Charges a finished execution to the budget and its parent.
+
+        An execution that timed out, ran out of memory or used up the time left was cut short, so its result cannot be
+        relied on and the budget is used up.
+
+        :param wall_time: The number of seconds of wall time the execution took.
+        :type wall_time: float
+        :param cpu_time: The number of seconds of CPU time the execution took.
+        :type cpu_time: float
+        :param timed_out: Whether the execution ran out of the time it was given (default: False).
+        :type timed_out: bool
+        :param memory_exceeded: Whether the execution ran out of the memory it may use (default: False).
+        :type memory_exceeded: bool
+
+        :raises AnalysisBudgetExceededError: If the execution used up this budget, or its parent.
+        """
+        with self._lock:
+            self.wall_time += wall_time
+            self.cpu_time += cpu_time
+            self.num_executions += 1
+            if self._exceeded_reason is None:
+                if memory_exceeded:
+                    self._exceeded_reason = AnalysisBudget.MEMORY_REASON
+                elif timed_out:
+                    self._exceeded_reason = AnalysisBudget.WALL_TIME_REASON
+        try:
+            if self._parent is not None:
+                self._parent.charge(wall_time, cpu_time)
+        finally:
+            with self._lock:
+                self._check(False)
@@ -0,0 +1,252 @@
+# -*- coding: utf-8 -*-
+
+""" Encapsulates Functionality for Lazily Generating Ranked Task Solution Candidates. """
+
+from collections import namedtuple
+import heapq
+import itertools
+import re
+
+from fuzzywuzzy import fuzz
+
+
+# A candidate solution to a task: the source of a function, the task inputs to pass it in order, the task outputs to
+# assign its result to in order, and the name of the function.
+TaskSolution = namedtuple('TaskSolution', ['source', 'inputs', 'outputs', 'function_name'])
+
+
+class CandidateGenerator(object):
+    """ Encapsulates Functionality for Lazily Generating Ranked Task Solution Candidates.
+
+    A candidate binds every task input to a parameter of a function and every task output to a value it returns.
+    Bindings that cannot work are pruned up front: a function whose arity does not fit the number of task inputs, or
+    that never returns the number of values the task outputs need, has no candidates, and a task input is never bound
+    to a parameter whose literal default value is of another type. The remaining bindings are scored by how well the
+    parameter names fit the task input names and types, and are yielded best first without materializing the others.
+
+    :attr _task_inputs: A list of the `(name, type)` pairs of the task inputs.
+    :type _task_inputs: list
+    :attr _task_outputs: A list of the `(name, type)` pairs of the task outputs.
+    :type _task_outputs: list
+    """
+    # The score of a binding whose names are identical; less similar names score proportionally less.
+    NAME_SIMILARITY_WEIGHT = 1.0
+
+    # The score added when a parameter's name mentions the type of the task input bound to it, such as `my_list`.
+    TYPE_HINT_SCORE = 1.0
+
+    # The score added when a parameter's literal default value has the type of the task input bound to it.
+    TYPE_MATCH_SCORE = 2.0
+
+    NAME_PART_REGEX = re.compile(r'[A-Z]?[a-z0-9]+|[A-Z]+(?![a-z])')
+
+    def __init__(self, task_descriptor):
+        """ Initializes the `CandidateGenerator` object.
+
+        :param task_descriptor: The `TaskDescriptor` object encapsulating the task.
+        :type task_descriptor: TaskDescriptor
+        """
+        self._task_inputs = list(task_descriptor.get_task_input_info().items())
+        self._task_outputs = list(task_descriptor.get_task_output_info().items())
+
+    @staticmethod
+    def can_complete_assignment(scores, columns=()):
+        """ Returns whether the given partial assignment can be completed, giving every row left a distinct column.
+
+        This is a bipartite matching between the rows left and the columns not yet assigned, found by augmenting paths
+        in polynomial time.
+
+        :param scores: A list of rows, each a list holding the score of assigning each column to the row, or `None` if
+            the column may not be assigned to the row.
+        :type scores: list
+        :param columns: The columns assigned to the leading rows so far (default: ()).
+        :type columns: tuple
+
+        :return: Whether every row left can be assigned a distinct, allowed column.
+        :rtype: bool
+        """
+        matched_rows = {}
+
+        def augment(row, visited_columns):
+            for column, score in enumerate(scores[row]):
+                if score is None or column in columns or column in visited_columns:
+                    continue
+                visited_columns.add(column)
+                if column not in matched_rows or augment(matched_rows[column], visited_columns):
+                    matched_rows[column] = row
+                    return True
+            return False
+        return all(augment(row, set()) for row in xrange(len(columns), len(scores)))
+
+    @staticmethod
+    def iter_best_assignments(scores):
+        """ Yields every assignment of a distinct column to each row of the given score matrix, best first.
+
+        Assignments are enumerated by a best-first search over partial assignments, bounding each by its score so far
+        plus the best score of every row left to assign. The bound never underestimates, so complete assignments come
+        off the frontier in order of their total score. Ties go to the deeper partial assignment, so the search runs
+        depth first through equally scored assignments and the frontier stays small. A partial assignment that cannot
+        be completed is never pushed, so the search never wanders into dead ends, however many rows there are.
+
+        :param scores: A list of rows, each a list holding the score of assigning each column to the row, or `None` if
+            the column may not be assigned to the row.
+        :type scores: list
+
+        :return: An iterator over `(total score, tuple of the column assigned to each row)` pairs, best first.
+        :rtype: iterator
+        """
+        row_bests = []
+        for row in scores:
+            allowed_scores = [score for score in row if score is not None]
+            if not allowed_scores:
+                return
+            row_bests.append(max(allowed_scores))
+        remaining_bests = [0.0] * (len(scores) + 1)
+        for index in xrange(len(scores) - 1, -1, -1):
+            remaining_bests[index] = remaining_bests[index + 1] + row_bests[index]
+        if not CandidateGenerator.can_complete_assignment(scores):
+            return
+        sequence = itertools.count()
+        frontier = [(-remaining_bests[0], 0, next(sequence), 0.0, ())]
+        while frontier:
+            _, _, _, total_score, columns = heapq.heappop(frontier)
+            depth = len(columns)
+            if depth == len(scores):
+                yield total_score, columns
+                continue
+            for column, score in enumerate(scores[depth]):
+                if score is None or column in columns or \
+                        not CandidateGenerator.can_complete_assignment(scores, columns + (column,)):
+                    continue
+                heapq.heappush(frontier, (
+                    -(total_score + score + remaining_bests[depth + 1]),
+                    -(depth + 1),
+                    next(sequence),
+                    total_score + score,
+                    columns + (column,),
+                ))
+
+    @staticmethod
+    def _get_binding_score(parameter_name, default_type, task_name, task_type):
+        """ Returns the score of binding the given task value to the given parameter, or `None` if it cannot work.
+
+        :param parameter_name: The name of the parameter, or `None` for a parameter collected by `*args`.
+        :type parameter_name: str
+        :param default_type: The type name of the parameter's literal default value, or `None` if unknown.
+        :type default_type: str
+        :param task_name: The name of the task value.
+        :type task_name: str
+        :param task_type: The type name of the task value.
+        :type task_type: str
+
+        :return: The score of the binding, or `None` if the binding cannot work.
+        :rtype: float
+        """
+        if default_type is not None and task_type and default_type != task_type:
+            return None
+        if parameter_name is None:
+            return 0.0
+        score = CandidateGenerator.NAME_SIMILARITY_WEIGHT * fuzz.ratio(parameter_name, task_name) / 100.0
+        name_parts = [part.lower() for part in CandidateGenerator.NAME_PART_REGEX.findall(parameter_name)]
+        if task_type and task_type.lower() in name_parts:
+            score += CandidateGenerator.TYPE_HINT_SCORE
+        if default_type is not None and default_type == task_type:
+            score += CandidateGenerator.TYPE_MATCH_SCORE
+        return score
+
+    def _get_input_scores(self, extracted_function):
+        """ Returns the score of binding each task input to each of the leading parameters of the given function.
+
+        :param extracted_function: The function to bind the task inputs to.
+        :type extracted_function: ExtractedFunction
+
+        :return: A row per leading parameter holding the score of binding each task input to it, or `None` if the
+            function cannot be called with exactly the task inputs.
+        :rtype: list
+        """
+        num_parameters = len(extracted_function.arguments)
+        num_required_parameters = num_parameters - len(extracted_function.default_types)
+        num_inputs = len(self._task_inputs)
+        if num_inputs < num_required_parameters or (num_inputs > num_parameters and not extracted_function.has_varargs):
+            return None
+        scores = []
+        for position in xrange(num_inputs):
+            parameter_name, default_type = None, None
+            if position < num_parameters:
+                parameter_name = extracted_function.arguments[position]
+                if position >= num_required_parameters:
+                    default_type = extracted_function.default_types[position - num_required_parameters]
+            scores.append([
+                CandidateGenerator._get_binding_score(parameter_name, default_type, task_name, task_type)
+                for task_name, task_type in self._task_inputs
+            ])
+        return scores
+
+    def get_binding_quality(self, extracted_function, inputs):
+        """ Returns how well the given task inputs fit the leading parameters of the given function they are bound to.
+
+        :param extracted_function: The function the task inputs are passed to.
+        :type extracted_function: ExtractedFunction
+        :param inputs: The names of the task inputs, in the order they are passed.
+        :type inputs: list
+
+        :return: The mean score of the bindings relative to the best score a binding can get, between 0 and 1, where
+            bindings that cannot work score 0.
+        :rtype: float
+        """
+        input_scores = self._get_input_scores(extracted_function)
+        if input_scores is None:
+            return 0.0
+        if not inputs:
+            return 1.0
+        columns = dict((task_name, column) for column, (task_name, _) in enumerate(self._task_inputs))
+        best_score = CandidateGenerator.NAME_SIMILARITY_WEIGHT + CandidateGenerator.TYPE_HINT_SCORE + \
+            CandidateGenerator.TYPE_MATCH_SCORE
+        total_score = 0.0
+        for row, task_name in zip(input_scores, inputs):
+            score = row[columns[task_name]] if task_name in columns else None
+            total_score += score or 0.0
+        return total_score / (best_score * len(inputs))
+
+    def _can_return_outputs(self, extracted_function):
+        """ Returns whether the given function may return as many values as there are task outputs.
+
+        :param extracted_function: The function to assign the task outputs from.
+        :type extracted_function: ExtractedFunction
+
+        :return: Whether the function may return as many values as there are task outputs.
+        :rtype: bool
+        """
+        num_outputs = len(self._task_outputs)
+        if not num_outputs:
+            return True
+        if not extracted_function.return_arities:
+            return False
+        if num_outputs == 1:
+            return True
+        return any(arity is None or arity == num_outputs for arity in extracted_function.return_arities)
+
+    def iter_candidates(self, extracted_function):
+        """ Yields the candidate solutions using the given function, best first.
+
+        :param extracted_function: The function to build candidate solutions from.
+        :type extracted_function: ExtractedFunction
+
+        :return: An iterator over `TaskSolution` objects, best first.
+        :rtype: iterator
+        """
+        input_scores = self._get_input_scores(extracted_function)
+        if input_scores is None or not self._can_return_outputs(extracted_function):
+            return
+        num_inputs, num_outputs = len(self._task_inputs), len(self._task_outputs)
+        # Inputs and outputs are bound in one search, with inputs only bindable to parameters and outputs only to
+        # returned values. Nothing is known about the returned values, so every order of the outputs scores the same.
+        scores = [row + [None] * num_outputs for row in input_scores]
+        scores += [[None] * num_inputs + [0.0] * num_outputs for _ in xrange(num_outputs)]
+        for _, columns in CandidateGenerator.iter_best_assignments(scores):
+            yield TaskSolution(
+                extracted_function.source,
+                tuple(self._task_inputs[column][0] for column in columns[:num_inputs]),
+                tuple(self._task_outputs[column - num_inputs][0] for column in columns[num_inputs:]),
+                extracted_function.name,
+            )
@@ -0,0 +1,150 @@
+# -*- coding: utf-8 -*-
+
+""" Encapsulates Functionality for Ranking the Task Solution Candidates of a Task across All Its Code Snippets. """
+
+from collections import OrderedDict
+import heapq
+import itertools
+import math
+
+from function_extractor import FunctionExtractor
+
+
+class CandidateRanker(object):
+    """ Encapsulates Functionality for Ranking the Task Solution Candidates of a Task across All Its Code Snippets.
+
+    Candidates arrive snippet by snippet, each function's own candidates best first. Rather than being verified in that
+    order, where a strong candidate from a late code snippet waits behind every weak one from the earlier code snippets,
+    candidates are gathered from every code snippet of the task and only the best `_max_candidates` of them are yielded,
+    picked with a bounded heap. A candidate scores by how well its function's name fits the task description, how well
+    its parameters fit the task inputs bound to them, how early its code snippet was found and how short its function
+    is. Duplicate candidates, such as the same binding found both statically and by snippet analysis, are kept once.
+
+    :attr _candidate_generator: The generator scoring the binding of task inputs to function parameters.
+    :type _candidate_generator: CandidateGenerator
+    :attr _name_ranker: The ranker scoring function names against the task description.
+    :type _name_ranker: NameSimilarityRanker
+    :attr _max_candidates: The maximum number of candidates to keep.
+    :type _max_candidates: int
+    :attr _candidates: A list of the `(task solution, snippet rank, extracted function)` entries gathered so far.
+    :type _candidates: list
+    :attr _candidate_keys: The keys of the candidates gathered so far, used to drop duplicates.
+    :type _candidate_keys: set
+    :attr _extracted_functions: A mapping of function sources to their `ExtractedFunction` objects, or `None` if
+        they fail to parse.
+    :type _extracted_functions: dict
+    """
+    # The weights of each feature of a candidate in its score. Every feature is scaled to lie between 0 and 1.
+    NAME_WEIGHT = 4.0
+    TYPE_WEIGHT = 2.0
+    SNIPPET_RANK_WEIGHT = 1.0
+    SIZE_WEIGHT = 0.5
+
+    # The number of source lines past which a function is considered long. Shorter functions score higher.
+    LONG_FUNCTION_LINES = 50
+
+    def __init__(self, candidate_generator, name_ranker, max_candidates):
+        """ Initializes the `CandidateRanker` object.
+
+        :param candidate_generator: The generator scoring the binding of task inputs to function parameters.
+        :type candidate_generator: CandidateGenerator
+        :param name_ranker: The ranker scoring function names against the task description.
+        :type name_ranker: NameSimilarityRanker
+        :param max_candidates: The maximum number of candidates to keep.
+        :type max_candidates: int
+        """
+        self._candidate_generator = candidate_generator
+        self._name_ranker = name_ranker
+        self._max_candidates = max_candidates
+        self._candidates = []
+        self._candidate_keys = set()
+        self._extracted_functions = {}
+
+    def _get_extracted_function(self, task_solution):
+        """ Returns the extracted function of the given candidate, or `None` if its source fails to parse.
+
+        :param task_solution: The candidate.
+        :type task_solution: TaskSolution
+
+        :return: The `ExtractedFunction` object of the function the candidate calls, or `None`.
+        :rtype: ExtractedFunction
+        """
+        if task_solution.source not in self._extracted_functions:
+            try:
+                extracted_functions = FunctionExtractor(task_solution.source).extract()
+            except SyntaxError:
+                extracted_functions = []
+            self._extracted_functions[task_solution.source] = next(
+                (f for f in extracted_functions if f.name == task_solution.function_name),
+                None,
+            )
+        return self._extracted_functions[task_solution.source]
+
+    def add(self, task_solution, snippet_rank):
+        """ Adds the given candidate, unless an identical one was already added.
+
+        :param task_solution: The candidate.
+        :type task_solution: TaskSolution
+        :param snippet_rank: The index of the candidate's code snippet among those found for the task.
+        :type snippet_rank: int
+        """
+        key = (task_solution.source, task_solution.function_name, tuple(task_solution.inputs),
+               tuple(task_solution.outputs))
+        if key in self._candidate_keys:
+            return
+        self._candidate_keys.add(key)
+        self._candidates.append((task_solution, snippet_rank, self._get_extracted_function(task_solution)))
+
+    def _get_score(self, name_score, snippet_rank, extracted_function, task_solution):
+        """ Returns the score of the given candidate.
+
+        :param name_score: The similarity of the function's name to the task description, between 0 and 100.
+        :type name_score: float
+        :param snippet_rank: The index of the candidate's code snippet among those found for the task.
+        :type snippet_rank: int
+        :param extracted_function: The function the candidate calls, or `None` if it failed to parse.
+        :type extracted_function: ExtractedFunction
+        :param task_solution: The candidate.
+        :type task_solution: TaskSolution
+
+        :return: The score of the candidate, where higher is better.
+        :rtype: float
+        """
+        type_score = 0.0
+        if extracted_function is not None:
+            type_score = self._candidate_generator.get_binding_quality(extracted_function, task_solution.inputs)
+        num_lines = task_solution.source.count('\n') + 1
+        size_score = max(0.0, 1.0 - math.log(num_lines) / math.log(CandidateRanker.LONG_FUNCTION_LINES))
+        return (
+            CandidateRanker.NAME_WEIGHT * name_score / 100.0 +
+            CandidateRanker.TYPE_WEIGHT * type_score +
+            CandidateRanker.SNIPPET_RANK_WEIGHT / (1.0 + snippet_rank) +
+            CandidateRanker.SIZE_WEIGHT * size_score
+        )
+
+    def iter_ranked(self):
+        """ Yields the best candidates added, best first.
+
+        The function names of every candidate are scored against the task description in a single batch. Candidates
+        scoring the same keep the order they were added in.
+
+        :return: An iterator over at most `_max_candidates` `TaskSolution` objects, best first.
+        :rtype: iterator
+        """
+        docstrings = OrderedDict()
+        for task_solution, _, extracted_function in self._candidates:
+            docstring = extracted_function.docstring if extracted_function is not None else ''
+            docstrings.setdefault(task_solution.function_name, docstring)
+        name_scores = dict(self._name_ranker.rank(docstrings.items()))
+        sequence = itertools.count()
+        best_candidates = heapq.nlargest(self._max_candidates, (
+            (
+                self._get_score(name_scores[task_solution.function_name], snippet_rank, extracted_function,
+                                task_solution),
+                -next(sequence),
+                task_solution,
+            )
+            for task_solution, snippet_rank, extracted_function in self._candidates
+        ))
+        for _, _, task_solution in best_candidates:
+            yield task_solution
@@ -2,14 +2,14 @@
 
 """ Encapsulates Functionality for Testing and Iterating on the Code Complete File. """
 
-import glob
-import os
-import re
+import itertools
 import shutil
-import subprocess
 
+from config import MAX_CANDIDATES_PER_TASK
 from config import READ_OPT
 from config import WRITE_OPT
+from fork_test_runner import ForkTestRunner
+from unittest_result_collector import UnittestResultCollector
 
 
 LINE = '=' * 100
@@ -26,28 +26,28 @@ class CodeCompleter(object):
     :type _tests_f: str
     :attr _task_descriptors: A list of `TaskDescriptor` objects encapsulating the completion tasks.
     :type _task_descriptors: list
-    :attr _task_solutions:
+    :attr _task_solutions: A list holding an iterable of task solutions for each task, best first, in task order.
     :type _task_solutions: list
+    :attr _test_runner: The runner verifying each candidate code file against the tests.
+    :type _test_runner: ForkTestRunner
+    :attr _max_candidates_per_task: The maximum number of task solutions to verify per task.
+    :type _max_candidates_per_task: int
+    :attr _num_jobs: The maximum number of task solutions to verify at once.
+    :type _num_jobs: int
+    :attr _progress_reporter: The reporter of the progress of a headless run, or `None` to run interactively.
+    :type _progress_reporter: ProgressReporter
     """
-    UNITTEST_OK = 'OK'
-    UNITTEST_FAILURE_REGEX = r'\d+'
-
-    PATH_DELIM = '/'
     COMMA_DELIM = ','
     EQUALS_DELIM = '='
-    NEW_LINE_DELIM = '\n'
 
     ORIGINAL_EXTENSION = '%s.original'
-    PREVIOUS_EXTENSION = '%s.previous'
-
-    RUN_PYTHON_SCRIPT_CMD = 'python %s'
-    ALL_PYC_FILES = '%s/*.pyc'
 
     APPEND_FUNCTION_STUB_TEMPLATE = '\n%s'
     FUNCTION_STUB_TEMPLATE = '%s%s(%s)'
     SET_VARIABLE_TEMPLATE = '%s %s '
 
-    def __init__(self, code_f, tests_f, task_descriptors, task_solutions):
+    def __init__(self, code_f, tests_f, task_descriptors, task_solutions, test_runner, max_candidates_per_task=None,
+                 num_jobs=1, progress_reporter=None):
         """ Initializes the `CodeCompleter` object.
 
         :param code_f: A path to the file to code complete.
@@ -56,70 +56,82 @@ class CodeCompleter(object):
         :type tests_f: str
         :param task_descriptors: A list of `TaskDescriptor` objects encapsulating the completion tasks.
         :type task_descriptors: list
-        :param task_solutions: ...
+        :param task_solutions: A list holding an iterable of task solutions for each task, best first, in task order.
         :type task_solutions: list
+        :param test_runner: The runner verifying each candidate code file against the tests.
+        :type test_runner: ForkTestRunner
+        :param max_candidates_per_task: The maximum number of task solutions to verify per task (default: None).
+        :type max_candidates_per_task: int
+        :param num_jobs: The maximum number of task solutions to verify at once (default: 1).
+        :type num_jobs: int
+        :param progress_reporter: The reporter of the progress of a headless run, or `None` to run interactively
+            (default: None).
+        :type progress_reporter: ProgressReporter
         """
         self._current_code_f = code_f
         self._original_code_f = code_f
         self._tests_f = tests_f
         self._task_descriptors = task_descriptors
         self._task_solutions = task_solutions
+        self._test_runner = test_runner
+        self._max_candidates_per_task = max_candidates_per_task or MAX_CANDIDATES_PER_TASK
+        self._num_jobs = num_jobs
+        self._progress_reporter = progress_reporter
 
-    @staticmethod
-    def _parse_unittest_results(results):
-        """ Parses the number of test failures from `unittest.main()` output.
-
-        Examples of the last line of the `unittest.main()` output.
+    def _run_tests(self, code, baseline=None):
+        """ Returns the outcome of every test run against the given candidate code file.
 
-        .. code-block:: python
+        :param code: The contents of the candidate code file.
+        :type code: str
+        :param baseline: The outcomes of the tests to improve on, stopping once the candidate cannot, or `None` to run
+            every test (default: None).
+        :type baseline: dict
 
-            OK  # <-- Signals all tests passed.
-
-            FAILED (failures=1)  # <-- Signals 1 test failed.
+        :return: A mapping of the ids of the tests run to their `TestOutcome`, or `None` if the candidate or the tests
+            failed to load, and the test output.
+        :rtype: tuple
         """
-        print results
-        last_line = results.split(CodeCompleter.NEW_LINE_DELIM)[-1].strip()
-        if last_line == CodeCompleter.UNITTEST_OK:
-            return 0
-        elif not last_line.startswith('FAILED'):
-            return None
-        else:
-            return sum([
-                int(count) for count in re.findall(CodeCompleter.UNITTEST_FAILURE_REGEX, last_line, re.M | re.I)
-            ])
+        test_outcomes, output = self._test_runner.run(code, baseline)
+        if self._progress_reporter is None:
+            print output
+        return test_outcomes, output
 
-    def _remove_compiled_code(self):
-        """ Removes compiled python files from the code file's location. """
-        path_to_code_file = CodeCompleter.PATH_DELIM.join(self._current_code_f.split(CodeCompleter.PATH_DELIM)[:-1])
-        for f in glob.glob(CodeCompleter.ALL_PYC_FILES % path_to_code_file):
-            os.remove(f)
+    def _report_test_result(self, task_index, rank, baseline, test_outcomes, output, accepted):
+        """ Reports the result of running the tests against a candidate solution to the `ProgressReporter`.
 
-    def _run_tests(self):
-        """ Returns the number of tests that failed.
-
-        :return: The number of tests that failed.
-        :rtype: int
+        :param task_index: The index of the task among all tasks.
+        :type task_index: int
+        :param rank: The rank of the candidate among those of the task, best first.
+        :type rank: int
+        :param baseline: The outcomes of the tests the candidate had to improve on.
+        :type baseline: dict
+        :param test_outcomes: The outcomes of the tests run against the candidate, or `None` if they did not run.
+        :type test_outcomes: dict
+        :param output: The test output.
+        :type output: str
+        :param accepted: Whether the candidate was accepted as the task's solution.
+        :type accepted: bool
         """
-        process = subprocess.Popen(
-            CodeCompleter.RUN_PYTHON_SCRIPT_CMD % self._tests_f,
-            shell=True,
-            stderr=subprocess.PIPE,
-        )
-        stdout, stderr = process.communicate()
-        return CodeCompleter._parse_unittest_results(stderr.strip())
+        fixed_tests, broken_tests = UnittestResultCollector.get_changes(baseline, test_outcomes)
+        self._progress_reporter.test_result(task_index, rank, test_outcomes, accepted, fixed_tests, broken_tests,
+                                            error=output if test_outcomes is None else None)
 
-    def _attempt_to_solve_task(self, task_descriptor, task_solution):
+    def _attempt_to_solve_task(self, task_descriptor, task_solution, code):
         """ Attempt to solve task with the given task descriptor using the given task solution.
 
         :param task_descriptor: The `TaskDescriptor` object to use to solve the task.
         :type task_descriptor: TaskDescriptor
-        :param task_solution:
-        :type task_solution:
+        :param task_solution: The candidate solution to the task.
+        :type task_solution: TaskSolution
+        :param code: The contents of the current code file.
+        :type code: str
+
+        :return: The contents of the code file with the task solved by the task solution.
+        :rtype: str
         """
         stub_function, input_list, output_list, function_name = task_solution
-        current_code_f_contents = open(self._current_code_f, READ_OPT).read()
-        current_code_f_contents += CodeCompleter.APPEND_FUNCTION_STUB_TEMPLATE % stub_function
-        current_code_f_contents = current_code_f_contents.replace(
+        code += CodeCompleter.APPEND_FUNCTION_STUB_TEMPLATE % stub_function
+        return code.replace(
             task_descriptor.get_task_id(),
             CodeCompleter.FUNCTION_STUB_TEMPLATE % (
                 CodeCompleter.SET_VARIABLE_TEMPLATE % (
@@ -130,33 +142,145 @@ class CodeCompleter(object):
                 CodeCompleter.COMMA_DELIM.join(input_list),
             ),
         )
-        open(self._current_code_f, WRITE_OPT).write(current_code_f_contents)
 
-    def complete(self):
-        """ Complete all tasks. """
-        print '%s\n\nStarting with Code... \n\n%s' % (LINE, open(self._current_code_f, READ_OPT).read().replace('\n', '\n\t'))
-        # Make a copy of the original code file.
-        shutil.copyfile(self._original_code_f, CodeCompleter.ORIGINAL_EXTENSION % self._original_code_f)
-        num_of_tests_failed = self._run_tests()
-        for task_descriptor, task_solutions in zip(self._task_descriptors, self._task_solutions):
-            # Make a copy of the current code file so that we can revert to it if the test verification fails.
-            shutil.copyfile(self._current_code_f, CodeCompleter.PREVIOUS_EXTENSION % self._current_code_f)
-            for task_solution in task_solutions:
-                self._attempt_to_solve_task(task_descriptor, task_solution)
+    def _solve_task_in_parallel(self, task_index, task_descriptor, task_solutions, code, test_outcomes):
+        """ Verifies the given task solutions at once, returning the code file solved by the best ranked one fixing a
+        test without breaking another.
+
+        :param task_index: The index of the task among all tasks.
+        :type task_index: int
+        :param task_descriptor: The `TaskDescriptor` object to use to solve the task.
+        :type task_descriptor: TaskDescriptor
+        :param task_solutions: The candidate solutions to the task, best first.
+        :type task_solutions: list
+        :param code: The contents of the current code file.
+        :type code: str
+        :param test_outcomes: The outcomes of the tests run against the current code file.
+        :type test_outcomes: dict
+
+        :return: The winning task solution, the contents of the code file solved by it and the outcomes of the tests
+            run against it, or `None`, the given code file and the given outcomes if no task solution wins.
+        :rtype: tuple
+        """
+        candidate_codes = [
+            self._attempt_to_solve_task(task_descriptor, task_solution, code) for task_solution in task_solutions
+        ]
+        if self._progress_reporter is None:
+            print '%s\n\nTrying to Reduce %d Errors with %d Candidates on %d Workers...' % (
+                LINE,
+                UnittestResultCollector.get_num_failing_tests(test_outcomes),
+                len(candidate_codes),
+                self._num_jobs,
+            )
+        else:
+            for rank, task_solution in enumerate(task_solutions):
+                self._progress_reporter.candidate(task_index, rank, task_solution)
+        winner, results = self._test_runner.run_parallel(candidate_codes, test_outcomes, self._num_jobs)
+        cancelled_ranks = set(rank for rank, result in enumerate(results) if result == (None, ForkTestRunner.CANCELLED))
+        if self._progress_reporter is None:
+            print 'Ran the Tests against %d of %d Candidates, Cancelling %d.' % (
+                sum(1 for result in results if result is not None) - len(cancelled_ranks),
+                len(results),
+                len(cancelled_ranks),
+            )
+        else:
+            for rank, result in enumerate(results):
+                if rank in cancelled_ranks:
+                    self._progress_reporter.cancelled(task_index, rank)
+                elif result is not None:
+                    self._report_test_result(task_index, rank, test_outcomes, result[0], result[1], rank == winner)
+        if winner is None:
+            return None, code, test_outcomes
+        winning_test_outcomes, output = results[winner]
+        if self._progress_reporter is None:
+            print '\n\t%s\n\n%s' % (candidate_codes[winner].replace('\n', '\n\t'), output)
+        return task_solutions[winner], candidate_codes[winner], winning_test_outcomes
+
+    def _solve_task(self, task_index, task_descriptor, task_solutions, code, test_outcomes):
+        """ Verifies the given task solutions one at a time, returning the code file solved by the first one fixing a
+        test without breaking another.
+
+        :param task_index: The index of the task among all tasks.
+        :type task_index: int
+        :param task_descriptor: The `TaskDescriptor` object to use to solve the task.
+        :type task_descriptor: TaskDescriptor
+        :param task_solutions: The candidate solutions to the task, best first.
+        :type task_solutions: iterable
+        :param code: The contents of the current code file.
+        :type code: str
+        :param test_outcomes: The outcomes of the tests run against the current code file.
+        :type test_outcomes: dict
+
+        :return: The winning task solution, the contents of the code file solved by it and the outcomes of the tests
+            run against it, or `None`, the given code file and the given outcomes if no task solution wins.
+        :rtype: tuple
+        """
+        for rank, task_solution in enumerate(task_solutions):
+            candidate_code = self._attempt_to_solve_task(task_descriptor, task_solution, code)
+            if self._progress_reporter is None:
                 print '%s\n\nTrying to Reduce %d Errors with...\n\n\t%s' % (
                     LINE,
-                    num_of_tests_failed,
-                    open(self._current_code_f, READ_OPT).read().replace('\n', '\n\t'),
+                    UnittestResultCollector.get_num_failing_tests(test_outcomes),
+                    candidate_code.replace('\n', '\n\t'),
                 )
                 raw_input()
-                self._remove_compiled_code()
-                updated_num_tests_failed = self._run_tests()
-                if updated_num_tests_failed is None:
-                    updated_num_tests_failed = num_of_tests_failed
-                if updated_num_tests_failed < num_of_tests_failed:
-                    num_of_tests_failed = updated_num_tests_failed
-                    break
+            else:
+                self._progress_reporter.candidate(task_index, rank, task_solution)
+            candidate_test_outcomes, output = self._run_tests(candidate_code, test_outcomes)
+            accepted = UnittestResultCollector.is_improvement(test_outcomes, candidate_test_outcomes)
+            if self._progress_reporter is not None:
+                self._report_test_result(task_index, rank, test_outcomes, candidate_test_outcomes, output, accepted)
+            if accepted:
+                return task_solution, candidate_code, candidate_test_outcomes
+        return None, code, test_outcomes
+
+    def complete(self):
+        """ Complete all tasks.
+
+        Candidates are verified in memory by the test runner, and the code file is only rewritten once a candidate
+        fixes a failing test without breaking a passing one, test by test rather than by the number of failures. With
+        more than one job, the candidates of a task are verified at once, each in a workspace of its own, and the best
+        ranked one to do so wins.
+
+        Run interactively, every candidate is shown and waits on the user before it is verified. Run headless, nothing
+        waits and the progress is reported to the `ProgressReporter` instead.
+
+        :return: The number of tests failing against the completed code file.
+        :rtype: int
+        """
+        current_code = open(self._current_code_f, READ_OPT).read()
+        if self._progress_reporter is None:
+            print '%s\n\nStarting with Code... \n\n%s' % (LINE, current_code.replace('\n', '\n\t'))
+        # Make a copy of the original code file.
+        shutil.copyfile(self._original_code_f, CodeCompleter.ORIGINAL_EXTENSION % self._original_code_f)
+        test_outcomes, _ = self._run_tests(current_code)
+        if self._progress_reporter is not None:
+            self._progress_reporter.start(self._original_code_f, self._tests_f, len(self._task_descriptors),
+                                          test_outcomes)
+        for task_index, (task_descriptor, task_solutions) in enumerate(
+            zip(self._task_descriptors, self._task_solutions)
+        ):
+            if self._progress_reporter is not None:
+                self._progress_reporter.start_task(task_index, task_descriptor)
+            try:
+                ranked_task_solutions = itertools.islice(task_solutions, self._max_candidates_per_task)
+                if self._num_jobs > 1:
+                    task_solution, current_code, test_outcomes = self._solve_task_in_parallel(
+                        task_index, task_descriptor, list(ranked_task_solutions), current_code, test_outcomes,
+                    )
                 else:
-                    shutil.copyfile(CodeCompleter.PREVIOUS_EXTENSION % self._current_code_f, self._current_code_f)
-        os.remove(CodeCompleter.PREVIOUS_EXTENSION % self._current_code_f)
-        print '%s\n\nFINISHED with %d Errors!!! %s\n\n%s' % (LINE, num_of_tests_failed, ':(' if num_of_tests_failed else ':)', LINE)
+                    task_solution, current_code, test_outcomes = self._solve_task(
+                        task_index, task_descriptor, ranked_task_solutions, current_code, test_outcomes,
+                    )
+            finally:
+                # Task solutions may be streamed, so stop producing any that are no longer needed.
+                if hasattr(task_solutions, 'close'):
+                    task_solutions.close()
+            if task_solution is not None:
+                open(self._current_code_f, WRITE_OPT).write(current_code)
+            if self._progress_reporter is not None:
+                self._progress_reporter.finish_task(task_index, task_descriptor, task_solution, test_outcomes)
+        num_of_tests_failed = UnittestResultCollector.get_num_failing_tests(test_outcomes)
+        if self._progress_reporter is None:
+            print '%s\n\nFINISHED with %d Errors!!! %s\n\n%s' % (LINE, num_of_tests_failed, ':(' if num_of_tests_failed else ':)', LINE)
+        return num_of_tests_failed
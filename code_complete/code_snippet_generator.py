@@ -2,8 +2,20 @@
 
 """ Encapsulates Functionality for Generating Code Snippets for a Task Description. """
 
+from collections import namedtuple
+import Queue
+import threading
+import time
+
+from config import CODE_SNIPPET_GENERATION_BUDGET
 from config import LANGUAGE
+from code_snippet_providers.code_search_api_code_snippet_provider import CodeSearchApiCodeSnippetProvider
 from code_snippet_providers.github_code_snippet_provider import GithubCodeSnippetProvider
+from code_snippet_providers.local_corpus_code_snippet_provider import LocalCorpusCodeSnippetProvider
+
+
+# How a single snippet provider fared while generating code snippets for a task.
+ProviderStats = namedtuple('ProviderStats', ['latency', 'num_code_snippets', 'timed_out', 'error'])
 
 
 class CodeSnippetGenerator(object):
@@ -13,21 +25,134 @@ class CodeSnippetGenerator(object):
     :type _code_snippets: list
     :attr _code_snippet_providers: A list of `AbstractCodeSnippetProviders` for gathering code snippets.
     :type _code_snippet_providers: list
+    :attr _budget: The number of seconds all snippet providers together are given to return code snippets.
+    :type _budget: float
+    :attr _provider_stats: A mapping of snippet provider names to `ProviderStats` for the last generation.
+    :type _provider_stats: dict
     """
+    # The kinds of results reported by a provider's thread.
+    CODE_SNIPPET = 'code_snippet'
+    DONE = 'done'
+
     CODE_SNIPPET_PROVIDERS = [
+        LocalCorpusCodeSnippetProvider,
+        CodeSearchApiCodeSnippetProvider,
         GithubCodeSnippetProvider,
     ]
 
-    def __init__(self, task_description):
+    def __init__(self, task_description, budget=None, priority=None):
         """ Initializes the `CodeSnippetGenerator` object.
 
         :param task_description: A description of the task to complete.
         :type task_description: str
+        :param budget: The number of seconds all snippet providers together are given to return code snippets
+            (default: None).
+        :type budget: float
+        :param priority: The priority of the web requests made by the snippet providers, where lower priorities are
+            sent first (default: None).
+        :type priority: int
         """
         self._code_snippets = []
         self._code_snippet_providers = []
+        self._budget = budget or CODE_SNIPPET_GENERATION_BUDGET
+        self._provider_stats = {}
         for code_snippet_provider in CodeSnippetGenerator.CODE_SNIPPET_PROVIDERS:
-            self._code_snippet_providers.append(code_snippet_provider(task_description, LANGUAGE))
+            self._code_snippet_providers.append(code_snippet_provider(task_description, LANGUAGE, priority=priority))
+
+    @staticmethod
+    def _run_code_snippet_provider(index, code_snippet_provider, results):
+        """ Gathers the code snippets of the given provider and reports them on the given results queue.
+
+        Every code snippet is reported as an `(index, CODE_SNIPPET, code snippet)` tuple as soon as the provider
+        yields it, followed by a final `(index, DONE, (latency, error))` tuple.
+
+        :param index: The index of the provider in `_code_snippet_providers`.
+        :type index: int
+        :param code_snippet_provider: The provider to gather code snippets from.
+        :type code_snippet_provider: AbstractCodeSnippetProvider
+        :param results: The queue to report the provider's code snippets on.
+        :type results: Queue.Queue
+        """
+        start_time = time.time()
+        error = None
+        try:
+            for code_snippet in code_snippet_provider.iter_code_snippets():
+                results.put((index, CodeSnippetGenerator.CODE_SNIPPET, code_snippet))
+        except Exception as e:
+            error = e
+        results.put((index, CodeSnippetGenerator.DONE, (time.time() - start_time, error)))
+
+    def iter_code_snippets(self):
+        """ Generates code snippets for the task description, yielding each as soon as it can be.
+
+        All snippet providers are queried concurrently. A provider that misses its own deadline, or that has not
+        finished once the overall budget is spent, is given up on and contributes only the code snippets it returned
+        in time. Code snippets are yielded in provider order, regardless of which provider answered first, so that
+        the ranking of code snippets stays deterministic: the code snippets of a provider are held back only until
+        every provider before it has finished.
+
+        :return: An iterator over code snippets represented as strings.
+        :rtype: iterator
+        """
+        results = Queue.Queue()
+        start_time = time.time()
+        for index, code_snippet_provider in enumerate(self._code_snippet_providers):
+            thread = threading.Thread(
+                target=CodeSnippetGenerator._run_code_snippet_provider,
+                args=(index, code_snippet_provider, results),
+            )
+            # A provider that misses its deadline is abandoned, so it must not keep the process alive.
+            thread.daemon = True
+            thread.start()
+
+        budget_deadline = start_time + self._budget
+        deadlines = dict(
+            (index, min(start_time + code_snippet_provider.get_deadline(), budget_deadline))
+            for index, code_snippet_provider in enumerate(self._code_snippet_providers)
+        )
+        pending_code_snippets = [[] for _ in self._code_snippet_providers]
+        num_code_snippets = [0] * len(self._code_snippet_providers)
+        next_index = 0
+        while next_index < len(self._code_snippet_providers):
+            if deadlines:
+                timeout = min(deadlines.itervalues()) - time.time()
+                try:
+                    index, kind, payload = results.get(timeout=max(timeout, 0))
+                except Queue.Empty:
+                    now = time.time()
+                    for expired_index in [index for index, deadline in deadlines.iteritems() if deadline <= now]:
+                        del deadlines[expired_index]
+                        self._record_provider_stats(expired_index, ProviderStats(
+                            now - start_time,
+                            num_code_snippets[expired_index],
+                            True,
+                            None,
+                        ))
+                else:
+                    if index not in deadlines:
+                        # The provider answered after it was already given up on.
+                        continue
+                    if kind == CodeSnippetGenerator.CODE_SNIPPET:
+                        pending_code_snippets[index].append(payload)
+                        num_code_snippets[index] += 1
+                    else:
+                        del deadlines[index]
+                        latency, error = payload
+                        self._record_provider_stats(index, ProviderStats(
+                            latency,
+                            num_code_snippets[index],
+                            False,
+                            error,
+                        ))
+            # Yield everything from the earliest unfinished provider, and from every finished provider before it.
+            while next_index < len(self._code_snippet_providers):
+                for code_snippet in pending_code_snippets[next_index]:
+                    self._code_snippets.append(code_snippet)
+                    yield code_snippet
+                pending_code_snippets[next_index] = []
+                if next_index in deadlines:
+                    break
+                next_index += 1
 
     def generate_code_snippets(self):
         """ Generates and returns code snippets for the task description.
@@ -35,6 +160,22 @@ class CodeSnippetGenerator(object):
         :return: A list of code snippets represented as strings.
         :rtype: list
         """
-        for code_snippet_provider in self._code_snippet_providers:
-            self._code_snippets += code_snippet_provider.get_code_snippets()
-        return self._code_snippets
+        return list(self.iter_code_snippets())
+
+    def _record_provider_stats(self, index, provider_stats):
+        """ Records how the provider at the given index fared.
+
+        :param index: The index of the provider in `_code_snippet_providers`.
+        :type index: int
+        :param provider_stats: How the provider fared.
+        :type provider_stats: ProviderStats
+        """
+        self._provider_stats[self._code_snippet_providers[index].__class__.__name__] = provider_stats
+
+    def get_provider_stats(self):
+        """ Returns how each snippet provider fared during the last generation of code snippets.
+
+        :return: A mapping of snippet provider names to `ProviderStats`.
+        :rtype: dict
+        """
+        return self._provider_stats
@@ -2,6 +2,9 @@
 
 """ Encapsulates the Base API for Snippet Providers. """
 
+from config import CODE_SNIPPET_PROVIDER_DEADLINE
+from snippet_cache import SnippetCache
+
 
 class AbstractCodeSnippetProvider(object):
     """ A Template Class for Snippet Providers.
@@ -12,19 +15,107 @@ class AbstractCodeSnippetProvider(object):
     :type _task_description: str
     :attr _language: The programming language the code snippets should be in.
     :type _language: str
+    :attr _priority: The priority of the provider's web requests, where lower priorities are sent first.
+    :type _priority: int
+    :attr _cache: The on-disk cache of search results and file bodies shared by all snippet providers.
+    :type _cache: SnippetCache
     """
-    def __init__(self, task_description, language):
+    # The number of seconds the provider is given to return its code snippets, or `None` to use the configured
+    # default. Subclasses backed by slow sources may override this.
+    DEADLINE = None
+
+    def __init__(self, task_description, language, priority=None):
         """ Initializes the `AbstractCodeSnippetProvider` object.
 
         :param task_description: A description of the task to complete.
         :type task_description: str
         :param language: The programming language the code snippets should be in.
         :type language: str
+        :param priority: The priority of the provider's web requests, where lower priorities are sent first
+            (default: None).
+        :type priority: int
         """
         self._code_snippets = []
         self._task_description = task_description
         self._language = language
+        self._priority = priority
+        self._cache = SnippetCache.get_shared()
+
+    def _get_search_results_cache_key(self, page_number):
+        """ Returns the key to cache the search results on the given page under.
+
+        :param page_number: The page of search results.
+        :type page_number: int
+
+        :return: The key to cache the search results on the given page under.
+        :rtype: tuple
+        """
+        return self.__class__.__name__, self._task_description, self._language, page_number
+
+    def _get_cached_search_results(self, page_number):
+        """ Returns the cached search results on the given page, or `None` if they are not cached.
+
+        :param page_number: The page of search results.
+        :type page_number: int
+
+        :return: The cached search results on the given page, or `None` if they are not cached.
+        :rtype: list
+        """
+        return self._cache.get(
+            SnippetCache.SEARCH_RESULTS_NAMESPACE,
+            self._get_search_results_cache_key(page_number),
+        )
+
+    def _cache_search_results(self, page_number, search_results):
+        """ Caches the search results on the given page.
+
+        :param page_number: The page of search results.
+        :type page_number: int
+        :param search_results: The search results on the page.
+        :type search_results: list
+        """
+        self._cache.set(
+            SnippetCache.SEARCH_RESULTS_NAMESPACE,
+            self._get_search_results_cache_key(page_number),
+            search_results,
+        )
+
+    def _get_cached_file_body(self, url):
+        """ Returns the cached body of the file at the given URL, or `None` if it is not cached.
+
+        :param url: The URL of the file.
+        :type url: str
+
+        :return: The cached body of the file at the given URL, or `None` if it is not cached.
+        :rtype: str
+        """
+        return self._cache.get(SnippetCache.FILE_BODIES_NAMESPACE, url)
+
+    def _cache_file_body(self, url, file_body):
+        """ Caches the body of the file at the given URL.
+
+        :param url: The URL of the file.
+        :type url: str
+        :param file_body: The body of the file.
+        :type file_body: str
+        """
+        self._cache.set(SnippetCache.FILE_BODIES_NAMESPACE, url, file_body)
+
+    def get_deadline(self):
+        """ Returns the number of seconds the provider is given to return its code snippets.
+
+        :return: The number of seconds the provider is given to return its code snippets.
+        :rtype: float
+        """
+        return self.DEADLINE or CODE_SNIPPET_PROVIDER_DEADLINE
 
     def get_code_snippets(self):
         """ Returns the code snippets related to the given task description and language. """
         raise NotImplementedError
+
+    def iter_code_snippets(self):
+        """ Yields the code snippets related to the given task description and language, most relevant first.
+
+        Subclasses that gather code snippets one at a time should override this to yield each as soon as it arrives.
+        """
+        return iter(self.get_code_snippets())
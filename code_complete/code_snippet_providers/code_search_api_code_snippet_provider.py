@@ -0,0 +1,242 @@
+# -*- coding: utf-8 -*-
+
+""" Encapsulates Functionality for Gathering Relevant Code Snippets from a Code Search JSON API. """
+
+import httplib
+
+import requests
+
+from abstract_code_snippet_provider import AbstractCodeSnippetProvider
+from config import CODE_SEARCH_API_DOMAIN
+from config import CODE_SEARCH_API_SCHEME
+from function_extractor import FunctionExtractor
+from utils.http_client import HttpClient
+from utils.request_scheduler import RateLimitedError
+from utils.request_builder import RequestBuilder
+
+
+class CodeSearchApiCodeSnippetProvider(AbstractCodeSnippetProvider):
+    """ Encapsulates Functionality for Gathering Relevant Code Snippets from a Code Search JSON API.
+
+    The API at `CODE_SEARCH_API_DOMAIN` answers a search with the fragment of each matching file and the line range
+    the fragment spans. Rather than downloading every matching file in full, the provider returns the function the
+    fragment sits in, reading a matching file only up to the end of that function.
+
+    Example of a search response:
+
+    .. code-block:: python
+
+        {
+            "results": [
+                {
+                    "raw_url": "https://example.com/username/reponame/path/to/file.py",
+                    "fragment": "    return sorted(my_list)",
+                    "line_start": 12,
+                    "line_end": 12
+                }
+            ]
+        }
+    """
+    SEARCH_PATH = '/api/search'
+    LANGUAGE_KEY = 'l'
+    QUERY_KEY = 'q'
+    PAGE_KEY = 'page'
+    SPACE_DELIM = '+'
+
+    RESULTS_KEY = 'results'
+    RAW_URL_KEY = 'raw_url'
+    FRAGMENT_KEY = 'fragment'
+    LINE_START_KEY = 'line_start'
+
+    FUNCTION_CACHE_KEY_TEMPLATE = '%s#L%d'
+
+    # The number of search pages to iterate through.
+    NUM_PAGES_TO_CHECK = 1
+
+    NEW_LINE_DELIM = '\n'
+    FUNCTION_INDICATOR = 'def '
+    COMMENT_INDICATOR = '#'
+
+    def __init__(self, task_description, language, priority=None):
+        """ Initializes the `CodeSearchApiCodeSnippetProvider` object.
+
+        :param task_description: A description of the task to complete.
+        :type task_description: str
+        :param language: The programming language the code snippets should be in.
+        :type language: str
+        :param priority: The priority of the provider's web requests, where lower priorities are sent first
+            (default: None).
+        :type priority: int
+        """
+        AbstractCodeSnippetProvider.__init__(self, task_description, language, priority)
+        self._http_client = HttpClient(priority=priority)
+
+    @staticmethod
+    def _get_function_from_fragment(fragment):
+        """ Returns the fragment if it holds a complete top-level function, otherwise `None`.
+
+        :param fragment: A fragment of a matching file.
+        :type fragment: str
+
+        :return: The fragment if it holds a complete top-level function, otherwise `None`.
+        :rtype: str
+        """
+        try:
+            return fragment if FunctionExtractor(fragment).extract() else None
+        except SyntaxError:
+            return None
+
+    @staticmethod
+    def _is_function_end(line):
+        """ Returns whether the given line, following the body of a top-level function, ends that function.
+
+        :param line: A line of source code.
+        :type line: str
+
+        :return: Whether the given line is neither blank, indented nor a comment.
+        :rtype: bool
+        """
+        return bool(line.strip()) and not line[0].isspace() and \
+            not line.startswith(CodeSearchApiCodeSnippetProvider.COMMENT_INDICATOR)
+
+    @staticmethod
+    def _read_enclosing_function(lines, line_start):
+        """ Returns the top-level function enclosing the given line, consuming the given lines only up to the end of
+        that function.
+
+        :param lines: An iterator over the lines of a file, without line endings.
+        :type lines: iterator
+        :param line_start: The line, counting from 1, a search result's fragment starts on.
+        :type line_start: int
+
+        :return: The source of the enclosing function, or `None` if the line is not inside a top-level function.
+        :rtype: str
+        """
+        function_lines = None
+        for line_number, line in enumerate(lines, 1):
+            if line_number <= line_start and line.startswith(CodeSearchApiCodeSnippetProvider.FUNCTION_INDICATOR):
+                function_lines = []
+            elif function_lines is not None and CodeSearchApiCodeSnippetProvider._is_function_end(line):
+                if line_number <= line_start:
+                    # A later top-level statement ended the function before the fragment began.
+                    function_lines = None
+                    continue
+                break
+            if function_lines is not None:
+                function_lines.append(line)
+            if function_lines is None and line_number >= line_start:
+                return None
+        if not function_lines:
+            return None
+        while not function_lines[-1].strip() or \
+                function_lines[-1].startswith(CodeSearchApiCodeSnippetProvider.COMMENT_INDICATOR):
+            function_lines.pop()
+        return CodeSearchApiCodeSnippetProvider.NEW_LINE_DELIM.join(function_lines) + \
+            CodeSearchApiCodeSnippetProvider.NEW_LINE_DELIM
+
+    def _get_code_snippet_from_search_result(self, search_result):
+        """ Returns the function the given search result sits in, or `None` if it cannot be found.
+
+        :param search_result: A search result of the form shown in the class documentation.
+        :type search_result: dict
+
+        :return: The source of the function the search result sits in, or `None` if it cannot be found.
+        :rtype: str
+        """
+        code_snippet = CodeSearchApiCodeSnippetProvider._get_function_from_fragment(
+            search_result.get(CodeSearchApiCodeSnippetProvider.FRAGMENT_KEY, '')
+        )
+        if code_snippet is not None:
+            return code_snippet
+        raw_url = search_result.get(CodeSearchApiCodeSnippetProvider.RAW_URL_KEY)
+        line_start = search_result.get(CodeSearchApiCodeSnippetProvider.LINE_START_KEY)
+        if raw_url is None or line_start is None:
+            # Without the file and the line the fragment starts on, there is no function to read.
+            return None
+        cache_key = CodeSearchApiCodeSnippetProvider.FUNCTION_CACHE_KEY_TEMPLATE % (raw_url, line_start)
+        code_snippet = self._get_cached_file_body(cache_key)
+        if code_snippet is not None:
+            return code_snippet
+        try:
+            page = self._http_client.get(raw_url, stream=True)
+        except requests.RequestException:
+            return None
+        try:
+            if page.status_code != httplib.OK:
+                return None
+            code_snippet = CodeSearchApiCodeSnippetProvider._read_enclosing_function(
+                page.iter_lines(),
+                line_start,
+            )
+        except requests.RequestException:
+            return None
+        finally:
+            # Closing the response abandons whatever part of the file was not read.
+            page.close()
+        if code_snippet is not None:
+            self._cache_file_body(cache_key, code_snippet)
+        return code_snippet
+
+    def _get_search_results(self):
+        """ Returns the search results for the given task description and language.
+
+        :return: A list of search results of the form shown in the class documentation.
+        :rtype: list
+        """
+        search_results = []
+        for page_number in xrange(CodeSearchApiCodeSnippetProvider.NUM_PAGES_TO_CHECK):
+            page_search_results = self._get_cached_search_results(page_number)
+            if page_search_results is None:
+                request_url = RequestBuilder(
+                    CODE_SEARCH_API_DOMAIN,
+                    path=CodeSearchApiCodeSnippetProvider.SEARCH_PATH,
+                    scheme=CODE_SEARCH_API_SCHEME,
+                    params={
+                        CodeSearchApiCodeSnippetProvider.LANGUAGE_KEY: self._language,
+                        CodeSearchApiCodeSnippetProvider.PAGE_KEY: page_number + 1,
+                        CodeSearchApiCodeSnippetProvider.QUERY_KEY: CodeSearchApiCodeSnippetProvider.SPACE_DELIM.join(
+                            self._task_description.split()
+                        ),
+                    },
+                ).build()
+                try:
+                    page = self._http_client.get(request_url)
+                except RateLimitedError:
+                    # The API kept throttling the search, so settle for the pages already found, if there are any.
+                    if not search_results:
+                        raise
+                    break
+                if page.status_code != httplib.OK:
+                    break
+                page_search_results = page.json().get(CodeSearchApiCodeSnippetProvider.RESULTS_KEY, [])
+                self._cache_search_results(page_number, page_search_results)
+            if not page_search_results:
+                break
+            search_results += page_search_results
+        return search_results
+
+    def iter_code_snippets(self):
+        """ Yields the code snippets related to the given task description and language as soon as each and every
+        code snippet ranked before it have been read.
+
+        :return: An iterator over code snippets related to the given task description and language, in search-rank
+            order.
+        :rtype: iterator
+        """
+        if not CODE_SEARCH_API_DOMAIN:
+            return
+        for code_snippet in self._http_client.imap_concurrently(
+            self._get_code_snippet_from_search_result,
+            self._get_search_results(),
+        ):
+            if code_snippet is not None:
+                yield code_snippet
+
+    def get_code_snippets(self):
+        """ Returns the code snippets related to the given task description and language.
+
+        :return: A list of code snippets related to the given task description and language, in search-rank order.
+        :rtype: list
+        """
+        self._code_snippets = list(self.iter_code_snippets())
+        return self._code_snippets
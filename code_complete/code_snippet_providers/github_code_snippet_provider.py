@@ -4,9 +4,10 @@
 
 import httplib
 from lxml import html
-import requests
 
 from abstract_code_snippet_provider import AbstractCodeSnippetProvider
+from utils.http_client import HttpClient
+from utils.request_scheduler import RateLimitedError
 from utils.request_builder import RequestBuilder
 
 
@@ -36,15 +37,19 @@ class GithubCodeSnippetProvider(AbstractCodeSnippetProvider):
     XPATH_SNIPPET_URLS = '//div[contains(@class, "code-list-item") and contains(@class, "code-list-item-public")]' \
         '//p[@class="title"]//a[@title]/@href'
 
-    def __init__(self, task_description, language):
+    def __init__(self, task_description, language, priority=None):
         """ Initializes the `GithubCodeSnippetProvider` object.
 
         :param task_description: A description of the task to complete.
         :type task_description: str
         :param language: The programming language the code snippets should be in.
         :type language: str
+        :param priority: The priority of the provider's web requests, where lower priorities are sent first
+            (default: None).
+        :type priority: int
         """
-        AbstractCodeSnippetProvider.__init__(self, task_description, language)
+        AbstractCodeSnippetProvider.__init__(self, task_description, language, priority)
+        self._http_client = HttpClient(priority=priority)
 
     @staticmethod
     def _construct_raw_user_content_url_path(code_snippet_url):
@@ -67,27 +72,36 @@ class GithubCodeSnippetProvider(AbstractCodeSnippetProvider):
             parts_of_path[GithubCodeSnippetProvider.BLOB_INDEX + 1:]
         )
 
-    @staticmethod
-    def _get_code_snippets_from_snippet_urls(code_snippet_urls):
-        """ Returns the code snippets resident at the given snippet URls.
+    def _iter_code_snippets_from_snippet_urls(self, code_snippet_urls):
+        """ Yields the code snippets resident at the given snippet URls.
+
+        Snippets missing from the cache are downloaded concurrently, but are yielded in the same order as the given
+        snippet URLs so that the search ranking is preserved. Snippets whose download failed or timed out are left out.
 
         :param code_snippet_urls: A list of the URLs of code snippets related to the given task description and
             language.
         :type code_snippet_urls: list
 
-        :return: A list of the code snippets resident at the given snippet URLs.
-        :rtype: list
+        :return: An iterator over the code snippets resident at the given snippet URLs.
+        :rtype: iterator
         """
-        code_snippets = []
-        for code_snippet_url in code_snippet_urls:
-            raw_user_content_url_path = GithubCodeSnippetProvider._construct_raw_user_content_url_path(code_snippet_url)
-            request_url = RequestBuilder(
+        request_urls = [
+            RequestBuilder(
                 GithubCodeSnippetProvider.RAW_GITHUB_USER_CONTENT_DOMAIN,
-                path=raw_user_content_url_path,
-            ).build()
-            page = requests.get(request_url)
-            code_snippets.append(page.content)
-        return code_snippets
+                path=GithubCodeSnippetProvider._construct_raw_user_content_url_path(code_snippet_url),
+            ).build() for code_snippet_url in code_snippet_urls
+        ]
+        cached_code_snippets = [self._get_cached_file_body(request_url) for request_url in request_urls]
+        downloaded_code_snippets = self._http_client.iter_all_contents([
+            request_url for request_url, code_snippet in zip(request_urls, cached_code_snippets) if code_snippet is None
+        ])
+        for request_url, code_snippet in zip(request_urls, cached_code_snippets):
+            if code_snippet is None:
+                code_snippet = next(downloaded_code_snippets)
+                if code_snippet is None:
+                    continue
+                self._cache_file_body(request_url, code_snippet)
+            yield code_snippet
 
     def _get_code_snippet_urls(self):
         """ Returns the URLs of all code snippets related to the given task description and language.
@@ -97,6 +111,10 @@ class GithubCodeSnippetProvider(AbstractCodeSnippetProvider):
         """
         code_snippet_urls = []
         for page_number in xrange(GithubCodeSnippetProvider.NUM_PAGES_TO_CHECK):
+            cached_code_snippet_urls = self._get_cached_search_results(page_number)
+            if cached_code_snippet_urls is not None:
+                code_snippet_urls[0:0] = cached_code_snippet_urls
+                continue
             request_url = RequestBuilder(
                 GithubCodeSnippetProvider.GITHUB_DOMAIN,
                 path=GithubCodeSnippetProvider.GITHUB_SEARCH_PATH,
@@ -109,12 +127,21 @@ class GithubCodeSnippetProvider(AbstractCodeSnippetProvider):
                     GithubCodeSnippetProvider.GITHUB_TYPE_KEY: GithubCodeSnippetProvider.GITHUB_TYPE_VALUE,
                 },
             ).build()
-            page = requests.get(request_url)
+            try:
+                page = self._http_client.get(request_url)
+            except RateLimitedError:
+                # Github kept throttling the search, so settle for the pages already found, if there are any.
+                if not code_snippet_urls:
+                    raise
+                break
             if page.status_code != httplib.OK:
                 # This occurs if the page number exceeds the the number of pages for the available search results.
                 break
             tree = html.fromstring(page.content)
-            code_snippet_urls[0:0] = tree.xpath(GithubCodeSnippetProvider.XPATH_SNIPPET_URLS)
+            # Slicing turns the `lxml` smart strings into plain strings that can be pickled into the cache.
+            page_code_snippet_urls = [url[:] for url in tree.xpath(GithubCodeSnippetProvider.XPATH_SNIPPET_URLS)]
+            self._cache_search_results(page_number, page_code_snippet_urls)
+            code_snippet_urls[0:0] = page_code_snippet_urls
         return code_snippet_urls
 
     def get_code_snippets(self):
@@ -123,6 +150,13 @@ class GithubCodeSnippetProvider(AbstractCodeSnippetProvider):
         :return: A list of code snippets related to the given task description and language.
         :rtype: list
         """
-        code_snippet_urls = self._get_code_snippet_urls()
-        self._code_snippets = GithubCodeSnippetProvider._get_code_snippets_from_snippet_urls(code_snippet_urls)
+        self._code_snippets = list(self.iter_code_snippets())
         return self._code_snippets
+
+    def iter_code_snippets(self):
+        """ Yields the code snippets related to the given task description and language as they are downloaded.
+
+        :return: An iterator over the code snippets related to the given task description and language.
+        :rtype: iterator
+        """
+        return self._iter_code_snippets_from_snippet_urls(self._get_code_snippet_urls())
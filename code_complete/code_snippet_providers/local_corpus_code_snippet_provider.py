@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+
+""" Encapsulates Functionality for Gathering Relevant Code Snippets from a Local Source Tree. """
+
+import threading
+
+from abstract_code_snippet_provider import AbstractCodeSnippetProvider
+from config import LOCAL_CORPUS_INDEX_PATH
+from config import LOCAL_CORPUS_MAX_RESULTS
+from config import LOCAL_CORPUS_ROOT
+from utils.inverted_index import InvertedIndex
+
+
+class LocalCorpusCodeSnippetProvider(AbstractCodeSnippetProvider):
+    """ Encapsulates Functionality for Gathering Relevant Code Snippets from a Local Source Tree.
+
+    The functions of the source tree at `LOCAL_CORPUS_ROOT` are indexed once per process, re-indexing only the files
+    that changed since the persisted index was built, and every code snippet returned is a single function.
+    """
+    SUPPORTED_LANGUAGE = 'python'
+
+    _index = None
+    _index_lock = threading.Lock()
+
+    def __init__(self, task_description, language, priority=None):
+        """ Initializes the `LocalCorpusCodeSnippetProvider` object.
+
+        :param task_description: A description of the task to complete.
+        :type task_description: str
+        :param language: The programming language the code snippets should be in.
+        :type language: str
+        :param priority: The priority of the provider's web requests, where lower priorities are sent first
+            (default: None).
+        :type priority: int
+        """
+        AbstractCodeSnippetProvider.__init__(self, task_description, language, priority)
+
+    @staticmethod
+    def _get_index():
+        """ Returns the index over the local source tree, loading and updating it on first use.
+
+        :return: The index over the local source tree.
+        :rtype: InvertedIndex
+        """
+        with LocalCorpusCodeSnippetProvider._index_lock:
+            if LocalCorpusCodeSnippetProvider._index is None:
+                index = InvertedIndex.load(LOCAL_CORPUS_INDEX_PATH, LOCAL_CORPUS_ROOT)
+                if index.update():
+                    index.save(LOCAL_CORPUS_INDEX_PATH)
+                LocalCorpusCodeSnippetProvider._index = index
+            return LocalCorpusCodeSnippetProvider._index
+
+    def get_code_snippets(self):
+        """ Returns the code snippets related to the given task description and language.
+
+        :return: A list of code snippets related to the given task description and language, most relevant first.
+        :rtype: list
+        """
+        if not LOCAL_CORPUS_ROOT or self._language != LocalCorpusCodeSnippetProvider.SUPPORTED_LANGUAGE:
+            return []
+        self._code_snippets = LocalCorpusCodeSnippetProvider._get_index().search(
+            self._task_description,
+            LOCAL_CORPUS_MAX_RESULTS,
+        )
+        return self._code_snippets
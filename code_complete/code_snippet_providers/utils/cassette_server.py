@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+
+""" Encapsulates a Local HTTP Server Answering Requests from a Cassette. """
+
+import BaseHTTPServer
+import optparse
+import os
+import SocketServer
+import threading
+import time
+
+from http_transport import Cassette
+from http_transport import CassetteMissError
+from http_transport import ForwardingAdapter
+
+
+class _CassetteRequestHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+    """ Encapsulates the Handling of a Single Request to the `CassetteServer`. """
+
+    URL_TEMPLATE = '%s://%s%s'
+    DEFAULT_SCHEME = 'https'
+
+    def do_GET(self):
+        """ Answers the request with its recorded response, or with a 404 if none was recorded. """
+        url = _CassetteRequestHandler.URL_TEMPLATE % (
+            self.headers.get(ForwardingAdapter.FORWARDED_PROTO_HEADER, _CassetteRequestHandler.DEFAULT_SCHEME),
+            self.headers.get(ForwardingAdapter.FORWARDED_HOST_HEADER, self.headers.get('Host', '')),
+            self.path,
+        )
+        try:
+            status_code, headers, body = self.server.cassette.play('GET', url)
+        except CassetteMissError:
+            self.send_error(404)
+            return
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        self.send_response(status_code)
+        for key, value in headers.iteritems():
+            if key.lower() not in ('connection', 'server', 'date'):
+                self.send_header(key, value)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        """ Silences the per-request log lines, which would otherwise drown out the compiler's output. """
+        pass
+
+
+class CassetteServer(SocketServer.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+    """ Encapsulates a Local HTTP Server Answering Requests from a Cassette.
+
+    The server stands in for every host recorded on the cassette, such as `github.com` and
+    `raw.githubusercontent.com`, so the whole fetch path can be measured offline and reproducibly. Clients reach it
+    through a `ForwardingAdapter`, which names the original host of each request in its headers.
+
+    :attr cassette: The cassette to answer requests from.
+    :type cassette: Cassette
+    :attr latency: The number of seconds to wait before answering each request.
+    :type latency: float
+    """
+    daemon_threads = True
+    allow_reuse_address = True
+
+    DEFAULT_HOST = '127.0.0.1'
+    URL_TEMPLATE = 'http://%s:%d'
+
+    def __init__(self, cassette, host=None, port=0, latency=0):
+        """ Initializes the `CassetteServer` object.
+
+        :param cassette: The cassette to answer requests from.
+        :type cassette: Cassette
+        :param host: The host to listen on (default: None).
+        :type host: str
+        :param port: The port to listen on, or 0 to pick a free one (default: 0).
+        :type port: int
+        :param latency: The number of seconds to wait before answering each request (default: 0).
+        :type latency: float
+        """
+        BaseHTTPServer.HTTPServer.__init__(self, (host or CassetteServer.DEFAULT_HOST, port), _CassetteRequestHandler)
+        self.cassette = cassette
+        self.latency = latency
+
+    def get_url(self):
+        """ Returns the base URL the server is listening on.
+
+        :return: The base URL the server is listening on, such as `http://127.0.0.1:8000`.
+        :rtype: str
+        """
+        host, port = self.server_address[:2]
+        return CassetteServer.URL_TEMPLATE % (host, port)
+
+    def start(self):
+        """ Serves requests on a background thread until `shutdown` is called. """
+        thread = threading.Thread(target=self.serve_forever)
+        thread.daemon = True
+        thread.start()
+
+
+# Setup the Command-Line Option Parser.
+parser = optparse.OptionParser()
+parser.add_option('--cassette', dest='cassette_f', help='answer requests from the cassette FILE', metavar='FILE')
+parser.add_option('--host', dest='host', default=CassetteServer.DEFAULT_HOST, help='listen on HOST', metavar='HOST')
+parser.add_option('--port', dest='port', type='int', default=8000, help='listen on PORT', metavar='PORT')
+parser.add_option('--latency', dest='latency', type='float', default=0,
+                  help='wait SECONDS before answering each request', metavar='SECONDS')
+
+
+if __name__ == '__main__':
+    (options, args) = parser.parse_args()
+
+    if not options.cassette_f:
+        parser.error('Cassette not provided.')
+    elif not os.path.exists(options.cassette_f):
+        parser.error('File at `%s` does not exist.' % options.cassette_f)
+
+    server = CassetteServer(Cassette(options.cassette_f), options.host, options.port, options.latency)
+    print 'Serving %d recorded responses at %s' % (len(server.cassette), server.get_url())
+    server.serve_forever()
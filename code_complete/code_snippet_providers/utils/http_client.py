@@ -0,0 +1,195 @@
+# -*- coding: utf-8 -*-
+
+""" Encapsulates Functionality for Issuing Web Requests over a Shared Connection Pool. """
+
+from multiprocessing.pool import ThreadPool
+import threading
+import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from config import MAX_CONCURRENT_REQUESTS
+from config import MAX_REQUEST_RETRIES
+from config import REQUEST_TIMEOUT
+from request_scheduler import RateLimitedError
+from request_scheduler import RequestScheduler
+
+
+class HttpClient(object):
+    """ Encapsulates Functionality for Issuing Web Requests over a Shared Connection Pool.
+
+    Every `HttpClient` shares a single keep-alive `requests.Session`, so repeated requests to the same host reuse
+    their TCP/TLS connections instead of paying a fresh handshake per request. The session sends requests through the
+    transport set with `set_transport`, which may record or replay them instead of reaching the live hosts.
+
+    Requests are paced by the shared `RequestScheduler`, so no host is sent more requests than it allows, and requests
+    the host throttles are retried after backing off.
+
+    :attr _max_concurrent_requests: The maximum number of requests to have in flight at once.
+    :type _max_concurrent_requests: int
+    :attr _timeout: The number of seconds to wait on a single request before giving up on it.
+    :type _timeout: float
+    :attr _priority: The priority of the client's requests, where lower priorities are sent first.
+    :type _priority: int
+    :attr _scheduler: The scheduler pacing the client's requests.
+    :type _scheduler: RequestScheduler
+    """
+    HTTP_SCHEMES = ['http://', 'https://']
+
+    _session = None
+    _session_lock = threading.Lock()
+    _transport = None
+
+    def __init__(self, max_concurrent_requests=None, timeout=None, priority=None):
+        """ Initializes the `HttpClient` object.
+
+        :param max_concurrent_requests: The maximum number of requests to have in flight at once (default: None).
+        :type max_concurrent_requests: int
+        :param timeout: The number of seconds to wait on a single request before giving up on it (default: None).
+        :type timeout: float
+        :param priority: The priority of the client's requests, where lower priorities are sent first (default: None).
+        :type priority: int
+        """
+        self._max_concurrent_requests = max_concurrent_requests or MAX_CONCURRENT_REQUESTS
+        self._timeout = timeout or REQUEST_TIMEOUT
+        self._priority = priority or 0
+        self._scheduler = RequestScheduler.get_shared()
+
+    @staticmethod
+    def get_pool_options():
+        """ Returns the connection pool options every transport of the shared session should be created with.
+
+        :return: The keyword arguments for creating a `requests.adapters.HTTPAdapter`.
+        :rtype: dict
+        """
+        return {'pool_connections': MAX_CONCURRENT_REQUESTS, 'pool_maxsize': MAX_CONCURRENT_REQUESTS}
+
+    @staticmethod
+    def set_transport(transport):
+        """ Sets the transport every `HttpClient` sends its requests through, such as a `RecordingAdapter`.
+
+        :param transport: The transport to send requests through, or `None` to reach the live hosts.
+        :type transport: requests.adapters.BaseAdapter
+        """
+        with HttpClient._session_lock:
+            HttpClient._transport = transport
+            HttpClient._session = None
+
+    @staticmethod
+    def _get_session():
+        """ Returns the keep-alive session shared by all `HttpClient` objects, creating it on first use.
+
+        :return: The keep-alive session shared by all `HttpClient` objects.
+        :rtype: requests.Session
+        """
+        with HttpClient._session_lock:
+            if HttpClient._session is None:
+                session = requests.Session()
+                adapter = HttpClient._transport or HTTPAdapter(**HttpClient.get_pool_options())
+                for scheme in HttpClient.HTTP_SCHEMES:
+                    session.mount(scheme, adapter)
+                HttpClient._session = session
+            return HttpClient._session
+
+    def get(self, request_url, stream=False):
+        """ Issues a GET request for the given URL.
+
+        :param request_url: The URL to request.
+        :type request_url: str
+        :param stream: Whether to defer downloading the response body until it is read (default: False).
+        :type stream: bool
+
+        :return: The response to the request.
+        :rtype: requests.Response
+
+        :raises RateLimitedError: If the host throttled the request on every retry.
+        """
+        host = urlparse.urlsplit(request_url).netloc
+        for attempt in xrange(MAX_REQUEST_RETRIES + 1):
+            self._scheduler.acquire(host, self._priority)
+            response = HttpClient._get_session().get(request_url, timeout=self._timeout, stream=stream)
+            if not self._scheduler.record_response(host, response, attempt):
+                return response
+            response.close()
+        raise RateLimitedError('%s throttled %s on every retry' % (host, request_url), response=response)
+
+    def _get_content_or_none(self, request_url):
+        """ Returns the content resident at the given URL, or `None` if the request failed.
+
+        :param request_url: The URL to request.
+        :type request_url: str
+
+        :return: The content resident at the given URL, or `None` if the request failed.
+        :rtype: str
+        """
+        try:
+            return self.get(request_url).content
+        except requests.RequestException:
+            return None
+
+    def iter_all_contents(self, request_urls):
+        """ Concurrently fetches the content resident at each of the given URLs, yielding each as soon as it and every
+        content before it have arrived.
+
+        :param request_urls: A list of the URLs to request.
+        :type request_urls: list
+
+        :return: An iterator over the content resident at each URL, in the same order as the given URLs. The content
+            of a URL whose request failed or timed out is `None`.
+        :rtype: iterator
+        """
+        return self.imap_concurrently(self._get_content_or_none, request_urls)
+
+    def get_all_contents(self, request_urls):
+        """ Concurrently fetches the content resident at each of the given URLs.
+
+        :param request_urls: A list of the URLs to request.
+        :type request_urls: list
+
+        :return: A list holding the content resident at each URL, in the same order as the given URLs. The content of
+            a URL whose request failed or timed out is `None`.
+        :rtype: list
+        """
+        return self.map_concurrently(self._get_content_or_none, request_urls)
+
+    def imap_concurrently(self, function, items):
+        """ Lazily applies the given function to each of the given items, with up to `_max_concurrent_requests`
+        applications in flight at once.
+
+        :param function: A function issuing requests through this client.
+        :type function: callable
+        :param items: A list of the items to apply the function to.
+        :type items: list
+
+        :return: An iterator over the function's result for each item, in the same order as the given items.
+        :rtype: iterator
+        """
+        if not items:
+            return
+        pool = ThreadPool(min(self._max_concurrent_requests, len(items)))
+        try:
+            for result in pool.imap(function, items):
+                yield result
+        except GeneratorExit:
+            # The caller stopped early, so requests that have not started yet are dropped.
+            pool.terminate()
+            raise
+        else:
+            pool.close()
+        finally:
+            pool.join()
+
+    def map_concurrently(self, function, items):
+        """ Applies the given function to each of the given items, with up to `_max_concurrent_requests` applications
+        in flight at once.
+
+        :param function: A function issuing requests through this client.
+        :type function: callable
+        :param items: A list of the items to apply the function to.
+        :type items: list
+
+        :return: A list of the function's result for each item, in the same order as the given items.
+        :rtype: list
+        """
+        return list(self.imap_concurrently(function, items))
@@ -0,0 +1,256 @@
+# -*- coding: utf-8 -*-
+
+""" Encapsulates Transports for Recording and Replaying Web Requests. """
+
+import base64
+import gzip
+import io
+import json
+import os
+import threading
+import time
+import urlparse
+
+import requests
+from requests.adapters import BaseAdapter
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+
+class CassetteMissError(requests.ConnectionError):
+    """ Raised When a Replayed Request Has No Recorded Response. """
+
+
+class Cassette(object):
+    """ Encapsulates Recorded Request/Response Pairs Stored as Gzipped JSON.
+
+    Responses are keyed by request method and URL, and their bodies are base64-encoded so binary content survives the
+    round trip.
+
+    :attr _path: The path of the cassette file.
+    :type _path: str
+    :attr _interactions: A mapping of request keys to their recorded responses.
+    :type _interactions: dict
+    :attr _lock: A lock guarding `_interactions`, which is shared by concurrent requests.
+    :type _lock: threading.Lock
+    """
+    VERSION = 1
+
+    VERSION_KEY = 'version'
+    INTERACTIONS_KEY = 'interactions'
+    STATUS_CODE_KEY = 'status_code'
+    HEADERS_KEY = 'headers'
+    BODY_KEY = 'body'
+
+    REQUEST_KEY_TEMPLATE = '%s %s'
+
+    def __init__(self, path):
+        """ Initializes the `Cassette` object, loading the cassette file if it exists.
+
+        :param path: The path of the cassette file.
+        :type path: str
+        """
+        self._path = path
+        self._interactions = {}
+        self._lock = threading.Lock()
+        if os.path.exists(path):
+            with gzip.open(path, 'rb') as cassette_f:
+                self._interactions = json.load(cassette_f)[Cassette.INTERACTIONS_KEY]
+
+    @staticmethod
+    def get_request_key(method, url):
+        """ Returns the key the response to the given request is recorded under.
+
+        :param method: The HTTP method of the request.
+        :type method: str
+        :param url: The URL of the request.
+        :type url: str
+
+        :return: The key the response to the given request is recorded under.
+        :rtype: str
+        """
+        return Cassette.REQUEST_KEY_TEMPLATE % (method.upper(), url)
+
+    def record(self, method, url, status_code, headers, body):
+        """ Records the response to the given request, replacing any earlier recording.
+
+        :param method: The HTTP method of the request.
+        :type method: str
+        :param url: The URL of the request.
+        :type url: str
+        :param status_code: The status code of the response.
+        :type status_code: int
+        :param headers: The headers of the response.
+        :type headers: dict
+        :param body: The body of the response.
+        :type body: str
+        """
+        interaction = {
+            Cassette.STATUS_CODE_KEY: status_code,
+            Cassette.HEADERS_KEY: dict(headers),
+            Cassette.BODY_KEY: base64.b64encode(body),
+        }
+        with self._lock:
+            self._interactions[Cassette.get_request_key(method, url)] = interaction
+
+    def play(self, method, url):
+        """ Returns the recorded response to the given request.
+
+        :param method: The HTTP method of the request.
+        :type method: str
+        :param url: The URL of the request.
+        :type url: str
+
+        :return: The status code, headers and body of the recorded response.
+        :rtype: tuple
+
+        :raises CassetteMissError: If no response to the request was recorded.
+        """
+        with self._lock:
+            interaction = self._interactions.get(Cassette.get_request_key(method, url))
+        if interaction is None:
+            raise CassetteMissError('No recorded response for %s' % Cassette.get_request_key(method, url))
+        return (
+            interaction[Cassette.STATUS_CODE_KEY],
+            interaction[Cassette.HEADERS_KEY],
+            base64.b64decode(interaction[Cassette.BODY_KEY]),
+        )
+
+    def save(self):
+        """ Writes the cassette file, atomically replacing any earlier version. """
+        directory = os.path.dirname(self._path)
+        if directory and not os.path.isdir(directory):
+            os.makedirs(directory)
+        with self._lock:
+            cassette = {Cassette.VERSION_KEY: Cassette.VERSION, Cassette.INTERACTIONS_KEY: self._interactions}
+            tmp_path = '%s.tmp' % self._path
+            with gzip.open(tmp_path, 'wb') as cassette_f:
+                json.dump(cassette, cassette_f, sort_keys=True)
+        os.rename(tmp_path, self._path)
+
+    def __len__(self):
+        """ Returns the number of recorded responses. """
+        return len(self._interactions)
+
+
+def build_response(request, status_code, headers, body):
+    """ Returns a `requests.Response` to the given request holding the given status code, headers and body.
+
+    :param request: The request the response answers.
+    :type request: requests.PreparedRequest
+    :param status_code: The status code of the response.
+    :type status_code: int
+    :param headers: The headers of the response.
+    :type headers: dict
+    :param body: The body of the response.
+    :type body: str
+
+    :return: A response holding the given status code, headers and body.
+    :rtype: requests.Response
+    """
+    response = requests.Response()
+    response.status_code = status_code
+    response.headers = CaseInsensitiveDict(headers)
+    response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+    response.raw = io.BytesIO(body)
+    response.url = request.url
+    response.request = request
+    response.reason = ''
+    return response
+
+
+class RecordingAdapter(HTTPAdapter):
+    """ Encapsulates a Transport Recording Every Response It Receives onto a Cassette.
+
+    :attr _cassette: The cassette to record responses onto.
+    :type _cassette: Cassette
+    """
+    def __init__(self, cassette, **kwargs):
+        """ Initializes the `RecordingAdapter` object.
+
+        :param cassette: The cassette to record responses onto.
+        :type cassette: Cassette
+        """
+        HTTPAdapter.__init__(self, **kwargs)
+        self._cassette = cassette
+
+    def send(self, request, stream=False, **kwargs):
+        """ Sends the given request and records its response.
+
+        The response body is read in full so that it can be recorded, even when the caller asked to stream it.
+        """
+        response = HTTPAdapter.send(self, request, stream=True, **kwargs)
+        body = response.content
+        response.close()
+        # Content encodings are undone by `requests`, so the recorded body must not claim one.
+        headers = dict((key, value) for key, value in response.headers.iteritems() if key.lower() not in (
+            'content-encoding', 'transfer-encoding', 'content-length',
+        ))
+        self._cassette.record(request.method, request.url, response.status_code, headers, body)
+        return build_response(request, response.status_code, headers, body)
+
+
+class ReplayAdapter(BaseAdapter):
+    """ Encapsulates a Transport Answering Requests from a Cassette after a Simulated Latency.
+
+    :attr _cassette: The cassette to answer requests from.
+    :type _cassette: Cassette
+    :attr _latency: The number of seconds to wait before answering each request.
+    :type _latency: float
+    """
+    def __init__(self, cassette, latency=0):
+        """ Initializes the `ReplayAdapter` object.
+
+        :param cassette: The cassette to answer requests from.
+        :type cassette: Cassette
+        :param latency: The number of seconds to wait before answering each request (default: 0).
+        :type latency: float
+        """
+        BaseAdapter.__init__(self)
+        self._cassette = cassette
+        self._latency = latency
+
+    def send(self, request, **kwargs):
+        """ Answers the given request with its recorded response.
+
+        :raises CassetteMissError: If no response to the request was recorded.
+        """
+        status_code, headers, body = self._cassette.play(request.method, request.url)
+        if self._latency:
+            time.sleep(self._latency)
+        return build_response(request, status_code, headers, body)
+
+    def close(self):
+        """ Releases the resources of the transport, of which there are none. """
+        pass
+
+
+class ForwardingAdapter(HTTPAdapter):
+    """ Encapsulates a Transport Sending Every Request to a Single Local Server, such as the `CassetteServer`.
+
+    The original scheme and host of a request are passed along in the `X-Forwarded-Proto` and `X-Forwarded-Host`
+    headers, so the server can tell which recorded response to answer with.
+
+    :attr _server_url: The base URL of the server, such as `http://127.0.0.1:8000`.
+    :type _server_url: str
+    """
+    FORWARDED_PROTO_HEADER = 'X-Forwarded-Proto'
+    FORWARDED_HOST_HEADER = 'X-Forwarded-Host'
+
+    def __init__(self, server_url, **kwargs):
+        """ Initializes the `ForwardingAdapter` object.
+
+        :param server_url: The base URL of the server, such as `http://127.0.0.1:8000`.
+        :type server_url: str
+        """
+        HTTPAdapter.__init__(self, **kwargs)
+        self._server_url = server_url.rstrip('/')
+
+    def send(self, request, **kwargs):
+        """ Sends the given request to the server instead of its original host. """
+        parsed_url = urlparse.urlsplit(request.url)
+        request = request.copy()
+        request.headers[ForwardingAdapter.FORWARDED_PROTO_HEADER] = parsed_url.scheme
+        request.headers[ForwardingAdapter.FORWARDED_HOST_HEADER] = parsed_url.netloc
+        request.url = self._server_url + urlparse.urlunsplit(('', '', parsed_url.path or '/', parsed_url.query, ''))
+        return HTTPAdapter.send(self, request, **kwargs)
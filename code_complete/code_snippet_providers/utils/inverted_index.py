@@ -0,0 +1,301 @@
+# -*- coding: utf-8 -*-
+
+""" Encapsulates a Persistent Inverted Index over the Functions of a Source Tree. """
+
+import cPickle
+import heapq
+import keyword
+import math
+import os
+import re
+
+from function_extractor import FunctionExtractor
+
+
+class InvertedIndex(object):
+    """ Encapsulates a Persistent Inverted Index over the Functions of a Source Tree.
+
+    Every top-level function in every `.py` file under the root directory is a document. A function is indexed by the
+    terms of its name, its docstring and the identifiers in its body, and queries are ranked with BM25.
+
+    :attr _format_version: The `FORMAT_VERSION` of the class the index was built by.
+    :type _format_version: int
+    :attr _root: The root directory of the indexed source tree.
+    :type _root: str
+    :attr _documents: A mapping of document IDs to `(path, function name, line number, source)` tuples.
+    :type _documents: dict
+    :attr _document_lengths: A mapping of document IDs to the number of terms in the document.
+    :type _document_lengths: dict
+    :attr _postings: A mapping of terms to mappings of document IDs to term frequencies.
+    :type _postings: dict
+    :attr _file_documents: A mapping of indexed file paths to the IDs of the documents extracted from them.
+    :type _file_documents: dict
+    :attr _file_signatures: A mapping of indexed file paths to the `(mtime, size)` they had when indexed.
+    :type _file_signatures: dict
+    :attr _total_length: The total number of terms across all documents.
+    :type _total_length: int
+    :attr _next_document_id: The ID to assign to the next indexed document.
+    :type _next_document_id: int
+    :attr _term_impacts: A mapping of terms to their highest-scoring `(document ID, BM25 score)` pairs, cleared
+        whenever a file is re-indexed and filled back in once the update completes.
+    :type _term_impacts: dict
+    """
+    PYTHON_EXTENSION = '.py'
+
+    # The version of the persisted layout of the index, to be bumped whenever its attributes change, so an index
+    # persisted by an older version is rebuilt rather than loaded.
+    FORMAT_VERSION = 1
+
+    # BM25 parameters.
+    K1 = 1.2
+    B = 0.75
+
+    # The number of times a term in a function's name counts towards its frequency in the document.
+    NAME_TERM_WEIGHT = 3
+
+    # The number of highest-scoring documents per term considered by a query. Documents outside a term's top
+    # documents still rank through the query's other terms, so this bounds query time at little cost in quality.
+    MAX_IMPACTS_PER_TERM = 256
+
+    IDENTIFIER_REGEX = re.compile(r'[A-Za-z_][A-Za-z0-9_]*')
+    CAMEL_CASE_REGEX = re.compile(r'[A-Z]+(?=[A-Z][a-z])|[A-Z]?[a-z]+|[A-Z]+|\d+')
+
+    STOP_WORDS = frozenset(keyword.kwlist + ['a', 'an', 'of', 'the', 'to', 'self', 'none', 'true', 'false'])
+
+    def __init__(self, root):
+        """ Initializes the `InvertedIndex` object.
+
+        :param root: The root directory of the source tree to index.
+        :type root: str
+        """
+        self._format_version = InvertedIndex.FORMAT_VERSION
+        self._root = os.path.abspath(root)
+        self._documents = {}
+        self._document_lengths = {}
+        self._postings = {}
+        self._file_documents = {}
+        self._file_signatures = {}
+        self._total_length = 0
+        self._next_document_id = 0
+        self._term_impacts = {}
+
+    @staticmethod
+    def load(path, root):
+        """ Loads the index persisted at the given path, or returns an empty index if there is no usable one.
+
+        :param path: The path the index is persisted at.
+        :type path: str
+        :param root: The root directory of the source tree to index.
+        :type root: str
+
+        :return: The index persisted at the given path if it covers the given root and was built by the current
+            `FORMAT_VERSION`, otherwise an empty index.
+        :rtype: InvertedIndex
+        """
+        try:
+            with open(path, 'rb') as index_f:
+                index = cPickle.load(index_f)
+        except Exception:
+            # A missing, truncated or corrupt file, or one pickled from classes that no longer exist, is rebuilt.
+            return InvertedIndex(root)
+        if not isinstance(index, InvertedIndex) or \
+                getattr(index, '_format_version', None) != InvertedIndex.FORMAT_VERSION or \
+                index._root != os.path.abspath(root):
+            return InvertedIndex(root)
+        return index
+
+    def save(self, path):
+        """ Persists the index at the given path.
+
+        :param path: The path to persist the index at.
+        :type path: str
+        """
+        index_dir = os.path.dirname(path)
+        if index_dir and not os.path.isdir(index_dir):
+            os.makedirs(index_dir)
+        tmp_path = '%s.tmp' % path
+        with open(tmp_path, 'wb') as index_f:
+            cPickle.dump(self, index_f, cPickle.HIGHEST_PROTOCOL)
+        os.rename(tmp_path, path)
+
+    @staticmethod
+    def tokenize(text):
+        """ Splits the given text into lowercase terms, breaking up snake_case and camelCase identifiers.
+
+        :param text: The text to tokenize.
+        :type text: str
+
+        :return: A list of the terms in the text.
+        :rtype: list
+
+        .. code-block:: python
+
+            text = 'def sortListOfStrings(my_list):'
+
+            # Returns ...
+
+                ['sort', 'list', 'strings', 'my', 'list']
+        """
+        terms = []
+        for identifier in InvertedIndex.IDENTIFIER_REGEX.findall(text):
+            for part in identifier.split('_'):
+                for term in InvertedIndex.CAMEL_CASE_REGEX.findall(part):
+                    term = term.lower()
+                    if term not in InvertedIndex.STOP_WORDS:
+                        terms.append(term)
+        return terms
+
+    def _add_document(self, path, extracted_function):
+        """ Adds the given function to the index.
+
+        :param path: The path of the file the function was extracted from.
+        :type path: str
+        :param extracted_function: The function to index.
+        :type extracted_function: ExtractedFunction
+
+        :return: The ID of the new document.
+        :rtype: int
+        """
+        document_id = self._next_document_id
+        self._next_document_id += 1
+        terms = InvertedIndex.tokenize(extracted_function.name) * InvertedIndex.NAME_TERM_WEIGHT
+        terms += InvertedIndex.tokenize(extracted_function.source)
+        term_frequencies = {}
+        for term in terms:
+            term_frequencies[term] = term_frequencies.get(term, 0) + 1
+        for term, frequency in term_frequencies.iteritems():
+            self._postings.setdefault(term, {})[document_id] = frequency
+        self._documents[document_id] = (
+            path,
+            extracted_function.name,
+            extracted_function.lineno,
+            extracted_function.source,
+        )
+        self._document_lengths[document_id] = len(terms)
+        self._total_length += len(terms)
+        self._term_impacts = {}
+        return document_id
+
+    def _remove_file(self, path):
+        """ Removes every document extracted from the given file from the index.
+
+        :param path: The path of the file.
+        :type path: str
+        """
+        for document_id in self._file_documents.pop(path, []):
+            self._term_impacts = {}
+            _, _, _, source = self._documents.pop(document_id)
+            self._total_length -= self._document_lengths.pop(document_id)
+            for term in set(InvertedIndex.tokenize(source)):
+                postings = self._postings.get(term)
+                if postings is None:
+                    continue
+                postings.pop(document_id, None)
+                if not postings:
+                    del self._postings[term]
+        self._file_signatures.pop(path, None)
+
+    def _add_file(self, path, signature):
+        """ Adds every top-level function in the given file to the index.
+
+        :param path: The path of the file.
+        :type path: str
+        :param signature: The `(mtime, size)` of the file.
+        :type signature: tuple
+        """
+        self._file_signatures[path] = signature
+        try:
+            with open(path, 'rb') as source_f:
+                extracted_functions = FunctionExtractor(source_f.read()).extract()
+        except (IOError, SyntaxError):
+            extracted_functions = []
+        self._file_documents[path] = [
+            self._add_document(path, extracted_function) for extracted_function in extracted_functions
+        ]
+
+    def _iter_source_files(self):
+        """ Yields the path and `(mtime, size)` of every `.py` file under the root directory. """
+        for directory, _, file_names in os.walk(self._root):
+            for file_name in file_names:
+                if not file_name.endswith(InvertedIndex.PYTHON_EXTENSION):
+                    continue
+                path = os.path.join(directory, file_name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                yield path, (stat.st_mtime, stat.st_size)
+
+    def update(self):
+        """ Brings the index up to date with the source tree, re-indexing only the files that were added, changed or
+        removed since the last update.
+
+        :return: Whether the index changed.
+        :rtype: bool
+        """
+        changed = False
+        seen_paths = set()
+        for path, signature in self._iter_source_files():
+            seen_paths.add(path)
+            if self._file_signatures.get(path) == signature:
+                continue
+            self._remove_file(path)
+            self._add_file(path, signature)
+            changed = True
+        for path in set(self._file_signatures) - seen_paths:
+            self._remove_file(path)
+            changed = True
+        if changed:
+            # Score every term up front so that queries against the index never pay for it.
+            for term in self._postings:
+                self._get_term_impacts(term)
+        return changed
+
+    def _get_term_impacts(self, term):
+        """ Returns the highest-scoring documents for the given term, computing and memoizing them on first use.
+
+        :param term: A query term.
+        :type term: str
+
+        :return: A list of up to `MAX_IMPACTS_PER_TERM` `(document ID, BM25 score)` pairs.
+        :rtype: list
+        """
+        term_impacts = self._term_impacts.get(term)
+        if term_impacts is not None:
+            return term_impacts
+        postings = self._postings.get(term, {})
+        num_documents = len(self._documents)
+        average_length = float(self._total_length) / num_documents if num_documents else 1.0
+        idf = math.log(1 + (num_documents - len(postings) + 0.5) / (len(postings) + 0.5))
+        term_impacts = []
+        for document_id, frequency in postings.iteritems():
+            length_norm = InvertedIndex.K1 * (
+                1 - InvertedIndex.B + InvertedIndex.B * self._document_lengths[document_id] / average_length
+            )
+            term_impacts.append((document_id, idf * frequency * (InvertedIndex.K1 + 1) / (frequency + length_norm)))
+        term_impacts = heapq.nlargest(
+            InvertedIndex.MAX_IMPACTS_PER_TERM,
+            term_impacts,
+            key=lambda (document_id, score): (score, -document_id),
+        )
+        self._term_impacts[term] = term_impacts
+        return term_impacts
+
+    def search(self, query, limit):
+        """ Returns the functions most relevant to the given query, ranked by BM25.
+
+        :param query: The query to search for.
+        :type query: str
+        :param limit: The maximum number of functions to return.
+        :type limit: int
+
+        :return: A list of the sources of the most relevant functions, most relevant first.
+        :rtype: list
+        """
+        scores = {}
+        for term in set(InvertedIndex.tokenize(query)):
+            for document_id, score in self._get_term_impacts(term):
+                scores[document_id] = scores.get(document_id, 0.0) + score
+        # Break ties on the document ID so that the ranking is deterministic.
+        ranked_document_ids = heapq.nlargest(limit, scores, key=lambda document_id: (scores[document_id], -document_id))
+        return [self._documents[document_id][3] for document_id in ranked_document_ids]
@@ -0,0 +1,257 @@
+# -*- coding: utf-8 -*-
+
+""" Encapsulates Functionality for Scheduling Web Requests within the Rate Limits of Each Host. """
+
+from email.utils import mktime_tz
+from email.utils import parsedate_tz
+import heapq
+import httplib
+import itertools
+import random
+import threading
+import time
+
+import requests
+
+from config import REQUEST_BACKOFF_BASE
+from config import REQUEST_BACKOFF_MAX
+from config import REQUEST_BURST_PER_HOST
+from config import REQUEST_RATE_PER_HOST
+
+
+class RateLimitedError(requests.RequestException):
+    """ Raised When a Host Keeps Rate Limiting a Request after Every Retry. """
+
+
+class _HostState(object):
+    """ Encapsulates the Token Bucket and Waiting Requests of a Single Host.
+
+    :attr tokens: The number of requests that may be sent right away.
+    :type tokens: float
+    :attr rate: The number of tokens added per second.
+    :type rate: float
+    :attr updated: The time the tokens were last topped up.
+    :type updated: float
+    :attr blocked_until: The time before which no request may be sent, as asked for by the host.
+    :type blocked_until: float
+    :attr waiters: A heap of the `(priority, sequence number)` entries of the requests waiting to be sent.
+    :type waiters: list
+    """
+    def __init__(self, rate, burst):
+        """ Initializes the `_HostState` object.
+
+        :param rate: The number of tokens added per second.
+        :type rate: float
+        :param burst: The number of tokens the bucket starts with.
+        :type burst: int
+        """
+        self.tokens = float(burst)
+        self.rate = rate
+        self.updated = time.time()
+        self.blocked_until = 0
+        self.waiters = []
+
+
+class RequestScheduler(object):
+    """ Encapsulates Functionality for Scheduling Web Requests within the Rate Limits of Each Host.
+
+    Every host has a token bucket, so requests to it are sent at a sustained rate rather than in a burst that gets
+    throttled. Requests waiting on the same host are sent in priority order, lowest first, so the tasks closest to
+    being verified get their code snippets first.
+
+    The scheduler adapts to the host. When the host reports how many requests it has left until its limit resets,
+    the remaining requests are spread over that window. When the host throttles a request anyway, the rate is halved
+    and the host is left alone for as long as it asked, or for a jittered exponential backoff if it did not say. Each
+    successful request then recovers the rate a little, up to the configured rate.
+
+    :attr _rate: The maximum number of requests per second sent to a single host.
+    :type _rate: float
+    :attr _burst: The maximum number of requests sent to a single host at once after it was idle.
+    :type _burst: int
+    :attr _host_states: A mapping of hosts to their `_HostState` objects.
+    :type _host_states: dict
+    :attr _condition: A condition guarding `_host_states`, signalled whenever a request may have become sendable.
+    :type _condition: threading.Condition
+    :attr _sequence: A counter breaking priority ties in first-come, first-served order.
+    :type _sequence: itertools.count
+    """
+    RETRY_AFTER_HEADER = 'Retry-After'
+    RATE_LIMIT_REMAINING_HEADER = 'X-RateLimit-Remaining'
+    RATE_LIMIT_RESET_HEADER = 'X-RateLimit-Reset'
+
+    # The lowest rate, in requests per second, the scheduler slows a host down to.
+    MIN_RATE = 0.05
+
+    # The fraction of the configured rate recovered by each successful request after the host throttled one.
+    RATE_RECOVERY_FRACTION = 0.1
+
+    _shared_scheduler = None
+    _shared_scheduler_lock = threading.Lock()
+
+    def __init__(self, rate=None, burst=None):
+        """ Initializes the `RequestScheduler` object.
+
+        :param rate: The maximum number of requests per second sent to a single host (default: None).
+        :type rate: float
+        :param burst: The maximum number of requests sent to a single host at once after it was idle (default: None).
+        :type burst: int
+        """
+        self._rate = float(rate or REQUEST_RATE_PER_HOST)
+        self._burst = burst or REQUEST_BURST_PER_HOST
+        self._host_states = {}
+        self._condition = threading.Condition()
+        self._sequence = itertools.count()
+
+    @staticmethod
+    def get_shared():
+        """ Returns the scheduler shared by every `HttpClient` in the process, creating it on first use.
+
+        :return: The scheduler shared by every `HttpClient` in the process.
+        :rtype: RequestScheduler
+        """
+        with RequestScheduler._shared_scheduler_lock:
+            if RequestScheduler._shared_scheduler is None:
+                RequestScheduler._shared_scheduler = RequestScheduler()
+            return RequestScheduler._shared_scheduler
+
+    def _get_host_state(self, host):
+        """ Returns the state of the given host, creating it on first use. The caller must hold `_condition`.
+
+        :param host: The host requests are sent to.
+        :type host: str
+
+        :return: The state of the given host.
+        :rtype: _HostState
+        """
+        if host not in self._host_states:
+            self._host_states[host] = _HostState(self._rate, self._burst)
+        return self._host_states[host]
+
+    def _refill(self, host_state, now):
+        """ Tops up the tokens of the given host for the time passed since they were last topped up.
+
+        :param host_state: The state of the host.
+        :type host_state: _HostState
+        :param now: The current time.
+        :type now: float
+        """
+        host_state.tokens = min(self._burst, host_state.tokens + (now - host_state.updated) * host_state.rate)
+        host_state.updated = now
+
+    def acquire(self, host, priority=0):
+        """ Blocks until a request to the given host may be sent.
+
+        :param host: The host the request is sent to.
+        :type host: str
+        :param priority: The priority of the request, where lower priorities are sent first (default: 0).
+        :type priority: int
+        """
+        with self._condition:
+            host_state = self._get_host_state(host)
+            entry = (priority, next(self._sequence))
+            heapq.heappush(host_state.waiters, entry)
+            try:
+                while True:
+                    now = time.time()
+                    self._refill(host_state, now)
+                    if host_state.waiters[0] != entry:
+                        # Woken once the request ahead in line has been sent.
+                        self._condition.wait()
+                        continue
+                    wait = max(host_state.blocked_until - now, (1 - host_state.tokens) / host_state.rate)
+                    if wait <= 0:
+                        host_state.tokens -= 1
+                        return
+                    self._condition.wait(wait)
+            finally:
+                host_state.waiters.remove(entry)
+                heapq.heapify(host_state.waiters)
+                self._condition.notify_all()
+
+    @staticmethod
+    def _parse_retry_after(value, now):
+        """ Returns the number of seconds to wait given a `Retry-After` header, or `None` if it cannot be parsed.
+
+        :param value: The value of the header, either a number of seconds or an HTTP date.
+        :type value: str
+        :param now: The current time.
+        :type now: float
+
+        :return: The number of seconds to wait, or `None` if the header cannot be parsed.
+        :rtype: float
+        """
+        try:
+            return max(float(value), 0)
+        except ValueError:
+            parsed_date = parsedate_tz(value)
+            return max(mktime_tz(parsed_date) - now, 0) if parsed_date else None
+
+    @staticmethod
+    def _get_backoff(attempt):
+        """ Returns a jittered exponential backoff for the given retry attempt.
+
+        :param attempt: The number of times the request was already throttled.
+        :type attempt: int
+
+        :return: The number of seconds to wait before retrying.
+        :rtype: float
+        """
+        return random.uniform(0, min(REQUEST_BACKOFF_MAX, REQUEST_BACKOFF_BASE * 2 ** attempt))
+
+    @staticmethod
+    def is_rate_limited(response):
+        """ Returns whether the given response throttles its request, rather than answering or rejecting it.
+
+        A 404 or 422, such as for a search page past the last one, is an answer and is not retried.
+
+        :param response: The response to a request.
+        :type response: requests.Response
+
+        :return: Whether the response throttles its request.
+        :rtype: bool
+        """
+        if response.status_code == 429 or response.status_code == httplib.SERVICE_UNAVAILABLE:
+            return True
+        return response.status_code == httplib.FORBIDDEN and (
+            response.headers.get(RequestScheduler.RATE_LIMIT_REMAINING_HEADER) == '0' or
+            RequestScheduler.RETRY_AFTER_HEADER in response.headers
+        )
+
+    def record_response(self, host, response, attempt=0):
+        """ Adapts the schedule of the given host to the given response to a request sent to it.
+
+        :param host: The host the request was sent to.
+        :type host: str
+        :param response: The response to the request.
+        :type response: requests.Response
+        :param attempt: The number of times the request was already throttled (default: 0).
+        :type attempt: int
+
+        :return: Whether the response throttles its request, in which case it should be retried.
+        :rtype: bool
+        """
+        now = time.time()
+        is_rate_limited = RequestScheduler.is_rate_limited(response)
+        with self._condition:
+            host_state = self._get_host_state(host)
+            self._refill(host_state, now)
+            remaining = response.headers.get(RequestScheduler.RATE_LIMIT_REMAINING_HEADER)
+            reset = response.headers.get(RequestScheduler.RATE_LIMIT_RESET_HEADER)
+            if is_rate_limited:
+                host_state.rate = max(RequestScheduler.MIN_RATE, host_state.rate / 2.0)
+                host_state.tokens = min(host_state.tokens, 0)
+                retry_after = response.headers.get(RequestScheduler.RETRY_AFTER_HEADER)
+                backoff = RequestScheduler._parse_retry_after(retry_after, now) if retry_after else None
+                if backoff is None and remaining == '0' and reset and reset.isdigit():
+                    backoff = max(int(reset) - now, 0)
+                if backoff is None:
+                    backoff = RequestScheduler._get_backoff(attempt)
+                host_state.blocked_until = max(host_state.blocked_until, now + backoff)
+            elif remaining and remaining.isdigit() and reset and reset.isdigit() and int(reset) > now:
+                # Spread the requests left in the host's window over the rest of the window.
+                host_state.rate = min(self._rate, max(RequestScheduler.MIN_RATE, int(remaining) / (int(reset) - now)))
+            else:
+                host_state.rate = min(self._rate, host_state.rate + self._rate * RequestScheduler.RATE_RECOVERY_FRACTION)
+            self._condition.notify_all()
+        return is_rate_limited
+
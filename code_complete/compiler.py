@@ -2,70 +2,254 @@
 
 """ Encapsulates the CodeComplete Compiler. """
 
-import importlib
-import inspect
+import functools
 import itertools
+from multiprocessing.pool import ThreadPool
 import optparse
 import os
-import types
+import sys
+import threading
+from snippet_analysis.snippet_analyser import SnippetAnalyser
+from snippet_analysis.snippet_analysis_helper import LanguageMode
 from snippet_analysis.snippet_controller import SnippetController
 
+from analysis_budget import AnalysisBudget
+from analysis_budget import AnalysisBudgetExceededError
+from candidate_generator import CandidateGenerator
+from candidate_generator import TaskSolution
+from candidate_ranker import CandidateRanker
 from code_completer import CodeCompleter
 from code_snippet_generator import CodeSnippetGenerator
+from code_snippet_providers.utils.http_client import HttpClient
+from code_snippet_providers.utils.http_transport import Cassette
+from code_snippet_providers.utils.http_transport import ForwardingAdapter
+from code_snippet_providers.utils.http_transport import RecordingAdapter
+from code_snippet_providers.utils.http_transport import ReplayAdapter
+from config import ANALYSIS_QUEUE_SIZE
+from config import LANGUAGE
+from config import MAX_CANDIDATES_PER_TASK
 from config import READ_OPT
+from config import SANDBOX_NUM_WORKERS
 from config import TASK_INDICATOR
+from execution_service import ExecutionService
+from fork_test_runner import ForkTestRunner
+from function_extractor import FunctionExtractor
+from name_similarity_ranker import NameSimilarityRanker
+from progress_reporter import ProgressReporter
+from snippet_cache import SnippetCache
+from snippet_deduplicator import SnippetDeduplicator
+from snippet_pipeline import SnippetPipeline
+from snippet_request_coalescer import SnippetRequestCoalescer
 from task_descriptor import TaskDescriptor
 
 
 class TaskSolutionGenerator(object):
 
-    def __init__(self, task_descriptors, code_snippets_for_task_descriptors):
-        self._task_solutions = []
-        self._task_descriptors = task_descriptors
-        self._code_snippets = code_snippets_for_task_descriptors
-
-    def get_task_solutions(self):
-        for task_descriptor, code_snippets in zip(self._task_descriptors, self._code_snippets):
-            task_solutions = []
-            for code_snippet in code_snippets:
-<<<<<<< HEAD
-                tmp = 'tmp_program_jail_%s.py' % id(code_snippet)
-                open('code_complete/%s' % tmp, 'w').write(code_snippet + '\nALL_GLOBALS = dir()')
-                stub_names = []
-                try:
-                    tmp_program_jail = importlib.import_module(tmp.split('.')[0])
-                    for object_name in tmp_program_jail.ALL_GLOBALS:
-                        if not object_name.startswith('__') and isinstance(eval('tmp_program_jail.%s' % object_name), types.FunctionType):
-                            stub_names.append(object_name)
-                except:
-                    pass
-                for stub_name in stub_names:
-                    for inputs in itertools.permutations(task_descriptor.get_task_input_info()):
-                        for outputs in itertools.permutations(task_descriptor.get_task_output_info()):
-                            try:
-                                task_solutions.append(
-                                    (''.join(inspect.getsourcelines(eval('tmp_program_jail.%s' % stub_name))[0]), inputs, outputs, stub_name)
-                                )
-                            except:
-                                pass
-                os.remove('code_complete/%s' % tmp)
-                try:
-                    os.remove('%sc' % tmp)
-                except OSError:
-                    pass
-                snippet_controller = SnippetController(code_snippet, task_descriptor.get_task_input_info(),
-                                                       task_descriptor.get_task_description())
-                match_functions, detail_functions = snippet_controller.find_snippet()
-
-                for function in match_functions:
-                    for combination in detail_functions[function][2]:
-                        task_solutions.append([''.join(detail_functions[function][0][0]),
-                                            [x[0] for x in combination],
-                                            task_descriptor.get_task_output_info().keys(),
-                                            function])
-            self._task_solutions.append(task_solutions)
-        print self._task_solutions
-        return self._task_solutions
+    def __init__(self, snippet_deduplicator):
+        self._snippet_deduplicator = snippet_deduplicator
+        # Executed `SnippetAnalyser` objects keyed by snippet fingerprint, shared by all copies of a snippet.
+        self._snippet_analysers = {}
+        self._snippet_analysers_lock = threading.Lock()
+        # Analyses of earlier runs are looked up in the persistent cache before a snippet is executed.
+        self._snippet_cache = SnippetCache.get_shared()
+        self._num_cached_analyses = 0
+        # The code snippets whose analysis was cut for exceeding its budget, as `(label, error, seconds spent)`. Those
+        # exceeding their own budget are blacklisted, in memory and in the persistent cache, and never analysed again.
+        self._cut_snippets = []
+        self._blacklist = {}
+        self._num_blacklisted_skipped = 0
+        self._blacklisted_time_saved = 0.0
+        self._budgets_lock = threading.Lock()
+        # The `SyntaxError`s of the code snippets that failed to parse.
+        self._parse_errors = []
+        self._parse_errors_lock = threading.Lock()
+
+    @staticmethod
+    def _get_snippet_label(fingerprint, code_snippet):
+        first_line = next((line.strip() for line in code_snippet.splitlines() if line.strip()), '')
+        return '%s (%s)' % (fingerprint[:8], first_line[:60])
+
+    def _get_blacklist_entry(self, fingerprint):
+        with self._budgets_lock:
+            blacklist_entry = self._blacklist.get(fingerprint)
+        if blacklist_entry is None:
+            blacklist_entry = self._snippet_cache.get(SnippetCache.ANALYSIS_BLACKLIST_NAMESPACE, fingerprint)
+        return blacklist_entry
+
+    def _record_cut_snippet(self, fingerprint, code_snippet, snippet_budget, error):
+        label = TaskSolutionGenerator._get_snippet_label(fingerprint, code_snippet)
+        with self._budgets_lock:
+            self._cut_snippets.append((label, error, snippet_budget.wall_time))
+            if error.budget is not snippet_budget:
+                # The task ran out of budget, which is not down to this snippet.
+                return
+            blacklist_entry = (str(error), snippet_budget.wall_time)
+            self._blacklist[fingerprint] = blacklist_entry
+        self._snippet_cache.set(SnippetCache.ANALYSIS_BLACKLIST_NAMESPACE, fingerprint, blacklist_entry)
+
+    def _find_snippet(self, task_descriptor, code_snippet, task_budget, name_ranker):
+        fingerprint = SnippetDeduplicator.fingerprint(code_snippet)
+        cache_key = (SnippetAnalyser.VERSION, fingerprint)
+        with self._snippet_analysers_lock:
+            snippet_analyser = self._snippet_analysers.get(fingerprint)
+        if snippet_analyser is not None:
+            self._snippet_deduplicator.record_shared_analysis()
+        else:
+            results = self._snippet_cache.get(SnippetCache.SNIPPET_ANALYSES_NAMESPACE, cache_key)
+            if results is not None:
+                snippet_analyser = SnippetAnalyser(code_snippet, LanguageMode.python)
+                snippet_analyser.set_results(results)
+                with self._snippet_analysers_lock:
+                    self._num_cached_analyses += 1
+        if snippet_analyser is None:
+            blacklist_entry = self._get_blacklist_entry(fingerprint)
+            if blacklist_entry is not None:
+                with self._budgets_lock:
+                    self._num_blacklisted_skipped += 1
+                    self._blacklisted_time_saved += blacklist_entry[1]
+                return [], {}
+        snippet_budget = AnalysisBudget.for_snippet(task_budget)
+        snippet_controller = SnippetController(code_snippet, task_descriptor.get_task_input_info(),
+                                               task_descriptor.get_task_description(),
+                                               snippet_analyser=snippet_analyser, budget=snippet_budget,
+                                               name_ranker=name_ranker)
+        try:
+            match_functions, detail_functions = snippet_controller.find_snippet()
+        except AnalysisBudgetExceededError as e:
+            self._record_cut_snippet(fingerprint, code_snippet, snippet_budget, e)
+            return [], {}
+        with self._snippet_analysers_lock:
+            self._snippet_analysers[fingerprint] = snippet_controller.snippet_analyser
+        if snippet_analyser is None:
+            self._snippet_cache.set(SnippetCache.SNIPPET_ANALYSES_NAMESPACE, cache_key,
+                                    snippet_controller.snippet_analyser.get_results())
+        return match_functions, detail_functions
+
+    def _iter_stub_task_solutions(self, task_descriptor, candidate_generator, extracted_functions):
+        for extracted_function in extracted_functions:
+            if extracted_function.name.startswith('__'):
+                continue
+            if self._snippet_deduplicator.is_duplicate_function((id(task_descriptor), 'stub'), extracted_function.source):
+                continue
+            # A function's candidates come best first, so no more than the task keeps can ever be needed.
+            for task_solution in itertools.islice(candidate_generator.iter_candidates(extracted_function),
+                                                  MAX_CANDIDATES_PER_TASK):
+                yield task_solution
+
+    def _iter_matched_task_solutions(self, task_descriptor, match_functions, detail_functions):
+        for function in match_functions:
+            function_source = ''.join(detail_functions[function][0][0])
+            if self._snippet_deduplicator.is_duplicate_function((id(task_descriptor), 'match'), function_source):
+                continue
+            # Each combination pairs the function's arguments, in order, with the task inputs bound to them.
+            for combination in itertools.islice(detail_functions[function][2], MAX_CANDIDATES_PER_TASK):
+                yield TaskSolution(function_source,
+                                   [task_input for _, task_input in combination],
+                                   task_descriptor.get_task_output_info().keys(),
+                                   function)
+
+    def _analyse_snippet(self, task_descriptor, task_budget, name_ranker, code_snippet):
+        try:
+            extracted_functions = FunctionExtractor(code_snippet).extract()
+        except SyntaxError as e:
+            with self._parse_errors_lock:
+                self._parse_errors.append(e)
+            return [], []
+        if not extracted_functions:
+            return [], []
+        # The snippet is analysed here, on the analysis pool, while its matchings are only generated when iterated.
+        match_functions, detail_functions = self._find_snippet(task_descriptor, code_snippet, task_budget, name_ranker)
+        return extracted_functions, self._iter_matched_task_solutions(task_descriptor, match_functions,
+                                                                      detail_functions)
+
+    def iter_task_solutions(self, task_descriptor, code_snippets):
+        """ Yields the best task solutions for the given task, analysing each code snippet as soon as it arrives.
+
+        The functions of a code snippet are extracted from its parsed source, without writing or executing it. Code
+        snippets that fail to parse hold no usable functions, so they are counted for the report and skipped. The
+        candidate bindings of each function are generated lazily, best first, so no more than `MAX_CANDIDATES_PER_TASK`
+        are ever built per function.
+
+        Analysing a code snippet executes it in the sandboxed `ExecutionService`, so up to `SANDBOX_NUM_WORKERS` code
+        snippets are analysed at once, and at most `ANALYSIS_QUEUE_SIZE` are taken from the code snippets before their
+        analysis is consumed, so a slow analysis holds back the fetch. Once every code snippet of the task is analysed,
+        the task solutions of all of them are ranked together by a `CandidateRanker`, and the best
+        `MAX_CANDIDATES_PER_TASK` are yielded, best first. The executions are charged to a budget per code snippet and
+        one for the whole task. A code snippet whose analysis runs out of budget only yields its stub task solutions,
+        and is blacklisted if it ran out of its own budget. The functions of every code snippet are ranked by name
+        against the task description by a single `NameSimilarityRanker`.
+
+        :param task_descriptor: The `TaskDescriptor` object encapsulating the task.
+        :type task_descriptor: TaskDescriptor
+        :param code_snippets: An iterator over the code snippets found for the task.
+        :type code_snippets: iterator
+
+        :return: An iterator over the task solutions for the task.
+        :rtype: iterator
+        """
+        candidate_generator = CandidateGenerator(task_descriptor)
+        task_budget = AnalysisBudget.for_task()
+        name_ranker = NameSimilarityRanker(task_descriptor.get_task_description())
+        candidate_ranker = CandidateRanker(candidate_generator, name_ranker, MAX_CANDIDATES_PER_TASK)
+        analysis_pool = ThreadPool(SANDBOX_NUM_WORKERS)
+        # The pool takes its input as fast as it can, so each code snippet must wait for a free slot first.
+        analysis_slots = threading.Semaphore(ANALYSIS_QUEUE_SIZE)
+        stopped = threading.Event()
+
+        def iter_gated_snippets():
+            for code_snippet in self._snippet_deduplicator.iter_unique_snippets(code_snippets):
+                analysis_slots.acquire()
+                if stopped.is_set():
+                    return
+                yield code_snippet
+        try:
+            for snippet_rank, (extracted_functions, matched_task_solutions) in enumerate(analysis_pool.imap(
+                functools.partial(self._analyse_snippet, task_descriptor, task_budget, name_ranker),
+                iter_gated_snippets(),
+            )):
+                analysis_slots.release()
+                for task_solution in self._iter_stub_task_solutions(task_descriptor, candidate_generator,
+                                                                    extracted_functions):
+                    candidate_ranker.add(task_solution, snippet_rank)
+                for task_solution in matched_task_solutions:
+                    candidate_ranker.add(task_solution, snippet_rank)
+        finally:
+            # If the task is no longer needed, its fetch is stopped and code snippets not yet analysed are dropped.
+            stopped.set()
+            close = getattr(code_snippets, 'close', None)
+            if close is not None:
+                close()
+            analysis_slots.release()
+            analysis_pool.terminate()
+        for task_solution in candidate_ranker.iter_ranked():
+            yield task_solution
+
+    def get_report(self):
+        """ Returns a summary of the cached snippet analyses reused, of the code snippet analyses cut for running over
+        budget and of the code snippets that failed to parse.
+
+        :return: A summary of the cached snippet analyses reused, of the code snippet analyses cut for running over
+            budget and of the code snippets that failed to parse.
+        :rtype: str
+        """
+        with self._snippet_analysers_lock:
+            report = 'Reused %d cached snippet analyses.\n' % self._num_cached_analyses
+        with self._budgets_lock:
+            report += 'Cut %d snippet analyses over budget, blacklisting %d.' % (
+                len(self._cut_snippets),
+                sum(1 for _, error, _ in self._cut_snippets if error.budget.name == AnalysisBudget.SNIPPET_BUDGET_NAME),
+            )
+            for label, error, wall_time in self._cut_snippets:
+                report += '\n\t%s: %s after %.1fs' % (label, error, wall_time)
+            report += '\nSkipped %d blacklisted snippets, saving at least %.1fs of analysis.\n' % (
+                self._num_blacklisted_skipped,
+                self._blacklisted_time_saved,
+            )
+        with self._parse_errors_lock:
+            report += 'Skipped %d snippets that failed to parse.' % len(self._parse_errors)
+            for error in self._parse_errors:
+                report += '\n\t%s: %s (line %s)' % (type(error).__name__, error.msg, error.lineno)
+        return report
 
 
 class Compiler(object):
@@ -75,32 +259,120 @@ class Compiler(object):
     :type _code_f: str
     :attr _tests_f: A path to the tests to be used to verify code completion.
     :type _tests_f: str
+    :attr _num_jobs: The maximum number of task solutions to verify at once.
+    :type _num_jobs: int
+    :attr _progress_reporter: The reporter of the progress of a headless compilation, or `None` to run interactively.
+    :type _progress_reporter: ProgressReporter
+    :attr _provider_stats: A mapping of snippet provider names to their `[tasks, latency, snippets, timeouts,
+        errors]` totals over the compilation.
+    :type _provider_stats: dict
+    :attr _provider_stats_lock: A lock guarding `_provider_stats`.
+    :type _provider_stats_lock: threading.Lock
+    :attr _snippet_request_coalescer: The coalescer sharing one fetch between equivalent task descriptions.
+    :type _snippet_request_coalescer: SnippetRequestCoalescer
+    :attr _snippet_deduplicator: The deduplicator removing duplicate code snippets and functions.
+    :type _snippet_deduplicator: SnippetDeduplicator
+    :attr _task_solution_generator: The generator turning code snippets into task solutions.
+    :type _task_solution_generator: TaskSolutionGenerator
     """
-    def __init__(self, code_f, tests_f):
+    def __init__(self, code_f, tests_f, num_jobs=1, progress_reporter=None):
         """ Initializes the `Compiler` object.
 
         :param code_f: A path to the file to code complete.
         :type code_f: str
         :param tests_f: A path to the tests to be used to verify code completion.
         :type tests_f: str
+        :param num_jobs: The maximum number of task solutions to verify at once (default: 1).
+        :type num_jobs: int
+        :param progress_reporter: The reporter of the progress of a headless compilation, or `None` to run
+            interactively (default: None).
+        :type progress_reporter: ProgressReporter
         """
         self._code_f = code_f
         self._tests_f = tests_f
+        self._num_jobs = num_jobs
+        self._progress_reporter = progress_reporter
+        self._provider_stats = {}
+        self._provider_stats_lock = threading.Lock()
+        self._snippet_request_coalescer = SnippetRequestCoalescer(self._iter_code_snippets)
+        self._snippet_deduplicator = SnippetDeduplicator()
+        self._task_solution_generator = TaskSolutionGenerator(self._snippet_deduplicator)
 
-    @staticmethod
-    def _get_code_snippets_for_task_descriptors(task_descriptors):
-        """ Returns the code snippets found by the `CodeSnippetGenerator` for each task descriptor.
+    def _iter_code_snippets(self, task_description, priority):
+        """ Yields the code snippets found by the `CodeSnippetGenerator` for the given task description.
 
-        :param task_descriptors: A list of `TaskDescriptor` objects encapsulating the completion tasks.
-        :type: list
+        :param task_description: A description of the task to complete.
+        :type task_description: str
+        :param priority: The priority of the web requests made for the task, where lower priorities are sent first.
+        :type priority: int
 
-        :return: The code snippets found by the `CodeSnippetGenerator` for each task descriptor.
-        :rtype: list
+        :return: An iterator over code snippets represented as strings.
+        :rtype: iterator
+        """
+        code_snippet_generator = CodeSnippetGenerator(task_description, priority=priority)
+        for code_snippet in code_snippet_generator.iter_code_snippets():
+            yield code_snippet
+        with self._provider_stats_lock:
+            self._record_provider_stats(code_snippet_generator.get_provider_stats())
+
+    def _produce_task_solutions(self, task_index, task_descriptor):
+        """ Returns the task solutions for the given task descriptor, found as its code snippets arrive.
+
+        Tasks with equivalent descriptions share a single fetch of code snippets. Web requests for earlier tasks,
+        which are verified first, are sent ahead of those for later tasks.
+
+        :param task_index: The index of the task among all tasks.
+        :type task_index: int
+        :param task_descriptor: The `TaskDescriptor` object encapsulating the task.
+        :type task_descriptor: TaskDescriptor
+
+        :return: An iterator over the task solutions for the task.
+        :rtype: iterator
+        """
+        return self._task_solution_generator.iter_task_solutions(
+            task_descriptor,
+            self._snippet_request_coalescer.iter_code_snippets(
+                task_descriptor.get_task_description(),
+                LANGUAGE,
+                priority=task_index,
+            ),
+        )
+
+    def _record_provider_stats(self, provider_stats):
+        """ Adds the given per-task snippet provider stats to the totals for the compilation.
+
+        The caller must hold `_provider_stats_lock`.
+
+        :param provider_stats: A mapping of snippet provider names to `ProviderStats`.
+        :type provider_stats: dict
         """
-        code_snippets = []
-        for task_descriptor in task_descriptors:
-            code_snippets.append(CodeSnippetGenerator(task_descriptor.get_task_description()).generate_code_snippets())
-        return code_snippets
+        for provider_name, stats in provider_stats.iteritems():
+            totals = self._provider_stats.setdefault(provider_name, [0, 0.0, 0, 0, 0])
+            totals[0] += 1
+            totals[1] += stats.latency
+            totals[2] += stats.num_code_snippets
+            totals[3] += stats.timed_out
+            totals[4] += stats.error is not None
+
+    def _get_provider_stats_report(self):
+        """ Returns a summary of how each snippet provider fared over the compilation.
+
+        :return: A summary of how each snippet provider fared over the compilation.
+        :rtype: str
+        """
+        return '\n'.join(
+            '%s: %d snippets in %.2fs over %d tasks (%d timeouts, %d errors)' % (
+                provider_name,
+                num_code_snippets,
+                latency,
+                num_tasks,
+                num_timeouts,
+                num_errors,
+            )
+            for provider_name, (num_tasks, latency, num_code_snippets, num_timeouts, num_errors) in sorted(
+                self._provider_stats.iteritems()
+            )
+        )
 
     def _extract_tasks_from_code(self):
         """ Extract tasks from code file.
@@ -117,20 +389,53 @@ class Compiler(object):
         return task_descriptors
 
     def compile(self):
-        """ Compiles code file to code completion using tests as verification. """
+        """ Compiles code file to code completion using tests as verification.
+
+        Code snippets are fetched, analysed and verified as a stream, so the first task solution of a task is verified
+        while code snippets for later tasks are still being fetched. A headless compilation ends with a summary holding
+        the reports of every stage, rather than printing them.
+        """
+        # The sandboxed workers and the test runner are forked before any other thread is started.
+        execution_service = ExecutionService.get_shared()
+        test_runner = ForkTestRunner(self._code_f, self._tests_f)
         task_descriptors = self._extract_tasks_from_code()
-        code_snippets_for_task_descriptors = self._get_code_snippets_for_task_descriptors(task_descriptors)
-        task_solutions = TaskSolutionGenerator(
-            task_descriptors,
-            code_snippets_for_task_descriptors,
-        ).get_task_solutions()
-        CodeCompleter(self._code_f, self._tests_f, task_descriptors, task_solutions).complete()
+        task_solutions = SnippetPipeline(task_descriptors, self._produce_task_solutions).start()
+        try:
+            num_tests_failed = CodeCompleter(self._code_f, self._tests_f, task_descriptors, task_solutions,
+                                             test_runner, num_jobs=self._num_jobs,
+                                             progress_reporter=self._progress_reporter).complete()
+        finally:
+            test_runner.stop()
+            execution_service.shutdown()
+        reports = [
+            self._get_provider_stats_report(),
+            self._snippet_request_coalescer.get_report(),
+            self._snippet_deduplicator.get_report(),
+            self._task_solution_generator.get_report(),
+        ]
+        if self._progress_reporter is not None:
+            self._progress_reporter.finish(num_tests_failed, reports)
+            return
+        for report in reports:
+            if report:
+                print report
 
 
 # Setup the Command-Line Option Parser.
 parser = optparse.OptionParser()
 parser.add_option('-c', '--code', dest='code_f', help='code complete FILE', metavar='FILE')
 parser.add_option('-t', '--tests', dest='test_f', help='run FILE to verify code completion', metavar='FILE')
+parser.add_option('-j', '--jobs', dest='num_jobs', type='int', default=1,
+                  help='verify up to N candidates at once, each in a workspace of its own', metavar='N')
+parser.add_option('--headless', dest='headless', action='store_true', default=False,
+                  help='never wait on the user, and report progress as JSON lines on stdout')
+parser.add_option('--summary', dest='summary_f', help='write a JSON summary of a headless run to FILE', metavar='FILE')
+parser.add_option('--record', dest='record_f', help='record web requests to the cassette FILE', metavar='FILE')
+parser.add_option('--replay', dest='replay_f', help='replay web requests from the cassette FILE', metavar='FILE')
+parser.add_option('--replay-server', dest='replay_server_url',
+                  help='send web requests to the cassette server at URL', metavar='URL')
+parser.add_option('--latency', dest='latency', type='float', default=0,
+                  help='wait SECONDS before answering each replayed web request', metavar='SECONDS')
 
 
 if __name__ == '__main__':
@@ -146,4 +451,29 @@ if __name__ == '__main__':
     elif not os.path.exists(options.test_f):
         parser.error('File at `%s` does not exist.' % options.test_f)
 
-    Compiler(options.code_f, options.test_f).compile()
+    if len(filter(None, [options.record_f, options.replay_f, options.replay_server_url])) > 1:
+        parser.error('Only one of `--record`, `--replay` and `--replay-server` may be provided.')
+    elif options.replay_f and not os.path.exists(options.replay_f):
+        parser.error('File at `%s` does not exist.' % options.replay_f)
+
+    if options.num_jobs < 1:
+        parser.error('At least one job must be allowed.')
+
+    if options.summary_f and not options.headless:
+        parser.error('`--summary` may only be provided with `--headless`.')
+
+    cassette = None
+    if options.record_f:
+        cassette = Cassette(options.record_f)
+        HttpClient.set_transport(RecordingAdapter(cassette, **HttpClient.get_pool_options()))
+    elif options.replay_f:
+        HttpClient.set_transport(ReplayAdapter(Cassette(options.replay_f), options.latency))
+    elif options.replay_server_url:
+        HttpClient.set_transport(ForwardingAdapter(options.replay_server_url, **HttpClient.get_pool_options()))
+
+    try:
+        progress_reporter = ProgressReporter(sys.stdout, options.summary_f) if options.headless else None
+        Compiler(options.code_f, options.test_f, options.num_jobs, progress_reporter).compile()
+    finally:
+        if cassette is not None:
+            cassette.save()
@@ -2,6 +2,9 @@
 
 """ High-Level Configuration Details for the CodeComplete Tool. """
 
+import multiprocessing
+import os
+
 
 # Read file I/O option.
 READ_OPT = 'r'
@@ -17,3 +20,118 @@ TASK_INDICATOR = '###'
 
 # The string sequence used within a comment to delimit the task description and the task's input/output information.
 TASK_DELIM = ':::'
+
+# The maximum number of web requests a snippet provider may have in flight at once.
+MAX_CONCURRENT_REQUESTS = 8
+
+# The number of seconds to wait on a single web request before giving up on it.
+REQUEST_TIMEOUT = 10
+
+# The maximum number of web requests per second sent to a single host.
+REQUEST_RATE_PER_HOST = 5
+
+# The maximum number of web requests sent to a single host at once after it was idle.
+REQUEST_BURST_PER_HOST = 10
+
+# The number of times a web request throttled by its host is retried before giving up on it.
+MAX_REQUEST_RETRIES = 4
+
+# The number of seconds the first retry of a throttled web request waits at most, doubling with every retry.
+REQUEST_BACKOFF_BASE = 1
+
+# The maximum number of seconds a retry of a throttled web request waits.
+REQUEST_BACKOFF_MAX = 60
+
+# The path of the on-disk cache of search results and snippet file bodies. Pointing it at a fresh path gives a cold
+# cache, such as when replaying recorded requests to measure the fetch path.
+CACHE_PATH = os.environ.get(
+    'CODE_COMPLETE_CACHE_PATH',
+    os.path.join(os.path.expanduser('~'), '.code_complete', 'cache.sqlite'),
+)
+
+# The number of seconds a cache entry stays fresh.
+CACHE_TTL = 24 * 60 * 60
+
+# The maximum number of bytes the cache may hold before the least recently used entries are evicted.
+CACHE_MAX_SIZE = 256 * 1024 * 1024
+
+# The root directory of a local source tree to search for code snippets, or `None` to not search one.
+LOCAL_CORPUS_ROOT = os.environ.get('CODE_COMPLETE_CORPUS_ROOT')
+
+# The path of the persisted inverted index over the local source tree.
+LOCAL_CORPUS_INDEX_PATH = os.path.join(os.path.expanduser('~'), '.code_complete', 'corpus_index.pickle')
+
+# The maximum number of code snippets to return from the local source tree.
+LOCAL_CORPUS_MAX_RESULTS = 20
+
+# The number of seconds a single snippet provider is given to return its code snippets.
+CODE_SNIPPET_PROVIDER_DEADLINE = 30
+
+# The number of seconds all snippet providers together are given to return code snippets for a task.
+CODE_SNIPPET_GENERATION_BUDGET = 45
+
+# The domain (and optional port) of a code search JSON API, or `None` to not query one.
+CODE_SEARCH_API_DOMAIN = os.environ.get('CODE_COMPLETE_CODE_SEARCH_API_DOMAIN')
+
+# The scheme to reach the code search JSON API over.
+CODE_SEARCH_API_SCHEME = os.environ.get('CODE_COMPLETE_CODE_SEARCH_API_SCHEME', 'https')
+
+# The maximum number of task solutions buffered per task between analysis and verification.
+PIPELINE_QUEUE_SIZE = 16
+
+# The number of tasks to gather and analyse code snippets for ahead of the task being verified.
+PIPELINE_PREFETCH_TASKS = 2
+
+# The maximum number of code snippets a task's fetch runs ahead of the slowest task reading them.
+SNIPPET_REQUEST_BUFFER_SIZE = 16
+
+# The maximum number of code snippets of a task waiting for, or undergoing, analysis at once.
+ANALYSIS_QUEUE_SIZE = 16
+
+# The number of sandboxed worker processes executing snippet code, and so the number of snippets analysed at once.
+SANDBOX_NUM_WORKERS = multiprocessing.cpu_count()
+
+# The number of seconds a single execution of snippet code is given to run.
+SANDBOX_TIMEOUT = 5
+
+# The maximum number of bytes of memory a single execution of snippet code may use.
+SANDBOX_MEMORY_LIMIT = 1024 * 1024 * 1024
+
+# The maximum number of files a single execution of snippet code may have open.
+SANDBOX_MAX_OPEN_FILES = 64
+
+# The maximum number of bytes of output kept from a single execution of snippet code.
+SANDBOX_MAX_OUTPUT_SIZE = 1024 * 1024
+
+# The modules the sandboxed workers import up front, so snippets importing them start warm. Modules that are not
+# installed are skipped.
+SANDBOX_PRELOADED_MODULES = [
+    'collections', 'datetime', 'itertools', 'json', 'math', 'os', 'random', 're', 'string', 'numpy', 'pandas',
+]
+
+# The number of seconds the executions analysing a single snippet may take together, in wall time and in CPU time.
+ANALYSIS_SNIPPET_WALL_TIME = 10
+ANALYSIS_SNIPPET_CPU_TIME = 5
+
+# The maximum number of executions analysing a single snippet may take.
+ANALYSIS_SNIPPET_MAX_EXECUTIONS = 256
+
+# The maximum number of bytes of memory a single execution analysing a snippet may use.
+ANALYSIS_SNIPPET_MEMORY_LIMIT = 512 * 1024 * 1024
+
+# The number of seconds the executions analysing the snippets of a single task may take together, in wall time and in
+# CPU time, and the maximum number of executions they may take.
+ANALYSIS_TASK_WALL_TIME = 60
+ANALYSIS_TASK_CPU_TIME = 30
+ANALYSIS_TASK_MAX_EXECUTIONS = 4096
+
+# The maximum number of task solutions verified per task, after ranking those of every code snippet of the task.
+MAX_CANDIDATES_PER_TASK = 32
+
+# The number of seconds the tests are given to run against a single candidate code file.
+TEST_RUNNER_TIMEOUT = 60
+
+# The maximum number of bytes of a file of the tests' directory copied into the workspace of a candidate run in
+# parallel. Larger files, and subdirectories, are symlinked instead, so building a workspace costs a listing of the
+# tests' directory and a copy of its small files, however large the project around the tests is.
+TEST_WORKSPACE_MAX_COPIED_FILE_SIZE = 1024 * 1024
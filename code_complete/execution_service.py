@@ -0,0 +1,746 @@
+# -*- coding: utf-8 -*-
+
+""" Encapsulates a Sandboxed Pool of Warm Processes for Executing Untrusted Code. """
+
+from cStringIO import StringIO
+import errno
+import json
+import multiprocessing
+from multiprocessing import reduction
+import _multiprocessing
+import os
+import Queue
+import resource
+import select
+import signal
+import sys
+import threading
+import time
+
+from config import SANDBOX_MAX_OPEN_FILES
+from config import SANDBOX_MAX_OUTPUT_SIZE
+from config import SANDBOX_MEMORY_LIMIT
+from config import SANDBOX_NUM_WORKERS
+from config import SANDBOX_PRELOADED_MODULES
+from config import SANDBOX_TIMEOUT
+
+
+class _TypeTracer(object):
+    """ Encapsulates a `sys.settrace` Hook Recording the Runtime Types of the Variables of Traced Code.
+
+    Only frames running the traced code itself are recorded, not those of the modules it calls into. A line that runs
+    many times, such as inside a loop, is only sampled its first `MAX_SAMPLES_PER_LINE` times.
+
+    :attr global_types: A mapping of global variable names to the representation of their last seen type.
+    :type global_types: dict
+    :attr local_types: A mapping of local variable names, of any function, to the representation of their last seen
+        type.
+    :type local_types: dict
+    :attr argument_types: A mapping of function names to a mapping of their argument names to the representation of
+        the type they were last called with.
+    :type argument_types: dict
+    """
+    FILENAME = '<snippet>'
+    MODULE_CODE_NAME = '<module>'
+
+    MAX_SAMPLES_PER_LINE = 8
+
+    def __init__(self, ignored_names):
+        """ Initializes the `_TypeTracer` object.
+
+        :param ignored_names: The global names not to record, such as those seeded into the code's namespace.
+        :type ignored_names: set
+        """
+        self.global_types = {}
+        self.local_types = {}
+        self.argument_types = {}
+        self._ignored_names = ignored_names
+        self._line_samples = {}
+
+    def _record(self, frame, types):
+        """ Records the types of the variables of the given frame.
+
+        :param frame: The frame to record.
+        :type frame: frame
+        :param types: The mapping to record the types into.
+        :type types: dict
+        """
+        for name, value in frame.f_locals.items():
+            if name.startswith('__') or name in self._ignored_names:
+                continue
+            types[name] = repr(type(value))
+
+    def trace(self, frame, event, arg):
+        """ Records the types of the variables of the traced code's frames, as called by `sys.settrace`. """
+        code = frame.f_code
+        if code.co_filename != _TypeTracer.FILENAME:
+            return None
+        is_module = code.co_name == _TypeTracer.MODULE_CODE_NAME
+        if event == 'call':
+            if not is_module:
+                argument_types = self.argument_types.setdefault(code.co_name, {})
+                for name in code.co_varnames[:code.co_argcount]:
+                    if name in frame.f_locals:
+                        argument_types[name] = repr(type(frame.f_locals[name]))
+            return self.trace
+        key = (code, frame.f_lineno, event)
+        samples = self._line_samples.get(key, 0)
+        if samples < _TypeTracer.MAX_SAMPLES_PER_LINE:
+            self._line_samples[key] = samples + 1
+            self._record(frame, self.global_types if is_module else self.local_types)
+        return self.trace
+
+    def get_types(self):
+        """ Returns every type recorded so far.
+
+        :return: A mapping of `'globals'`, `'locals'` and `'arguments'` to the recorded types.
+        :rtype: dict
+        """
+        return {'globals': self.global_types, 'locals': self.local_types, 'arguments': self.argument_types}
+
+
+class _LineProbe(object):
+    """ Encapsulates a `sys.settrace` Hook Evaluating Expressions the First Time Probed Code Reaches a Line.
+
+    The expressions are evaluated in the scope of the frame about to run the line, as if they were spliced into the
+    code just before it, so every expression probing that point is answered by a single run of the code up to it.
+
+    :attr results: What printing each expression would print, or `''` for an expression that failed, once the line
+        was reached and `None` before.
+    :type results: list
+    """
+    def __init__(self, lineno, expressions, on_reached):
+        """ Initializes the `_LineProbe` object.
+
+        :param lineno: The line to evaluate the expressions before, or `None` for after the code finished.
+        :type lineno: int
+        :param expressions: The expressions to evaluate.
+        :type expressions: list
+        :param on_reached: A function called once the expressions were evaluated, which need not return.
+        :type on_reached: function
+        """
+        self.results = None
+        self._lineno = lineno
+        self._expressions = expressions
+        self._on_reached = on_reached
+
+    def evaluate(self, global_namespace, local_namespace):
+        """ Evaluates the expressions in the given scope and reports their results.
+
+        :param global_namespace: The global namespace of the scope.
+        :type global_namespace: dict
+        :param local_namespace: The local namespace of the scope.
+        :type local_namespace: dict
+        """
+        results = []
+        for expression in self._expressions:
+            try:
+                results.append(str(eval(expression, global_namespace, local_namespace)))
+            except Exception:
+                results.append('')
+        self.results = results
+        self._on_reached()
+
+    def trace(self, frame, event, arg):
+        """ Evaluates the expressions once the probed line is reached, as called by `sys.settrace`. """
+        if frame.f_code.co_filename != _TypeTracer.FILENAME or self.results is not None:
+            return None
+        if event == 'line' and frame.f_lineno == self._lineno:
+            self.evaluate(frame.f_globals, frame.f_locals)
+            return None
+        return self.trace
+
+
+class _ExecutionWorker(object):
+    """ Encapsulates a Single Pre-Forked Worker Process of the `ExecutionService`.
+
+    The worker imports the preloaded modules once and then forks a fresh child for every piece of code it is sent, so
+    the code starts warm but can neither see nor corrupt the state left behind by the code before it. The child runs
+    under rlimits on CPU time, memory and open files, and is killed if it outlives its timeout. The worker is forked by
+    the `_WorkerSpawner`, whose preloaded modules and redirected output it inherits, so neither the worker nor its
+    children can write to the compiler's own stdout or stderr, not even straight to file descriptors 1 and 2.
+
+    :attr _pid: The process id of the worker.
+    :type _pid: int
+    :attr _connection: The compiler's end of the pipe to the worker process.
+    :type _connection: multiprocessing.Connection
+    """
+    READ_SIZE = 64 * 1024
+
+    # The ways a worker can run code: executing it for its output, or tracing it for the types of its variables.
+    EXECUTE = 'execute'
+    TRACE = 'trace'
+    PROBE = 'probe'
+
+    # The exit code of a child whose code ran out of memory.
+    MEMORY_EXCEEDED_EXIT_CODE = 3
+
+    # The number of seconds the worker itself is given, beyond the timeout of the code, to report back.
+    WORKER_GRACE_PERIOD = 5
+
+    # The number of seconds between checks of whether a stopping worker has exited.
+    EXIT_POLL_INTERVAL = 0.01
+
+    def __init__(self, pid, connection):
+        """ Initializes the `_ExecutionWorker` object.
+
+        :param pid: The process id of the worker, forked by the `_WorkerSpawner`.
+        :type pid: int
+        :param connection: The compiler's end of the pipe to the worker process.
+        :type connection: multiprocessing.Connection
+        """
+        self._pid = pid
+        self._connection = connection
+
+    @staticmethod
+    def serve(connection):
+        """ Runs every piece of code sent over the given connection until the connection is closed.
+
+        :param connection: The worker's end of the pipe to the compiler.
+        :type connection: multiprocessing.Connection
+        """
+        while True:
+            try:
+                request = connection.recv()
+            except (EOFError, IOError):
+                return
+            if request is None:
+                return
+            connection.send(_ExecutionWorker._run_isolated(*request))
+
+    @staticmethod
+    def _limit_resources(timeout, memory_limit):
+        """ Applies the sandbox rlimits to the current process.
+
+        :param timeout: The number of seconds the code is given to run.
+        :type timeout: float
+        :param memory_limit: The maximum number of bytes of memory the code may use, or `None` for the sandbox's.
+        :type memory_limit: int
+        """
+        cpu_limit = int(timeout) + 1
+        for limit, value in [
+            (resource.RLIMIT_CPU, cpu_limit),
+            (resource.RLIMIT_AS, min(memory_limit or SANDBOX_MEMORY_LIMIT, SANDBOX_MEMORY_LIMIT)),
+            (resource.RLIMIT_NOFILE, SANDBOX_MAX_OPEN_FILES),
+        ]:
+            _, hard_limit = resource.getrlimit(limit)
+            if hard_limit != resource.RLIM_INFINITY:
+                value = min(value, hard_limit)
+            try:
+                resource.setrlimit(limit, (value, hard_limit))
+            except (ValueError, resource.error):
+                pass
+
+    @staticmethod
+    def _run_child(write_fd, mode, code, global_names, timeout, memory_limit, probe):
+        """ Runs the given code in the current, freshly forked, process and writes its result to the given pipe.
+
+        When executing, the result is the code's output, and nothing is written if the code raises, exits or fails in
+        any other way. When tracing, the result is the JSON encoded types recorded up to the point the code finished
+        or failed. When probing, the result is the JSON encoded results of the probed expressions, written and exited
+        with as soon as the probed line is reached, and nothing is written if it never is. Never returns.
+
+        :param write_fd: The write end of the pipe to the worker.
+        :type write_fd: int
+        :param mode: Either `EXECUTE`, `TRACE` or `PROBE`.
+        :type mode: str
+        :param code: The code to execute.
+        :type code: str
+        :param global_names: A mapping of names to seed the code's global namespace with.
+        :type global_names: dict
+        :param timeout: The number of seconds the code is given to run.
+        :type timeout: float
+        :param memory_limit: The maximum number of bytes of memory the code may use, or `None` for the sandbox's.
+        :type memory_limit: int
+        :param probe: The line to probe before, or `None` for after the code finished, and the expressions to probe
+            it with, or `None` unless probing.
+        :type probe: tuple
+        """
+        exit_code = 1
+
+        def write(data):
+            while data:
+                data = data[os.write(write_fd, data):]
+        try:
+            _ExecutionWorker._limit_resources(timeout, memory_limit)
+            output = StringIO()
+            sys.stdout = output
+            namespace = {'__name__': '__snippet__', '__builtins__': __builtins__}
+            namespace.update(global_names)
+            if mode == _ExecutionWorker.TRACE:
+                tracer = _TypeTracer(set(global_names))
+                compiled_code = compile(code, _TypeTracer.FILENAME, 'exec')
+                sys.settrace(tracer.trace)
+                try:
+                    exec compiled_code in namespace
+                except MemoryError:
+                    raise
+                except BaseException:
+                    pass
+                finally:
+                    sys.settrace(None)
+                data = json.dumps(tracer.get_types())
+            elif mode == _ExecutionWorker.PROBE:
+                lineno, expressions = probe
+
+                def on_reached():
+                    # The code's remaining side effects do not matter, so the child exits right from the snapshot.
+                    write(json.dumps(line_probe.results))
+                    os._exit(0)
+                line_probe = _LineProbe(lineno, expressions, on_reached)
+                compiled_code = compile(code, _TypeTracer.FILENAME, 'exec')
+                if lineno is not None:
+                    sys.settrace(line_probe.trace)
+                exec compiled_code in namespace
+                sys.settrace(None)
+                if lineno is not None:
+                    return
+                line_probe.evaluate(namespace, namespace)
+            else:
+                exec code in namespace
+                data = output.getvalue()[:SANDBOX_MAX_OUTPUT_SIZE]
+            sys.stdout = sys.__stdout__
+            write(data)
+            exit_code = 0
+        except MemoryError:
+            exit_code = _ExecutionWorker.MEMORY_EXCEEDED_EXIT_CODE
+        except BaseException:
+            pass
+        finally:
+            os._exit(exit_code)
+
+    @staticmethod
+    def _run_isolated(mode, code, global_names, timeout, memory_limit, probe):
+        """ Runs the given code in a forked child, returning its result and the resources it used.
+
+        :param mode: Either `EXECUTE`, `TRACE` or `PROBE`.
+        :type mode: str
+        :param code: The code to execute.
+        :type code: str
+        :param global_names: A mapping of names to seed the code's global namespace with.
+        :type global_names: dict
+        :param timeout: The number of seconds the code is given to run.
+        :type timeout: float
+        :param memory_limit: The maximum number of bytes of memory the code may use, or `None` for the sandbox's.
+        :type memory_limit: int
+        :param probe: The line to probe before and the expressions to probe it with, or `None` unless probing.
+        :type probe: tuple
+
+        :return: The result of the code, or `None` if it failed, exited or timed out, the number of seconds of CPU
+            time it used, whether it timed out and whether it ran out of memory.
+        :rtype: tuple
+        """
+        read_fd, write_fd = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            os.close(read_fd)
+            _ExecutionWorker._run_child(write_fd, mode, code, global_names, timeout, memory_limit, probe)
+        os.close(write_fd)
+        chunks = []
+        timed_out = False
+        deadline = time.time() + timeout
+        try:
+            while True:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    timed_out = True
+                    break
+                try:
+                    readable, _, _ = select.select([read_fd], [], [], remaining)
+                except select.error as e:
+                    if e.args[0] == errno.EINTR:
+                        continue
+                    raise
+                if not readable:
+                    continue
+                chunk = os.read(read_fd, _ExecutionWorker.READ_SIZE)
+                if not chunk:
+                    break
+                chunks.append(chunk)
+        finally:
+            os.close(read_fd)
+            if timed_out:
+                try:
+                    os.kill(pid, signal.SIGKILL)
+                except OSError:
+                    pass
+            _, status, usage = os.wait4(pid, 0)
+        cpu_time = usage.ru_utime + usage.ru_stime
+        # A child over its CPU time rlimit is killed by `SIGXCPU`, which is a timeout too.
+        timed_out = timed_out or os.WIFSIGNALED(status) and os.WTERMSIG(status) == signal.SIGXCPU
+        memory_exceeded = os.WIFEXITED(status) and \
+            os.WEXITSTATUS(status) == _ExecutionWorker.MEMORY_EXCEEDED_EXIT_CODE
+        if timed_out or not os.WIFEXITED(status) or os.WEXITSTATUS(status) != 0:
+            return None, cpu_time, timed_out, memory_exceeded
+        return ''.join(chunks), cpu_time, timed_out, memory_exceeded
+
+    def run(self, mode, code, global_names, timeout, memory_limit=None, probe=None):
+        """ Runs the given code in the worker, returning its result and the resources it used.
+
+        :param mode: Either `EXECUTE`, `TRACE` or `PROBE`.
+        :type mode: str
+        :param code: The code to execute.
+        :type code: str
+        :param global_names: A mapping of names to seed the code's global namespace with.
+        :type global_names: dict
+        :param timeout: The number of seconds the code is given to run.
+        :type timeout: float
+        :param memory_limit: The maximum number of bytes of memory the code may use, or `None` for the sandbox's
+            (default: None).
+        :type memory_limit: int
+        :param probe: The line to probe before and the expressions to probe it with, or `None` unless probing
+            (default: None).
+        :type probe: tuple
+
+        :return: The result of the code, or `None` if it failed, exited or timed out, the number of seconds of CPU
+            time it used, whether it timed out and whether it ran out of memory.
+        :rtype: tuple
+
+        :raises IOError: If the worker itself died or hung, in which case it must be replaced.
+        """
+        self._connection.send((mode, code, global_names, timeout, memory_limit, probe))
+        if not self._connection.poll(timeout + _ExecutionWorker.WORKER_GRACE_PERIOD):
+            raise IOError('Execution worker %d stopped responding' % self._pid)
+        try:
+            return self._connection.recv()
+        except EOFError:
+            raise IOError('Execution worker %d died' % self._pid)
+
+    def _is_alive(self):
+        """ Returns whether the worker process is still running.
+
+        :return: Whether the worker process is still running.
+        :rtype: bool
+        """
+        try:
+            os.kill(self._pid, 0)
+        except OSError:
+            return False
+        return True
+
+    def kill(self):
+        """ Kills the worker process at once, such as when it died or stopped responding. """
+        self._connection.close()
+        try:
+            os.kill(self._pid, signal.SIGKILL)
+        except OSError:
+            pass
+
+    def stop(self):
+        """ Stops the worker process, killing it if it does not exit in time. """
+        try:
+            self._connection.send(None)
+        except IOError:
+            pass
+        self._connection.close()
+        # The worker is not a child of this process, so it cannot be joined, only watched until it is gone.
+        deadline = time.time() + _ExecutionWorker.WORKER_GRACE_PERIOD
+        while self._is_alive() and time.time() < deadline:
+            time.sleep(_ExecutionWorker.EXIT_POLL_INTERVAL)
+        if self._is_alive():
+            self.kill()
+
+
+class _WorkerSpawner(object):
+    """ Encapsulates a Single-Threaded Process Forking the Workers of the `ExecutionService`.
+
+    A process forked while other threads run may inherit a lock held by a thread that does not exist in it, and hang.
+    By the time a worker dies, the compiler runs analysis pools, provider threads and the pipeline, so workers are
+    never forked from it. Instead the spawner, started along with the service before any other thread, imports the
+    preloaded modules once and forks every worker, including those replacing workers that died. It then hands the
+    compiler its end of the worker's pipe over their own Unix socket.
+
+    :attr _process: The spawner process.
+    :type _process: multiprocessing.Process
+    :attr _connection: The compiler's end of the pipe to the spawner process.
+    :type _connection: multiprocessing.Connection
+    :attr _lock: A lock guarding `_connection`, as workers may be replaced from any thread.
+    :type _lock: threading.Lock
+    """
+    def __init__(self, preloaded_modules):
+        """ Initializes the `_WorkerSpawner` object, starting its process.
+
+        :param preloaded_modules: The names of the modules to import in the workers before any code runs.
+        :type preloaded_modules: list
+        """
+        self._connection, child_connection = multiprocessing.Pipe()
+        self._process = multiprocessing.Process(
+            target=_WorkerSpawner._serve,
+            args=(child_connection, preloaded_modules),
+        )
+        self._process.daemon = True
+        self._process.start()
+        child_connection.close()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _serve(connection, preloaded_modules):
+        """ Forks a worker for every request sent over the given connection until the connection is closed.
+
+        :param connection: The spawner's end of the pipe to the compiler.
+        :type connection: multiprocessing.Connection
+        :param preloaded_modules: The names of the modules to import before any worker is forked.
+        :type preloaded_modules: list
+        """
+        # The compiler's stdout may carry its headless progress, so neither imports nor code may print to it.
+        devnull_fd = os.open(os.devnull, os.O_RDWR)
+        for fd in (0, 1, 2):
+            os.dup2(devnull_fd, fd)
+        for module_name in preloaded_modules:
+            try:
+                __import__(module_name)
+            except Exception:
+                pass
+        # The spawner never waits for its workers, so they are reaped as they exit.
+        signal.signal(signal.SIGCHLD, signal.SIG_IGN)
+        while True:
+            try:
+                request = connection.recv()
+            except (EOFError, IOError):
+                return
+            if request is None:
+                return
+            worker_connection, child_connection = multiprocessing.Pipe()
+            pid = os.fork()
+            if pid == 0:
+                # The worker waits for its own children to collect their resource usage.
+                signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+                connection.close()
+                worker_connection.close()
+                try:
+                    _ExecutionWorker.serve(child_connection)
+                finally:
+                    os._exit(0)
+            child_connection.close()
+            connection.send(pid)
+            reduction.send_handle(connection, worker_connection.fileno(), os.getppid())
+            worker_connection.close()
+
+    def spawn(self):
+        """ Forks a new worker.
+
+        :return: The new worker.
+        :rtype: _ExecutionWorker
+        """
+        with self._lock:
+            self._connection.send(True)
+            pid = self._connection.recv()
+            worker_fd = reduction.recv_handle(self._connection)
+        return _ExecutionWorker(pid, _multiprocessing.Connection(worker_fd))
+
+    def stop(self):
+        """ Stops the spawner process. """
+        with self._lock:
+            try:
+                self._connection.send(None)
+            except IOError:
+                pass
+            self._connection.close()
+        self._process.join(_ExecutionWorker.WORKER_GRACE_PERIOD)
+        if self._process.is_alive():
+            self._process.terminate()
+
+
+class ExecutionService(object):
+    """ Encapsulates a Sandboxed Pool of Warm Processes for Executing Untrusted Code.
+
+    Downloaded code never runs inside the compiler process, so a snippet that loops forever, exhausts memory or calls
+    `sys.exit()` costs one timeout rather than the whole compilation. Every call may run on a different worker, so
+    many snippets can be analysed at once, across cores. A worker that dies or stops responding is replaced by a fresh
+    one from the `_WorkerSpawner`.
+
+    :attr _timeout: The number of seconds a single piece of code is given to run.
+    :type _timeout: float
+    :attr _spawner: The process forking the workers.
+    :type _spawner: _WorkerSpawner
+    :attr _idle_workers: A queue of the workers that are not running any code.
+    :type _idle_workers: Queue.Queue
+    :attr _workers: Every worker of the pool.
+    :type _workers: list
+    :attr _lock: A lock guarding `_workers`.
+    :type _lock: threading.Lock
+    """
+    _shared_service = None
+    _shared_service_lock = threading.Lock()
+
+    def __init__(self, num_workers=None, timeout=None, preloaded_modules=None):
+        """ Initializes the `ExecutionService` object, starting its workers.
+
+        :param num_workers: The number of worker processes (default: None).
+        :type num_workers: int
+        :param timeout: The number of seconds a single piece of code is given to run (default: None).
+        :type timeout: float
+        :param preloaded_modules: The names of the modules every worker imports before any code runs
+            (default: None).
+        :type preloaded_modules: list
+        """
+        self._timeout = timeout or SANDBOX_TIMEOUT
+        self._spawner = _WorkerSpawner(
+            preloaded_modules if preloaded_modules is not None else SANDBOX_PRELOADED_MODULES,
+        )
+        self._idle_workers = Queue.Queue()
+        self._workers = []
+        self._lock = threading.Lock()
+        for _ in xrange(num_workers or SANDBOX_NUM_WORKERS):
+            self._add_worker()
+
+    @staticmethod
+    def get_shared():
+        """ Returns the service shared by the whole process, starting it on first use.
+
+        The service should first be used before other threads are started, so its spawner, and through it every worker,
+        is forked from a process with a single thread.
+
+        :return: The service shared by the whole process.
+        :rtype: ExecutionService
+        """
+        with ExecutionService._shared_service_lock:
+            if ExecutionService._shared_service is None:
+                ExecutionService._shared_service = ExecutionService()
+            return ExecutionService._shared_service
+
+    def _add_worker(self):
+        """ Starts a new worker and marks it idle. """
+        worker = self._spawner.spawn()
+        with self._lock:
+            self._workers.append(worker)
+        self._idle_workers.put(worker)
+
+    def _replace_worker(self, worker):
+        """ Kills the given worker and starts a new one in its place.
+
+        :param worker: The worker to replace.
+        :type worker: _ExecutionWorker
+        """
+        with self._lock:
+            self._workers.remove(worker)
+        worker.kill()
+        self._add_worker()
+
+    def _run(self, mode, code, global_names, timeout, budget, probe=None):
+        """ Runs the given Python code in a sandboxed worker and returns its result.
+
+        The run is charged to the given budget, which caps its time and memory, from the moment a worker is free to
+        run it.
+
+        :param mode: Either `_ExecutionWorker.EXECUTE`, `_ExecutionWorker.TRACE` or `_ExecutionWorker.PROBE`.
+        :type mode: str
+        :param code: The code to execute.
+        :type code: str
+        :param global_names: A mapping of names to seed the code's global namespace with.
+        :type global_names: dict
+        :param timeout: The number of seconds the code is given to run.
+        :type timeout: float
+        :param budget: The budget to charge the run to, or `None`.
+        :type budget: AnalysisBudget
+        :param probe: The line to probe before and the expressions to probe it with, or `None` unless probing
+            (default: None).
+        :type probe: tuple
+
+        :return: The result of the code, or `None` if it failed, exited or timed out.
+        :rtype: str
+
+        :raises AnalysisBudgetExceededError: If the budget was used up, before or by the run.
+        """
+        timeout = timeout or self._timeout
+        memory_limit = None
+        # Time spent waiting for a worker, behind the runs of other snippets, is not charged to the budget.
+        worker = self._idle_workers.get()
+        if budget is not None:
+            try:
+                timeout = budget.start_execution(timeout)
+            except Exception:
+                self._idle_workers.put(worker)
+                raise
+            memory_limit = budget.memory_limit
+        start = time.time()
+        try:
+            result, cpu_time, timed_out, memory_exceeded = worker.run(mode, code, global_names or {}, timeout,
+                                                                      memory_limit, probe)
+            self._idle_workers.put(worker)
+        except IOError:
+            self._replace_worker(worker)
+            result, cpu_time, timed_out, memory_exceeded = None, timeout, True, False
+        if budget is not None:
+            budget.charge(time.time() - start, cpu_time, timed_out, memory_exceeded)
+        return result
+
+    def execute(self, code, global_names=None, timeout=None, budget=None):
+        """ Executes the given Python code in a sandboxed worker and returns what it printed.
+
+        :param code: The code to execute.
+        :type code: str
+        :param global_names: A mapping of names to seed the code's global namespace with (default: None).
+        :type global_names: dict
+        :param timeout: The number of seconds the code is given to run (default: None).
+        :type timeout: float
+        :param budget: The budget to charge the run to, which caps its time and memory (default: None).
+        :type budget: AnalysisBudget
+
+        :return: What the code printed, or `None` if it raised, exited, exceeded a limit or timed out.
+        :rtype: str
+
+        :raises AnalysisBudgetExceededError: If the budget was used up, before or by the run.
+        """
+        return self._run(_ExecutionWorker.EXECUTE, code, global_names, timeout, budget)
+
+    def trace_types(self, code, global_names=None, timeout=None, budget=None):
+        """ Executes the given Python code once in a sandboxed worker, recording the runtime types of its variables.
+
+        Types are recorded up to the point the code finished, raised or exited, so code failing halfway still yields
+        the types seen before it failed.
+
+        :param code: The code to execute.
+        :type code: str
+        :param global_names: A mapping of names to seed the code's global namespace with (default: None).
+        :type global_names: dict
+        :param timeout: The number of seconds the code is given to run (default: None).
+        :type timeout: float
+        :param budget: The budget to charge the run to, which caps its time and memory (default: None).
+        :type budget: AnalysisBudget
+
+        :return: A mapping of `'globals'` and `'locals'` to mappings of variable names to the representation of their
+            last seen type, such as `"<type 'list'>"`, and of `'arguments'` to a mapping of function names to such a
+            mapping for their arguments, or `None` if the code could not be compiled, exceeded a limit or timed out.
+        :rtype: dict
+
+        :raises AnalysisBudgetExceededError: If the budget was used up, before or by the run.
+        """
+        result = self._run(_ExecutionWorker.TRACE, code, global_names, timeout, budget)
+        return json.loads(result) if result else None
+
+    def probe(self, code, lineno, expressions, global_names=None, timeout=None, budget=None):
+        """ Runs the given Python code in a sandboxed worker up to the given line and evaluates expressions there.
+
+        The expressions are evaluated in the scope about to run the line, the first time it is reached, as if they were
+        printed by code spliced in just before it. The code only runs once however many expressions probe the line.
+
+        :param code: The code to execute.
+        :type code: str
+        :param lineno: The line to evaluate the expressions before, or `None` for after the code finished.
+        :type lineno: int
+        :param expressions: The expressions to evaluate, such as `'type(x)'`.
+        :type expressions: list
+        :param global_names: A mapping of names to seed the code's global namespace with (default: None).
+        :type global_names: dict
+        :param timeout: The number of seconds the code is given to run (default: None).
+        :type timeout: float
+        :param budget: The budget to charge the run to, which caps its time and memory (default: None).
+        :type budget: AnalysisBudget
+
+        :return: What printing each expression would print, or `''` for an expression that failed, or `None` if the
+            line was never reached, or the code failed before reaching it, exceeded a limit or timed out.
+        :rtype: list
+
+        :raises AnalysisBudgetExceededError: If the budget was used up, before or by the run.
+        """
+        result = self._run(_ExecutionWorker.PROBE, code, global_names, timeout, budget, (lineno, expressions))
+        return json.loads(result) if result else None
+
+    def shutdown(self):
+        """ Stops every worker of the pool. """
+        with self._lock:
+            workers, self._workers = self._workers, []
+        for worker in workers:
+            worker.stop()
+        self._spawner.stop()
@@ -0,0 +1,543 @@
+# -*- coding: utf-8 -*-
+
+""" Encapsulates a Warm Fork Server for Running the Tests against Each Candidate Code File. """
+
+import ast
+from collections import OrderedDict
+from cStringIO import StringIO
+import errno
+import imp
+import json
+import multiprocessing
+import os
+import select
+import shutil
+import signal
+import sys
+import tempfile
+import time
+import unittest
+
+from config import READ_OPT
+from config import TEST_RUNNER_TIMEOUT
+from config import TEST_WORKSPACE_MAX_COPIED_FILE_SIZE
+from config import WRITE_OPT
+from unittest_result_collector import TestOutcome
+from unittest_result_collector import UnittestResultCollector
+
+
+class _Child(object):
+    """ Encapsulates a Forked Child Running the Tests against a Single Candidate.
+
+    :attr pid: The process id of the child.
+    :type pid: int
+    :attr read_fd: The read end of the pipe from the child.
+    :type read_fd: int
+    :attr workspace_root: A path to the temporary directory holding the child's workspace, or `None` if it has none.
+    :type workspace_root: str
+    :attr deadline: The time by which the child must have finished.
+    :type deadline: float
+    :attr chunks: The output read from the child so far.
+    :type chunks: list
+    """
+    def __init__(self, pid, read_fd, workspace_root):
+        """ Initializes the `_Child` object.
+
+        :param pid: The process id of the child.
+        :type pid: int
+        :param read_fd: The read end of the pipe from the child.
+        :type read_fd: int
+        :param workspace_root: A path to the temporary directory holding the child's workspace, or `None`.
+        :type workspace_root: str
+        """
+        self.pid = pid
+        self.read_fd = read_fd
+        self.workspace_root = workspace_root
+        self.deadline = None
+        self.chunks = []
+
+
+class ForkTestRunner(object):
+    """ Encapsulates a Warm Fork Server for Running the Tests against Each Candidate Code File.
+
+    Running the tests as a fresh `python` process per candidate pays for a shell, a cold interpreter and every import of
+    the tests each time. Instead, a server process imports the modules the tests and the code file depend on once, and
+    then forks a child for every candidate it is sent. The child loads the candidate code from memory in place of the
+    code file, so the code file is never rewritten and no stale `.pyc` file can be picked up, runs the test suite and
+    reports back the outcome of every test, collected by a `UnittestResultCollector`. Every child starts from the same
+    warm state, so candidates cannot affect each other, and a child running past its timeout is killed. Whatever the
+    tests or the candidate print, even straight to file descriptors 1 and 2, is captured into the test output rather
+    than written to the compiler's own stdout, which may carry its headless progress.
+
+    Several candidates may be run at once. Each then runs in a workspace of its own, a temporary directory holding the
+    candidate as the code file, copies of the small files of the tests' directory, so files the tests write cannot
+    clash, and symlinks to its subdirectories and larger files, which the tests are expected to only read. The tests and
+    the modules beside them are then loaded from the workspace, so paths found through their `__file__` lead there.
+
+    The server should be started before other threads are, so it is forked from a process holding no locks.
+
+    :attr _code_f: A path to the file to code complete.
+    :type _code_f: str
+    :attr _tests_f: A path to the tests to be used to verify code completion.
+    :type _tests_f: str
+    :attr _timeout: The number of seconds the tests are given to run against a single candidate.
+    :type _timeout: float
+    :attr _process: The server process.
+    :type _process: multiprocessing.Process
+    :attr _connection: The parent's end of the pipe to the server process.
+    :type _connection: multiprocessing.Connection
+    """
+    READ_SIZE = 64 * 1024
+
+    # The output of a candidate whose tests were stopped because a better ranked candidate won.
+    CANCELLED = 'Cancelled'
+
+    # The number of seconds the server itself is given, beyond the timeout of the tests, to report back.
+    SERVER_GRACE_PERIOD = 5
+
+    # Workspaces are made in a temporary directory, from the tests' directory without these files.
+    WORKSPACE_PREFIX = 'code_complete_'
+    WORKSPACE_NAME = 'workspace'
+    WORKSPACE_IGNORED_PATTERNS = ('*.pyc', '*.original', '*.previous', '.git')
+
+    # The number of bytes of what the tests and the candidate print kept in the test output.
+    MAX_CAPTURED_OUTPUT_SIZE = 64 * 1024
+    CAPTURED_OUTPUT_TEMPLATE = '\nCaptured output:\n%s'
+
+    def __init__(self, code_f, tests_f, timeout=None):
+        """ Initializes the `ForkTestRunner` object, starting its server process.
+
+        :param code_f: A path to the file to code complete.
+        :type code_f: str
+        :param tests_f: A path to the tests to be used to verify code completion.
+        :type tests_f: str
+        :param timeout: The number of seconds the tests are given to run against a single candidate (default: None).
+        :type timeout: float
+        """
+        self._code_f = code_f
+        self._tests_f = tests_f
+        self._timeout = timeout or TEST_RUNNER_TIMEOUT
+        self._connection, server_connection = multiprocessing.Pipe()
+        self._process = multiprocessing.Process(
+            target=ForkTestRunner._serve,
+            args=(server_connection, code_f, tests_f),
+        )
+        self._process.daemon = True
+        self._process.start()
+        server_connection.close()
+
+    @staticmethod
+    def _get_module_name(path):
+        """ Returns the name the module at the given path is imported by.
+
+        :param path: A path to a python file.
+        :type path: str
+
+        :return: The name the module is imported by.
+        :rtype: str
+        """
+        return os.path.splitext(os.path.basename(path))[0]
+
+    @staticmethod
+    def _get_imported_modules(source):
+        """ Returns the names of the modules the given source code imports, without executing it.
+
+        :param source: The source code.
+        :type source: str
+
+        :return: The names of the modules imported anywhere in the source code.
+        :rtype: set
+        """
+        try:
+            tree = ast.parse(source)
+        except SyntaxError:
+            return set()
+        module_names = set()
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Import):
+                module_names.update(alias.name for alias in node.names)
+            elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+                module_names.add(node.module)
+        return module_names
+
+    @staticmethod
+    def _serve(connection, code_f, tests_f):
+        """ Runs the tests against every batch of candidates sent over the given connection until the connection is
+        closed.
+
+        :param connection: The server's end of the pipe to the parent.
+        :type connection: multiprocessing.Connection
+        :param code_f: A path to the file to code complete.
+        :type code_f: str
+        :param tests_f: A path to the tests to be used to verify code completion.
+        :type tests_f: str
+        """
+        # Imports may print, and the children capture their own output, so nothing reaches the compiler's stdout.
+        devnull_fd = os.open(os.devnull, os.O_WRONLY)
+        os.dup2(devnull_fd, 1)
+        os.dup2(devnull_fd, 2)
+        # The tests import the code file from their own directory, as when run as a script.
+        sys.path.insert(0, os.path.dirname(os.path.abspath(tests_f)))
+        tests_source = open(tests_f, READ_OPT).read()
+        code_module_name = ForkTestRunner._get_module_name(code_f)
+        module_names = ForkTestRunner._get_imported_modules(tests_source) | \
+            ForkTestRunner._get_imported_modules(open(code_f, READ_OPT).read())
+        module_names.discard(code_module_name)
+        for module_name in module_names:
+            try:
+                __import__(module_name)
+            except Exception:
+                pass
+        try:
+            tests_code = compile(tests_source, tests_f, 'exec')
+        except SyntaxError:
+            tests_code = None
+        while True:
+            try:
+                request = connection.recv()
+            except (EOFError, IOError):
+                return
+            if request is None:
+                return
+            connection.send(ForkTestRunner._run_candidates(code_f, tests_f, tests_code, *request))
+
+    @staticmethod
+    def _forget_modules_in(directory):
+        """ Removes the modules loaded from the given directory from `sys.modules`, so they are imported afresh.
+
+        :param directory: A path to a directory.
+        :type directory: str
+        """
+        for module_name, module in sys.modules.items():
+            module_f = getattr(module, '__file__', None)
+            if module_f and os.path.dirname(os.path.abspath(module_f)) == directory:
+                del sys.modules[module_name]
+
+    @staticmethod
+    def _run_child(write_fd, code_f, tests_f, tests_code, code, workspace, baseline):
+        """ Runs the tests against the given candidate in the current, freshly forked, process, and writes the outcome
+        of every test with the test output to the given pipe.
+
+        Nothing is written if the candidate or the tests fail to load.
+
+        :param write_fd: The write end of the pipe to the server.
+        :type write_fd: int
+        :param code_f: A path to the file to code complete.
+        :type code_f: str
+        :param tests_f: A path to the tests to be used to verify code completion.
+        :type tests_f: str
+        :param tests_code: The compiled tests, or `None` if they failed to compile.
+        :type tests_code: code
+        :param code: The contents of the candidate code file.
+        :type code: str
+        :param workspace: A path to the workspace to run the tests in, or `None` to run them in place.
+        :type workspace: str
+        :param baseline: The outcomes of the tests to improve on, stopping once the candidate cannot, or `None` to run
+            every test.
+        :type baseline: dict
+        """
+        try:
+            if workspace is not None:
+                # The tests and the modules beside them are loaded from the workspace, so whatever they find through
+                # their own path is the workspace's and not shared with the other candidates.
+                ForkTestRunner._forget_modules_in(os.path.dirname(os.path.abspath(tests_f)))
+                os.chdir(workspace)
+                sys.path.insert(0, workspace)
+                code_f = os.path.join(workspace, os.path.basename(code_f))
+                tests_f = os.path.join(workspace, os.path.basename(tests_f))
+                if tests_code is not None:
+                    tests_code = compile(open(tests_f, READ_OPT).read(), tests_f, 'exec')
+            captured_output = tempfile.TemporaryFile()
+            os.dup2(captured_output.fileno(), 1)
+            os.dup2(captured_output.fileno(), 2)
+            code_module = imp.new_module(ForkTestRunner._get_module_name(code_f))
+            code_module.__file__ = code_f
+            sys.modules[code_module.__name__] = code_module
+            exec compile(code, code_f, 'exec') in code_module.__dict__
+            tests_module = imp.new_module(ForkTestRunner._get_module_name(tests_f))
+            tests_module.__file__ = tests_f
+            sys.modules[tests_module.__name__] = tests_module
+            exec tests_code in tests_module.__dict__
+            stream = StringIO()
+            result_collector = UnittestResultCollector(stream, baseline)
+            result_collector.run_suite(unittest.defaultTestLoader.loadTestsFromModule(tests_module))
+            sys.__stdout__.flush()
+            sys.__stderr__.flush()
+            captured_output.seek(0)
+            printed = captured_output.read(ForkTestRunner.MAX_CAPTURED_OUTPUT_SIZE)
+            output = stream.getvalue()
+            if printed:
+                output += ForkTestRunner.CAPTURED_OUTPUT_TEMPLATE % printed
+            data = json.dumps([
+                [[test_id] + list(outcome) for test_id, outcome in result_collector.outcomes.iteritems()],
+                output.decode('utf-8', 'replace'),
+            ])
+            while data:
+                data = data[os.write(write_fd, data):]
+        except BaseException:
+            pass
+        finally:
+            os._exit(0)
+
+    @staticmethod
+    def _make_workspace(code_f, tests_f, code, workspace):
+        """ Makes a workspace for the given candidate at the given path.
+
+        Small files of the tests' directory are copied, while its subdirectories and files over
+        `TEST_WORKSPACE_MAX_COPIED_FILE_SIZE` bytes are symlinked, so the cost of a workspace does not grow with the
+        project around the tests.
+
+        :param code_f: A path to the file to code complete.
+        :type code_f: str
+        :param tests_f: A path to the tests to be used to verify code completion.
+        :type tests_f: str
+        :param code: The contents of the candidate code file.
+        :type code: str
+        :param workspace: A path to make the workspace at.
+        :type workspace: str
+        """
+        tests_dir = os.path.dirname(os.path.abspath(tests_f))
+        names = os.listdir(tests_dir)
+        ignored_names = shutil.ignore_patterns(*ForkTestRunner.WORKSPACE_IGNORED_PATTERNS)(tests_dir, names)
+        os.mkdir(workspace)
+        for name in names:
+            if name in ignored_names or name == os.path.basename(code_f):
+                continue
+            path = os.path.join(tests_dir, name)
+            if os.path.isfile(path) and os.path.getsize(path) <= TEST_WORKSPACE_MAX_COPIED_FILE_SIZE:
+                shutil.copy2(path, os.path.join(workspace, name))
+            else:
+                os.symlink(path, os.path.join(workspace, name))
+        with open(os.path.join(workspace, os.path.basename(code_f)), WRITE_OPT) as f:
+            f.write(code)
+
+    @staticmethod
+    def _start_child(code_f, tests_f, tests_code, code, use_workspace, baseline):
+        """ Starts running the tests against the given candidate in a forked child.
+
+        :param code_f: A path to the file to code complete.
+        :type code_f: str
+        :param tests_f: A path to the tests to be used to verify code completion.
+        :type tests_f: str
+        :param tests_code: The compiled tests, or `None` if they failed to compile.
+        :type tests_code: code
+        :param code: The contents of the candidate code file.
+        :type code: str
+        :param use_workspace: Whether to run the tests in a workspace of their own rather than in place.
+        :type use_workspace: bool
+        :param baseline: The outcomes of the tests to improve on, or `None` to run every test.
+        :type baseline: dict
+
+        :return: The child, as a `_Child` object.
+        :rtype: _Child
+        """
+        workspace_root, workspace = None, None
+        if use_workspace:
+            # The workspace is made before forking, so its cost is not charged to the tests' timeout.
+            workspace_root = tempfile.mkdtemp(prefix=ForkTestRunner.WORKSPACE_PREFIX)
+            workspace = os.path.join(workspace_root, ForkTestRunner.WORKSPACE_NAME)
+            ForkTestRunner._make_workspace(code_f, tests_f, code, workspace)
+        read_fd, write_fd = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            os.close(read_fd)
+            ForkTestRunner._run_child(write_fd, code_f, tests_f, tests_code, code, workspace, baseline)
+        os.close(write_fd)
+        return _Child(pid, read_fd, workspace_root)
+
+    @staticmethod
+    def _finish_child(child, timeout, timed_out=False, cancelled=False):
+        """ Reaps the given child, killing it if it is still running, and removes its workspace.
+
+        :param child: The child.
+        :type child: _Child
+        :param timeout: The number of seconds the tests were given to run.
+        :type timeout: float
+        :param timed_out: Whether the child is killed because it ran past its deadline (default: False).
+        :type timed_out: bool
+        :param cancelled: Whether the child is killed because its result is no longer needed (default: False).
+        :type cancelled: bool
+
+        :return: A mapping of the ids of the tests run to their `TestOutcome`, in the order they ran, or `None` if the
+            candidate or the tests failed to load, timed out or were cancelled, and the test output.
+        :rtype: tuple
+        """
+        os.close(child.read_fd)
+        if timed_out or cancelled:
+            try:
+                os.kill(child.pid, signal.SIGKILL)
+            except OSError:
+                pass
+        os.waitpid(child.pid, 0)
+        if child.workspace_root is not None:
+            shutil.rmtree(child.workspace_root, ignore_errors=True)
+        if cancelled:
+            return None, ForkTestRunner.CANCELLED
+        if timed_out:
+            return None, 'Timed out after %ds' % timeout
+        if not child.chunks:
+            return None, 'Failed to load the code or the tests'
+        outcomes, output = json.loads(''.join(child.chunks))
+        return OrderedDict(
+            (test_id.encode('utf-8'), TestOutcome(status.encode('utf-8'), duration))
+            for test_id, status, duration in outcomes
+        ), output.encode('utf-8')
+
+    @staticmethod
+    def _find_winner(results, baseline):
+        """ Returns the index of the best ranked candidate improving on the given baseline, once every candidate ranked
+        above it is known not to.
+
+        :param results: The result of each candidate, or `None` if it is not known yet.
+        :type results: list
+        :param baseline: The outcomes of the tests to improve on, or `None` if the tests failed to load.
+        :type baseline: dict
+
+        :return: The index of the winning candidate, or `None` if there is none yet.
+        :rtype: int
+        """
+        for index, result in enumerate(results):
+            if result is None:
+                return None
+            if UnittestResultCollector.is_improvement(baseline, result[0]):
+                return index
+        return None
+
+    @staticmethod
+    def _run_candidates(code_f, tests_f, tests_code, codes, timeout, num_jobs, baseline):
+        """ Runs the tests against the given candidates, up to `num_jobs` at once, in their ranked order.
+
+        Once the best ranked candidate improving on the baseline is known, the runs of the candidates ranked
+        below it are cancelled and the candidates not yet started never are. Candidates run at once each get a
+        workspace of their own, so files written by the tests of one candidate cannot affect another.
+
+        :param code_f: A path to the file to code complete.
+        :type code_f: str
+        :param tests_f: A path to the tests to be used to verify code completion.
+        :type tests_f: str
+        :param tests_code: The compiled tests, or `None` if they failed to compile.
+        :type tests_code: code
+        :param codes: The contents of each candidate code file, best ranked first.
+        :type codes: list
+        :param timeout: The number of seconds the tests are given to run against a single candidate.
+        :type timeout: float
+        :param num_jobs: The maximum number of candidates to run the tests against at once.
+        :type num_jobs: int
+        :param baseline: The outcomes of the tests to improve on, or `None` if the tests failed to load.
+        :type baseline: dict
+
+        :return: The result of each candidate, as for `run`, or `None` if it was never started.
+        :rtype: list
+        """
+        results = [None] * len(codes)
+        use_workspaces = num_jobs > 1
+        children = {}
+        next_index = 0
+        try:
+            while True:
+                while next_index < len(codes) and len(children) < num_jobs:
+                    child = ForkTestRunner._start_child(code_f, tests_f, tests_code, codes[next_index], use_workspaces,
+                                                      baseline)
+                    child.deadline = time.time() + timeout
+                    children[child.read_fd] = (next_index, child)
+                    next_index += 1
+                if not children:
+                    return results
+                remaining = min(child.deadline for _, child in children.itervalues()) - time.time()
+                try:
+                    readable, _, _ = select.select(children.keys(), [], [], max(remaining, 0))
+                except select.error as e:
+                    if e.args[0] == errno.EINTR:
+                        continue
+                    raise
+                for read_fd in readable:
+                    chunk = os.read(read_fd, ForkTestRunner.READ_SIZE)
+                    index, child = children[read_fd]
+                    if chunk:
+                        child.chunks.append(chunk)
+                        continue
+                    del children[read_fd]
+                    results[index] = ForkTestRunner._finish_child(child, timeout)
+                now = time.time()
+                for read_fd, (index, child) in children.items():
+                    if child.deadline <= now:
+                        del children[read_fd]
+                        results[index] = ForkTestRunner._finish_child(child, timeout, timed_out=True)
+                if ForkTestRunner._find_winner(results, baseline) is not None:
+                    return results
+        finally:
+            for index, child in children.itervalues():
+                results[index] = ForkTestRunner._finish_child(child, timeout, cancelled=True)
+
+    def _send(self, request, timeout):
+        """ Sends the given request to the server, returning its response.
+
+        :param request: The arguments of `_run_candidates` following the compiled tests.
+        :type request: tuple
+        :param timeout: The number of seconds to wait on the response.
+        :type timeout: float
+
+        :return: The response of the server.
+        :rtype: list
+
+        :raises IOError: If the server died or hung.
+        """
+        self._connection.send(request)
+        if not self._connection.poll(timeout + ForkTestRunner.SERVER_GRACE_PERIOD):
+            raise IOError('Test runner %d stopped responding' % self._process.pid)
+        try:
+            return self._connection.recv()
+        except EOFError:
+            raise IOError('Test runner %d died' % self._process.pid)
+
+    def run(self, code, baseline=None):
+        """ Runs the tests against the given candidate code file.
+
+        Given a baseline, the tests stop as soon as the candidate can no longer improve on it, so the outcomes of a
+        candidate that does not are only complete up to the test that showed it.
+
+        :param code: The contents of the candidate code file.
+        :type code: str
+        :param baseline: The outcomes of the tests to improve on, or `None` to run every test (default: None).
+        :type baseline: dict
+
+        :return: A mapping of the ids of the tests run to their `TestOutcome`, in the order they ran, or `None` if the
+            candidate or the tests failed to load or timed out, and the test output.
+        :rtype: tuple
+
+        :raises IOError: If the server died or hung.
+        """
+        return self._send(([code], self._timeout, 1, baseline), self._timeout)[0]
+
+    def run_parallel(self, codes, baseline, num_jobs):
+        """ Runs the tests against the given candidate code files, up to `num_jobs` at once, stopping once the best
+        ranked candidate improving on the given baseline is known.
+
+        :param codes: The contents of each candidate code file, best ranked first.
+        :type codes: list
+        :param baseline: The outcomes of the tests to improve on, or `None` if the tests failed to load.
+        :type baseline: dict
+        :param num_jobs: The maximum number of candidates to run the tests against at once.
+        :type num_jobs: int
+
+        :return: The index of the best ranked candidate improving on the baseline, or `None` if none does, and the
+            result of each candidate, as for `run`, `(None, CANCELLED)` if it was stopped once the winner was known, or
+            `None` if it was never started.
+        :rtype: tuple
+
+        :raises IOError: If the server died or hung.
+        """
+        num_rounds = (len(codes) + num_jobs - 1) // num_jobs
+        results = self._send((codes, self._timeout, num_jobs, baseline), self._timeout * num_rounds)
+        return ForkTestRunner._find_winner(results, baseline), results
+
+    def stop(self):
+        """ Stops the server process. """
+        try:
+            self._connection.send(None)
+        except IOError:
+            pass
+        self._connection.close()
+        self._process.join(ForkTestRunner.SERVER_GRACE_PERIOD)
+        if self._process.is_alive():
+            self._process.terminate()
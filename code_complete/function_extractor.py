@@ -0,0 +1,136 @@
+# -*- coding: utf-8 -*-
+
+""" Encapsulates Functionality for Statically Extracting Functions from Source Code. """
+
+import ast
+from collections import namedtuple
+
+
+# A top-level function extracted from source code. `default_types` holds the type name of each literal default value
+# of the trailing arguments, or `None` for a default that is not a literal, and `return_arities` holds the number of
+# values each `return` statement returns, or `None` for a value that may or may not be a tuple.
+ExtractedFunction = namedtuple('ExtractedFunction', [
+    'name', 'arguments', 'source', 'docstring', 'lineno', 'default_types', 'has_varargs', 'return_arities',
+])
+
+
+class FunctionExtractor(object):
+    """ Encapsulates Functionality for Statically Extracting Functions from Source Code.
+
+    The source code is parsed, never executed, so extraction is free of side effects.
+
+    :attr _source: The source code to extract functions from.
+    :type _source: str
+    """
+    COMMENT_INDICATOR = '#'
+
+    LITERAL_TYPES = {
+        ast.Str: 'str',
+        ast.List: 'list',
+        ast.ListComp: 'list',
+        ast.Dict: 'dict',
+        ast.DictComp: 'dict',
+        ast.Set: 'set',
+        ast.SetComp: 'set',
+        ast.Tuple: 'tuple',
+    }
+    BOOLEAN_NAMES = frozenset(['True', 'False'])
+    BOOLEAN_TYPE = 'bool'
+
+    def __init__(self, source):
+        """ Initializes the `FunctionExtractor` object.
+
+        :param source: The source code to extract functions from.
+        :type source: str
+        """
+        self._source = source
+
+    @staticmethod
+    def _get_argument_names(function_node):
+        """ Returns the names of the positional arguments of the given function.
+
+        :param function_node: The AST node of a function.
+        :type function_node: ast.FunctionDef
+
+        :return: The names of the positional arguments of the given function, in declaration order.
+        :rtype: list
+        """
+        return [argument.id for argument in function_node.args.args if isinstance(argument, ast.Name)]
+
+    @staticmethod
+    def _get_literal_type(node):
+        """ Returns the type name of the given literal, or `None` if the node is not a literal.
+
+        :param node: The AST node of an expression.
+        :type node: ast.expr
+
+        :return: The type name of the given literal, such as `'list'`, or `None` if the node is not a literal.
+        :rtype: str
+        """
+        if isinstance(node, ast.Num):
+            return type(node.n).__name__
+        if isinstance(node, ast.Name) and node.id in FunctionExtractor.BOOLEAN_NAMES:
+            return FunctionExtractor.BOOLEAN_TYPE
+        return FunctionExtractor.LITERAL_TYPES.get(type(node))
+
+    @staticmethod
+    def _get_return_arities(function_node):
+        """ Returns the number of values each `return` statement of the given function returns.
+
+        :param function_node: The AST node of a function.
+        :type function_node: ast.FunctionDef
+
+        :return: A list holding, for each `return` statement with a value, the length of the tuple it returns, or
+            `None` if the value is not a tuple literal.
+        :rtype: list
+        """
+        return_arities = []
+        for node in ast.walk(function_node):
+            if isinstance(node, ast.Return) and node.value is not None:
+                return_arities.append(len(node.value.elts) if isinstance(node.value, ast.Tuple) else None)
+        return return_arities
+
+    @staticmethod
+    def _is_trailing_line(line):
+        """ Returns whether the given line can be trimmed from the end of a function's source.
+
+        :param line: A line of source code.
+        :type line: str
+
+        :return: Whether the given line is blank or a comment outside of any indented block.
+        :rtype: bool
+        """
+        return not line.strip() or line.startswith(FunctionExtractor.COMMENT_INDICATOR)
+
+    def extract(self):
+        """ Returns the top-level functions defined in the source code.
+
+        :return: A list of `ExtractedFunction` objects, in the order the functions are defined.
+        :rtype: list
+
+        :raises SyntaxError: If the source code cannot be parsed.
+        """
+        try:
+            module = ast.parse(self._source)
+        except TypeError as e:
+            # `ast.parse` raises a `TypeError` rather than a `SyntaxError` for source code containing null bytes.
+            raise SyntaxError(str(e))
+        lines = self._source.splitlines(True)
+        extracted_functions = []
+        for index, node in enumerate(module.body):
+            if not isinstance(node, ast.FunctionDef):
+                continue
+            end = module.body[index + 1].lineno - 1 if index + 1 < len(module.body) else len(lines)
+            while end > node.lineno and FunctionExtractor._is_trailing_line(lines[end - 1]):
+                end -= 1
+            extracted_functions.append(ExtractedFunction(
+                node.name,
+                FunctionExtractor._get_argument_names(node),
+                ''.join(lines[node.lineno - 1:end]),
+                ast.get_docstring(node) or '',
+                node.lineno,
+                [FunctionExtractor._get_literal_type(default) for default in node.args.defaults],
+                node.args.vararg is not None,
+                FunctionExtractor._get_return_arities(node),
+            ))
+        return extracted_functions
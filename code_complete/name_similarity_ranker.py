@@ -0,0 +1,155 @@
+# -*- coding: utf-8 -*-
+
+""" Encapsulates Functionality for Ranking Functions by How Well Their Names Fit a Task Description. """
+
+import heapq
+import math
+import re
+import threading
+
+
+class NameSimilarityRanker(object):
+    """ Encapsulates Functionality for Ranking Functions by How Well Their Names Fit a Task Description.
+
+    Text is turned into a sparse vector of TF-IDF weighted features: the words of the text, with identifiers such as
+    `sortList` or `sort_list` split into their parts, and the character trigrams of each word, so that `sorted`
+    still resembles `sort`. A function scores the cosine similarity of its name to the task description, blended
+    with that of its docstring.
+
+    One ranker serves every code snippet of a task. The description is vectorized once, and every function ever
+    ranked joins a shared corpus, held as an inverted index, from which the document frequencies are taken. Scoring a
+    batch of functions only visits the postings of the description's own features, rather than comparing the
+    description against each name in turn.
+
+    :attr _query_features: A mapping of the features of the task description to their counts.
+    :type _query_features: dict
+    :attr _documents: A mapping of the texts ranked so far to their mappings of features to counts.
+    :type _documents: dict
+    :attr _postings: A mapping of features to the set of texts holding them.
+    :type _postings: dict
+    :attr _lock: A lock guarding the corpus, as the code snippets of a task are analysed concurrently.
+    :type _lock: threading.Lock
+    """
+    WORD_REGEX = re.compile(r'[A-Z]?[a-z0-9]+|[A-Z]+(?![a-z])')
+
+    NGRAM_SIZE = 3
+    WORD_BOUNDARY = '#'
+
+    # The weights of the similarity of a function's name and of its docstring in its score.
+    NAME_WEIGHT = 0.75
+    DOCSTRING_WEIGHT = 0.25
+
+    def __init__(self, task_description):
+        """ Initializes the `NameSimilarityRanker` object.
+
+        :param task_description: The description of the task to rank functions for.
+        :type task_description: str
+        """
+        self._query_features = NameSimilarityRanker._get_features(task_description)
+        self._documents = {}
+        self._postings = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _get_features(text):
+        """ Returns the features of the given text with their counts.
+
+        :param text: The text to featurize, such as a function name.
+        :type text: str
+
+        :return: A mapping of the features of the text, its lowercased words and their character trigrams, to their
+            counts.
+        :rtype: dict
+        """
+        features = {}
+        for word in NameSimilarityRanker.WORD_REGEX.findall(text or ''):
+            word = word.lower()
+            features[word] = features.get(word, 0) + 1
+            padded_word = NameSimilarityRanker.WORD_BOUNDARY + word + NameSimilarityRanker.WORD_BOUNDARY
+            for start in xrange(len(padded_word) - NameSimilarityRanker.NGRAM_SIZE + 1):
+                ngram = padded_word[start:start + NameSimilarityRanker.NGRAM_SIZE]
+                features[ngram] = features.get(ngram, 0) + 1
+        return features
+
+    def _add_document(self, text):
+        """ Adds the given text to the corpus, unless it is already in it. The caller must hold `_lock`.
+
+        :param text: The text to add.
+        :type text: str
+        """
+        if text in self._documents:
+            return
+        features = NameSimilarityRanker._get_features(text)
+        self._documents[text] = features
+        for feature in features:
+            self._postings.setdefault(feature, set()).add(text)
+
+    def _get_idf(self, feature):
+        """ Returns the smoothed inverse document frequency of the given feature. The caller must hold `_lock`.
+
+        :param feature: The feature.
+        :type feature: str
+
+        :return: The smoothed inverse document frequency of the feature.
+        :rtype: float
+        """
+        return math.log((1.0 + len(self._documents)) / (1.0 + len(self._postings.get(feature, ())))) + 1.0
+
+    def _get_similarities(self, texts):
+        """ Returns the cosine similarity of each of the given texts, all in the corpus, to the task description.
+
+        The caller must hold `_lock`.
+
+        :param texts: The texts to score.
+        :type texts: set
+
+        :return: A mapping of the texts to their similarity to the task description, between 0 and 1.
+        :rtype: dict
+        """
+        idfs = dict((feature, self._get_idf(feature)) for feature in self._query_features)
+        query_norm = math.sqrt(sum((count * idfs[feature]) ** 2 for feature, count in self._query_features.items()))
+        dot_products = dict.fromkeys(texts, 0.0)
+        for feature, count in self._query_features.iteritems():
+            for text in self._postings.get(feature, ()):
+                if text in dot_products:
+                    dot_products[text] += count * self._documents[text][feature] * idfs[feature] ** 2
+        similarities = {}
+        for text, dot_product in dot_products.iteritems():
+            if not dot_product:
+                similarities[text] = 0.0
+                continue
+            document_norm = math.sqrt(sum(
+                (count * self._get_idf(feature)) ** 2 for feature, count in self._documents[text].iteritems()
+            ))
+            similarities[text] = dot_product / (query_norm * document_norm)
+        return similarities
+
+    def rank(self, functions, limit=None):
+        """ Ranks the given functions by how well their names and docstrings fit the task description.
+
+        :param functions: A list of `(name, docstring)` pairs.
+        :type functions: list
+        :param limit: The number of best functions to return, or `None` for all of them (default: None).
+        :type limit: int
+
+        :return: A list of `(name, score)` pairs, best first, where scores are between 0 and 100. Functions scoring
+            the same keep their given order.
+        :rtype: list
+        """
+        with self._lock:
+            for name, docstring in functions:
+                self._add_document(name)
+                if docstring:
+                    self._add_document(docstring)
+            similarities = self._get_similarities(set(
+                text for function in functions for text in function if text
+            ))
+        scores = []
+        for index, (name, docstring) in enumerate(functions):
+            score = similarities[name]
+            if docstring:
+                score = NameSimilarityRanker.NAME_WEIGHT * score + \
+                    NameSimilarityRanker.DOCSTRING_WEIGHT * similarities[docstring]
+            scores.append((score * 100, -index, name))
+        best_scores = heapq.nlargest(limit or len(scores), scores)
+        return [(name, score) for score, _, name in best_scores]
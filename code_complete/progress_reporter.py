@@ -0,0 +1,213 @@
+# -*- coding: utf-8 -*-
+
+""" Encapsulates Functionality for Reporting the Progress of a Headless Compilation as JSON Lines. """
+
+import json
+import threading
+import time
+
+from config import WRITE_OPT
+from unittest_result_collector import UnittestResultCollector
+
+
+class ProgressReporter(object):
+    """ Encapsulates Functionality for Reporting the Progress of a Headless Compilation as JSON Lines.
+
+    Every step of the compilation is written to the stream as a JSON object on a line of its own, holding the `event`,
+    the number of seconds `elapsed` since the compilation started and the details of the step, and is flushed right away
+    so a batch job can follow along. Candidates whose tests were stopped once a better ranked candidate won are reported
+    as cancelled rather than verified. The steps are also tallied into a summary of the whole compilation, written as
+    the last line of the stream and, if asked for, to a file of its own.
+
+    :attr _stream: The file object the progress is written to.
+    :type _stream: file
+    :attr _summary_f: A path to write the summary to, or `None` to only write it to the stream.
+    :type _summary_f: str
+    :attr _start_time: The time the compilation started.
+    :type _start_time: float
+    :attr _summary: The summary of the compilation so far.
+    :type _summary: dict
+    :attr _num_candidates_verified: A mapping of the indices of the tasks in progress to the number of candidate
+        solutions verified for them so far.
+    :type _num_candidates_verified: dict
+    :attr _num_candidates_cancelled: A mapping of the indices of the tasks in progress to the number of candidate
+        solutions cancelled for them so far.
+    :type _num_candidates_cancelled: dict
+    :attr _lock: A lock guarding the stream and the summary.
+    :type _lock: threading.Lock
+    """
+    START = 'start'
+    TASK_START = 'task_start'
+    CANDIDATE = 'candidate'
+    TEST_RESULT = 'test_result'
+    CANDIDATE_CANCELLED = 'candidate_cancelled'
+    TASK_FINISH = 'task_finish'
+    FINISH = 'finish'
+    SUMMARY = 'summary'
+
+    def __init__(self, stream, summary_f=None):
+        """ Initializes the `ProgressReporter` object.
+
+        :param stream: The file object to write the progress to.
+        :type stream: file
+        :param summary_f: A path to write the summary to, or `None` to only write it to the stream (default: None).
+        :type summary_f: str
+        """
+        self._stream = stream
+        self._summary_f = summary_f
+        self._start_time = time.time()
+        self._summary = {
+            'tasks': [],
+            'num_candidates_verified': 0,
+            'num_candidates_cancelled': 0,
+        }
+        self._num_candidates_verified = {}
+        self._num_candidates_cancelled = {}
+        self._lock = threading.Lock()
+
+    def _report(self, event, **fields):
+        """ Writes the given event with its details to the stream.
+
+        :param event: The name of the event.
+        :type event: str
+        """
+        fields['event'] = event
+        fields['elapsed'] = round(time.time() - self._start_time, 3)
+        with self._lock:
+            self._stream.write(json.dumps(fields, sort_keys=True) + '\n')
+            self._stream.flush()
+
+    def start(self, code_f, tests_f, num_tasks, test_outcomes):
+        """ Reports the start of the compilation.
+
+        :param code_f: A path to the file to code complete.
+        :type code_f: str
+        :param tests_f: A path to the tests to be used to verify code completion.
+        :type tests_f: str
+        :param num_tasks: The number of tasks to complete.
+        :type num_tasks: int
+        :param test_outcomes: The outcomes of the tests run against the code file, or `None` if they failed to load.
+        :type test_outcomes: dict
+        """
+        num_tests_failed = UnittestResultCollector.get_num_failing_tests(test_outcomes)
+        self._summary.update(code_f=code_f, tests_f=tests_f, num_tests_failed_before=num_tests_failed)
+        self._report(ProgressReporter.START, code_f=code_f, tests_f=tests_f, num_tasks=num_tasks,
+                     num_tests_failed=num_tests_failed)
+
+    def start_task(self, task_index, task_descriptor):
+        """ Reports the start of a task.
+
+        :param task_index: The index of the task among all tasks.
+        :type task_index: int
+        :param task_descriptor: The `TaskDescriptor` object encapsulating the task.
+        :type task_descriptor: TaskDescriptor
+        """
+        self._report(ProgressReporter.TASK_START, task=task_index,
+                     description=task_descriptor.get_task_description())
+
+    def candidate(self, task_index, rank, task_solution):
+        """ Reports a candidate solution about to be verified.
+
+        :param task_index: The index of the task among all tasks.
+        :type task_index: int
+        :param rank: The rank of the candidate among those of the task, best first.
+        :type rank: int
+        :param task_solution: The candidate solution to the task.
+        :type task_solution: TaskSolution
+        """
+        self._report(ProgressReporter.CANDIDATE, task=task_index, rank=rank,
+                     function_name=task_solution.function_name, inputs=list(task_solution.inputs),
+                     outputs=list(task_solution.outputs))
+
+    def test_result(self, task_index, rank, test_outcomes, accepted, fixed_tests=(), broken_tests=(), error=None):
+        """ Reports the result of running the tests against a candidate solution, with the status and duration of
+        every test run.
+
+        :param task_index: The index of the task among all tasks.
+        :type task_index: int
+        :param rank: The rank of the candidate among those of the task, best first.
+        :type rank: int
+        :param test_outcomes: A mapping of the ids of the tests run against the candidate to their `TestOutcome`, or
+            `None` if they did not run.
+        :type test_outcomes: dict
+        :param accepted: Whether the candidate was accepted as the task's solution.
+        :type accepted: bool
+        :param fixed_tests: The ids of the tests the candidate fixed (default: ()).
+        :type fixed_tests: iterable
+        :param broken_tests: The ids of the tests the candidate broke (default: ()).
+        :type broken_tests: iterable
+        :param error: Why the tests did not run against the candidate, if they did not (default: None).
+        :type error: str
+        """
+        with self._lock:
+            self._summary['num_candidates_verified'] += 1
+            self._num_candidates_verified[task_index] = self._num_candidates_verified.get(task_index, 0) + 1
+        tests = None
+        if test_outcomes is not None:
+            tests = [
+                {'id': test_id, 'status': outcome.status, 'duration': round(outcome.duration, 6)}
+                for test_id, outcome in test_outcomes.iteritems()
+            ]
+        self._report(ProgressReporter.TEST_RESULT, task=task_index, rank=rank,
+                     num_tests_failed=UnittestResultCollector.get_num_failing_tests(test_outcomes), tests=tests,
+                     fixed_tests=list(fixed_tests), broken_tests=list(broken_tests), accepted=accepted, error=error)
+
+    def cancelled(self, task_index, rank):
+        """ Reports a candidate solution whose tests were stopped because a better ranked candidate won.
+
+        :param task_index: The index of the task among all tasks.
+        :type task_index: int
+        :param rank: The rank of the candidate among those of the task, best first.
+        :type rank: int
+        """
+        with self._lock:
+            self._summary['num_candidates_cancelled'] += 1
+            self._num_candidates_cancelled[task_index] = self._num_candidates_cancelled.get(task_index, 0) + 1
+        self._report(ProgressReporter.CANDIDATE_CANCELLED, task=task_index, rank=rank)
+
+    def finish_task(self, task_index, task_descriptor, task_solution, test_outcomes):
+        """ Reports the end of a task.
+
+        :param task_index: The index of the task among all tasks.
+        :type task_index: int
+        :param task_descriptor: The `TaskDescriptor` object encapsulating the task.
+        :type task_descriptor: TaskDescriptor
+        :param task_solution: The candidate solution accepted for the task, or `None` if none was.
+        :type task_solution: TaskSolution
+        :param test_outcomes: The outcomes of the tests run against the code file after the task.
+        :type test_outcomes: dict
+        """
+        task = {
+            'task': task_index,
+            'description': task_descriptor.get_task_description(),
+            'solved': task_solution is not None,
+            'function_name': task_solution.function_name if task_solution is not None else None,
+        }
+        with self._lock:
+            task['num_candidates_verified'] = self._num_candidates_verified.pop(task_index, 0)
+            task['num_candidates_cancelled'] = self._num_candidates_cancelled.pop(task_index, 0)
+            self._summary['tasks'].append(task)
+        self._report(ProgressReporter.TASK_FINISH,
+                     num_tests_failed=UnittestResultCollector.get_num_failing_tests(test_outcomes), **task)
+
+    def finish(self, num_tests_failed, reports=()):
+        """ Reports the end of the compilation, followed by its summary.
+
+        :param num_tests_failed: The number of tests failing against the completed code file.
+        :type num_tests_failed: int
+        :param reports: The reports of the stages of the compilation, such as the snippet providers (default: ()).
+        :type reports: iterable
+        """
+        self._report(ProgressReporter.FINISH, num_tests_failed=num_tests_failed)
+        with self._lock:
+            self._summary.update(
+                num_tests_failed_after=num_tests_failed,
+                num_tasks_solved=sum(1 for task in self._summary['tasks'] if task['solved']),
+                duration=round(time.time() - self._start_time, 3),
+                reports=list(reports),
+            )
+            summary = dict(self._summary)
+        if self._summary_f is not None:
+            with open(self._summary_f, WRITE_OPT) as summary_f:
+                json.dump(summary, summary_f, indent=2, sort_keys=True)
+        self._report(ProgressReporter.SUMMARY, **summary)
@@ -1,7 +1,9 @@
+from snippet_analysis_helper import InferenceMode
+from snippet_analysis_helper import LanguageMode
 from snippet_analysis_helper import SnippetAnalysisHelper
-import inspect
-import importlib
-import types
+from collections import OrderedDict
+from function_extractor import FunctionExtractor
+from static_type_inferer import StaticTypeInferer
 
 class SnippetAnalyser:
     """ This class analyzes the snippets. This. This is where it all happens.
@@ -12,18 +14,33 @@ class SnippetAnalyser:
         :type str
 
         :param language_mode A LanguageMode enum to specify the language being analyzed
+
+        :param inference_mode An InferenceMode enum to specify how types are found. Tracing runs the snippet once,
+        splicing runs it once per word
+
+        :param budget An AnalysisBudget capping the executions of the analysis. Raises AnalysisBudgetExceededError once
+        it is used up
         """
 
-    def __init__(self, snippet, language_mode):
+    VERSION = 1                                 # Bump whenever the analysis changes its results, as they are cached
+
+    # The attributes holding the results of the analysis, which is all SnippetMatcher needs
+    RESULT_ATTRIBUTES = ['functions', 'type_dict', 'global_type_dict', 'type_sources', 'argument_type_sources']
+
+    def __init__(self, snippet, language_mode, inference_mode=InferenceMode.trace, budget=None):
         self.snippet = snippet
+        self.language_mode = language_mode
+        self.inference_mode = inference_mode
         self.type_dict = {}                     # This maps the words to their types in a specific scope
         self.global_type_dict = {}              # This maps the global only words to their types
         self.line_dict = {}                     # This maps the lines to their indices in the snippet
         self.snippet_word_array = [[]]          # A 2D list of all words
         self.scope_flag = 0                     # A flag to keep track of current scope level
-        self.helper = SnippetAnalysisHelper(language_mode)
+        self.helper = SnippetAnalysisHelper(language_mode, budget)
         self.functions = {}                     # A dictionary of functions. Contains
                                                 # { func1 : [ "function stub", { arg1 : type, arg2 : type ...}], ... }
+        self.type_sources = {}                  # This maps the typed words to how their type was found
+        self.argument_type_sources = {}         # This maps functions to how the types of their arguments were found
 
     def execute(self):
         """ This function prepares the inputs and then executes the needed analysis. The types are stored in type_list
@@ -32,37 +49,55 @@ class SnippetAnalyser:
         """
         self.prepare_data()
         self.analyze_functions_in_snippet()
-        self.find_types()
+        needs_dynamic_types = self.infer_static_types()
+        if self.inference_mode == InferenceMode.trace and self.language_mode == LanguageMode.python:
+            self.assign_wildcard_types()
+            if needs_dynamic_types:
+                self.trace_types()
+        elif needs_dynamic_types:
+            self.find_types()
         self.type_dict = self.helper.clean_dict(self.type_dict)
         self.global_type_dict = self.helper.clean_dict(self.global_type_dict)
-        self.helper.reset_stdout()
+        self.mark_dynamic_types()
 
-    def analyze_functions_in_snippet(self):
-        """ This function populates self.functions
+    def get_results(self):
+        """ This function returns the results of the executed analysis, so they can be cached
+
+        :return: A dictionary of the result attributes to their values
+        :rtype dict
+        """
+        return dict((attribute, getattr(self, attribute)) for attribute in SnippetAnalyser.RESULT_ATTRIBUTES)
+
+    def set_results(self, results):
+        """ This function restores the results of an earlier analysis of the same snippet, instead of executing it
+
+        :param results: A dictionary as returned by get_results
+        :type dict
 
         :return: None
         """
-        temp_file = open(self.helper.filename, 'w+')
-        temp_file.write(self.snippet)
-        temp_file.close()
+        for attribute in SnippetAnalyser.RESULT_ATTRIBUTES:
+            setattr(self, attribute, results[attribute])
+
+    def analyze_functions_in_snippet(self):
+        """ This function populates self.functions from the parsed snippet, without writing or importing it
 
+        :return: None
+        """
         try:
-            temp_module = importlib.import_module("snippet_analysis." + self.helper.filename[:-3])
-        except:
+            extracted_functions = FunctionExtractor(self.snippet).extract()
+        except SyntaxError:
             return
 
-        for function in dir(temp_module):
-            if not isinstance(temp_module.__dict__.get(function), types.FunctionType):
-                continue
-            if function[0] == '_':
+        for extracted_function in extracted_functions:
+            if extracted_function.name[0] == '_':
                 continue
-            else:
-                self.functions[function] = []
-        for function in self.functions.keys():
-            temp_dict = dict()
-            for argument in inspect.getargspec(getattr(temp_module, function))[0]:
+            temp_dict = OrderedDict()                   # Ordered, so arguments keep their declaration order
+            for argument in extracted_function.arguments:
                 temp_dict[argument] = ''
-            self.functions[function] = [inspect.getsourcelines(getattr(temp_module, function)), temp_dict]
+            self.functions[extracted_function.name] = [
+                (extracted_function.source.splitlines(True), extracted_function.lineno), temp_dict
+            ]
 
     def prepare_data(self):
         """ This function does the pre-analysis by preparing the data for analysis. This also populates line_dict
@@ -122,10 +157,98 @@ class SnippetAnalyser:
             else:
                 self.find_types_helper(line)
 
+    def infer_static_types(self):
+        """ This function does the analysis of the types that can be read off the snippet's source, without running it
+
+         :return: Whether some types are left for the dynamic analysis to find
+         :rtype bool
+         """
+        if self.language_mode != LanguageMode.python:
+            return True
+        try:
+            static_types = StaticTypeInferer(self.snippet).infer()
+        except SyntaxError:
+            return True
+
+        for scope in ['locals', 'globals']:
+            for word, word_type in static_types[scope].items():
+                if word in self.functions:
+                    continue
+                self.type_dict[word] = word_type
+                self.type_sources[word] = self.helper.source_static
+                if scope == 'globals':
+                    self.global_type_dict[word] = word_type
+
+        for function, argument_types in static_types['arguments'].items():
+            if function not in self.functions:
+                continue
+            arguments = self.functions[function][1]
+            for argument, argument_type in argument_types.items():
+                if argument in arguments:
+                    arguments[argument] = argument_type
+                    self.argument_type_sources.setdefault(function, {})[argument] = self.helper.source_static
+
+        return len(static_types['unresolved']) > 0
+
+    def assign_wildcard_types(self):
+        """ This function makes every word not typed yet a wildcard, except for operators and functions
+
+         :return: None
+         """
+        for line in self.snippet_word_array[1:]:
+            for word in line:
+                if word in self.helper.operators:
+                    self.type_dict[word] = self.helper.word_operator
+                elif word not in self.functions and word not in self.type_dict:
+                    self.type_dict[word] = self.helper.word_wildcard
+
+    def mark_dynamic_types(self):
+        """ This function marks every type found, that was not inferred statically, as found dynamically
+
+         :return: None
+         """
+        for word, word_type in self.type_dict.items():
+            if word not in self.type_sources and word_type not in [self.helper.word_operator, self.helper.word_unknown,
+                                                                   self.helper.word_wildcard]:
+                self.type_sources[word] = self.helper.source_dynamic
+
+        for function in self.functions:
+            argument_type_sources = self.argument_type_sources.setdefault(function, {})
+            for argument, argument_type in self.functions[function][1].items():
+                if argument_type and argument not in argument_type_sources:
+                    argument_type_sources[argument] = self.helper.source_dynamic
+
+    def trace_types(self):
+        """ This function does the analysis of the types left by the static analysis by running the snippet once under
+        a tracer. Function arguments get the types they were called with
+
+         :return: None
+         """
+        traced_types = self.helper.trace_wrapper(self.snippet)
+        if traced_types is None:
+            return
+
+        for scope in ['locals', 'globals']:
+            for word, word_type in traced_types[scope].items():
+                word_type = self.helper.clean_type(word_type)
+                if word in self.functions or word in self.type_sources or word_type in self.helper.ignore_classes:
+                    continue
+                self.type_dict[word] = word_type
+                if scope == 'globals':
+                    self.global_type_dict[word] = word_type
+
+        for function, argument_types in traced_types['arguments'].items():
+            if function not in self.functions:
+                continue
+            arguments = self.functions[function][1]
+            for argument, argument_type in argument_types.items():
+                if argument in arguments and not arguments[argument]:
+                    arguments[argument] = self.helper.clean_type(argument_type)
+
     def find_types_helper_local_scope(self, line, index):
         """ This helper function is delegated to within local scopes
         
-        :param line: The current line being considered. Code is injected AFTER the line
+        :param line: The current line being considered. Probes are evaluated AFTER the line
         :type list
         
         :param index: The index of the line inside the snippet
@@ -133,19 +256,12 @@ class SnippetAnalyser:
 
         :return: None
         """
-        line_as_str = self.line_dict.get(index)     # The actual, unchanged string line
-        spaces = ""                                 # Indentation!
-        
-        for char in self.line_dict.get(index + 1): 
-            if char == ' ' or char == '\t':         
-                spaces += char
-            else:
-                break
-                
-        input_exec = self.snippet[:self.snippet.find(
-            line_as_str)] + line_as_str + self.helper.get_local_scope_finder(spaces) + self.snippet[self.snippet.find(
-                                                                                   line_as_str) + len(line_as_str):]
-        output = self.helper.exec_wrapper(input_exec)
+        # The snippet runs once up to the next line, and every word of this line is probed from that single snapshot
+        words = [word for word in line if word not in self.helper.operators and word not in self.type_sources]
+        outputs = self.helper.probe_wrapper(self.snippet, self.get_next_lineno(index),
+                                            [self.helper.get_local_scope_finder()] +
+                                            [self.helper.get_type_finder(word) for word in words])
+        output = outputs[0]
         
         if self.helper.is_global(output):    
             # We've gone to the global scope
@@ -163,33 +279,44 @@ class SnippetAnalyser:
             for word in line:
                 if word in self.helper.operators:
                     self.type_dict[word] = self.helper.word_operator
-                else:
-                    input_exec = self.snippet[:self.snippet.find(
-                        line_as_str)] + line_as_str + self.helper.get_type_finder(word, spaces) + self.snippet[
-                                                                                                     self.snippet.find(
-                                                                                                     line_as_str) + len(
-                                                                                                     line_as_str):]
-                    self.find_type_from_output(input_exec, word)
+            for word, output in zip(words, outputs[1:]):
+                self.find_type_from_output(output, word)
+
+    def get_next_lineno(self, index):
+        """ This helper function finds the line that runs next after the given one, skipping blank and comment lines
+
+        :param index: The index of the line inside the snippet
+        :type int
+
+        :return: The line number, counting from 1, of the next line, or None if it is the last one
+        :rtype int
+        """
+        for next_index in range(index + 1, len(self.line_dict)):
+            stripped_line = self.line_dict[next_index].strip()
+            if stripped_line and not stripped_line.startswith('#'):
+                return next_index + 1
+        return None
 
     def find_types_helper(self, line):
         """ This helper function is delegated to within global scopes
 
-        :param line: The current line being considered. Code is injected at the end of the snippet
+        :param line: The current line being considered. Probes are evaluated after the whole snippet has run
         :type list
 
         :return None
         """
+        words = [word for word in line if word not in self.helper.operators and word not in self.type_sources]
+        outputs = self.helper.probe_wrapper(self.snippet, None, [self.helper.get_type_finder(word) for word in words])
         for word in line:
             if word in self.helper.operators:
                 self.type_dict[word] = self.helper.word_operator
-            else:
-                input_exec = self.snippet + self.helper.get_type_finder(word, "")
-                self.find_type_from_output(input_exec, word, self.scope_flag == 0)
+        for word, output in zip(words, outputs):
+            self.find_type_from_output(output, word, self.scope_flag == 0)
 
-    def find_type_from_output(self, input_exec, word, is_global=False):
+    def find_type_from_output(self, output, word, is_global=False):
         """ This helper function is assigns types to words
 
-        :param input_exec: The input to exec_wrapper
+        :param output: The output of probing the word's type
         :type str
 
         :param word: The word to assign type to
@@ -201,7 +328,6 @@ class SnippetAnalyser:
         :return: None
         """
         try:
-            output = self.helper.exec_wrapper(input_exec)
             if output.find('Error') >= 0:
                 if not self.type_dict.has_key(word) or self.type_dict[word].equals(self.helper.word_unknown):
                     self.type_dict[word] = self.helper.word_unknown
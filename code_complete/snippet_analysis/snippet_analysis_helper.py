@@ -1,9 +1,7 @@
 import sys
 import os
-from cStringIO import StringIO
 from enum import Enum
-import random
-import string
+from execution_service import ExecutionService
 
 
 class LanguageMode(Enum):
@@ -11,6 +9,11 @@ class LanguageMode(Enum):
     shell = 1
 
 
+class InferenceMode(Enum):
+    splice = 0      # Splice a type probe into the snippet and run it once per word
+    trace = 1       # Run the snippet once under a tracer recording the types of every variable
+
+
 class SnippetAnalysisHelper:
     """ Helper class to Snippet Analysis. Holds helper methods and list of language tokens.
 
@@ -18,15 +21,19 @@ class SnippetAnalysisHelper:
     It also contains static helper methods to help in the analysis.
 
     :param language_mode: A LanguageMode enum object declaring the language to be analyzed
+
+    :param budget: An AnalysisBudget every Python execution is charged to, or None
     """
 
-    def __init__(self, language_mode=LanguageMode.python):
+    def __init__(self, language_mode=LanguageMode.python, budget=None):
         self.word_operator = "operator"
         self.word_unknown = "unknown"
         self.word_wildcard = "wildcard"
+        self.source_static = "static"           # The type was inferred from the snippet's source, without running it
+        self.source_dynamic = "dynamic"         # The type was found by running the snippet
         self.language_mode = language_mode
+        self.budget = budget
         self.unique_identifier = "redirected_output_hiw_unique"
-        self.filename = "code_complete_temp_file_" + ''.join(random.choice(string.ascii_uppercase + string.digits) for _ in range(6)) + ".py"
 
 
         if language_mode == LanguageMode.python:
@@ -44,24 +51,54 @@ class SnippetAnalysisHelper:
         :param code_to_execute: A String that wraps valid a valid code snippet
         :type str
 
-        :return The output of the code_to_execute after it has run
+        :return The output of the code_to_execute after it has run, or '' if it failed or timed out
         :rtype str
         """
-        old_stdout = sys.stdout
-        redirected_output_hiw_unique = sys.stdout = StringIO()
-
         if self.language_mode == LanguageMode.shell:
             os.popen(code_to_execute)
+            return ''
 
         elif self.language_mode == LanguageMode.python:
-            try:
-                exec code_to_execute
-            except:
-                return ''
+            # Python code runs in a sandboxed worker process, never in this one. The unique identifier is seeded into
+            # the code's globals, so `is_global` can still tell the global scope's `locals()` apart.
+            output = ExecutionService.get_shared().execute(code_to_execute, {self.unique_identifier: True},
+                                                           budget=self.budget)
+            return output or ''
+
+    def probe_wrapper(self, code_to_probe, lineno, expressions):
+        """ This method takes in a String, which is a valid Python code snippet. The code is run once up to the given
+        line, and the given expressions are evaluated there as if printed by code spliced in just before that line
+
+        :param code_to_probe: A String that wraps a valid Python code snippet
+        :type str
+
+        :param lineno: The line to probe before, or None for after the snippet has run
+        :type int
+
+        :param expressions: The expressions to probe with, as returned by get_local_scope_finder and get_type_finder
+        :type list
 
-        sys.stdout = old_stdout
-        self.reset_stdout()
-        return redirected_output_hiw_unique.getvalue()
+        :return What printing each expression would output, or '' for each if the line was never reached
+        :rtype list
+        """
+        outputs = ExecutionService.get_shared().probe(code_to_probe, lineno, expressions,
+                                                      {self.unique_identifier: True}, budget=self.budget)
+        if outputs is None:
+            return [''] * len(expressions)
+        return [output.encode('utf-8') for output in outputs]
+
+    def trace_wrapper(self, code_to_trace):
+        """ This method takes in a String, which is a valid Python code snippet. The code is run once and the runtime
+        types of its variables are returned
+
+        :param code_to_trace: A String that wraps a valid Python code snippet
+        :type str
+
+        :return A dictionary of 'globals', 'locals' and 'arguments' type dictionaries, or None if it could not be run
+        :rtype dict
+        """
+        return ExecutionService.get_shared().trace_types(code_to_trace, {self.unique_identifier: True},
+                                                         budget=self.budget)
 
     @staticmethod
     def reset_stdout():
@@ -103,32 +140,26 @@ class SnippetAnalysisHelper:
 
         return new_type_dict
 
-    def get_local_scope_finder(self, spaces):
-        """ This method returns the language specific methods for finding local variables in scope
-
-        :param spaces: If the language is anal about indentation, spaces tell how much to indent
-        :type str
+    def get_local_scope_finder(self):
+        """ This method returns the language specific expression for finding local variables in scope
 
-        :return Code stub
+        :return Expression to probe with
         :rtype str
         """
         if self.language_mode == LanguageMode.python:
-            return "\n" + spaces + "print locals()\n"
+            return "locals()"
 
-    def get_type_finder(self, word, spaces):
-        """ This method returns the language specific methods for finding type of a method
+    def get_type_finder(self, word):
+        """ This method returns the language specific expression for finding type of a word
 
         :param word: The word whose type is to be found
         :type str
 
-        :param spaces: If the language is anal about indentation, spaces tell how much to indent
-        :type str
-
-        :return Code stub
+        :return Expression to probe with
         :rtype str
         """
         if self.language_mode == LanguageMode.python:
-            return "\n" + spaces + "print type(" + word + ")\n"
+            return "type(" + word + ")"
 
     def is_global(self, output):
         """ This method returns if the output is from global scope or not. This is done by comparing against the
@@ -1,25 +1,33 @@
 from snippet_analyser import SnippetAnalyser
 from snippet_matcher import SnippetMatcher
+from snippet_analysis_helper import InferenceMode
 from snippet_analysis_helper import LanguageMode
-import os
 
 
 class SnippetController:
-    def __init__(self, snippet, task_arguments, task_comment, language_mode=LanguageMode.python, debug=False):
+    def __init__(self, snippet, task_arguments, task_comment, language_mode=LanguageMode.python, debug=False,
+                 snippet_analyser=None, inference_mode=InferenceMode.trace, budget=None, name_ranker=None):
         self.task_arguments = task_arguments
         self.task_comment = task_comment
         self.snippet = snippet
-        self.snippet_analyser = SnippetAnalyser(snippet, language_mode)
+        self.is_analysed = snippet_analyser is not None     # A given analyser was already executed on this snippet
+        self.snippet_analyser = snippet_analyser or SnippetAnalyser(snippet, language_mode, inference_mode, budget)
         self.snippet_matcher = None
+        self.matched_functions = None
+        self.name_ranker = name_ranker
         self.debug = debug
 
     def analyze(self):
-        self.snippet_analyser.execute()
+        if not self.is_analysed:
+            self.snippet_analyser.execute()
+            self.is_analysed = True
         self.snippet_matcher = SnippetMatcher(self.snippet_analyser,
                                               self.snippet,
                                               self.task_arguments,
-                                              self.task_comment)
-        self.snippet_matcher.match_functions()
+                                              self.task_comment,
+                                              self.name_ranker)
+        # Matching ranks every function of the snippet by name, so it is done once and its result kept
+        self.matched_functions = self.snippet_matcher.match_functions()
 
         if self.debug:
             print "Global types"
@@ -28,20 +36,10 @@ class SnippetController:
             print self.snippet_analyser.type_dict
             print "==========="
             print "Matched Functions"
-            print self.snippet_matcher.match_functions()
+            print self.matched_functions
             print "Detailed Function Info"
             print self.snippet_matcher.functions
 
-    def clean(self):
-        to_clean = [self.snippet_analyser.helper.filename[:-3],
-                    self.snippet_analyser.helper.filename + "c", self.snippet_analyser.helper.filename]
-        for temp_file in to_clean:
-            try:
-                os.remove(temp_file)
-            except OSError:
-                pass
-
     def find_snippet(self):
         self.analyze()
-        self.clean()
-        return self.snippet_matcher.match_functions(), self.snippet_matcher.functions
+        return self.matched_functions, self.snippet_matcher.functions
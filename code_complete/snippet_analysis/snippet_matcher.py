@@ -1,5 +1,8 @@
-import itertools
+import copy
+from collections import OrderedDict
 from fuzzywuzzy import process
+from candidate_generator import CandidateGenerator
+from function_extractor import FunctionExtractor
 
 # pip install fuzzywuzzy https://github.com/seatgeek/fuzzywuzzy
 # TODO: Make language non-specific
@@ -11,15 +14,19 @@ class SnippetMatcher:
     :param snippet_analyser: A SnippetAnalyser
     :param task_arguments: The arguments required in task
     :param task_comment: The comment provided by user
+    :param name_ranker: A NameSimilarityRanker shared by the snippets of the task, or None to rank names one by one
     """
-    def __init__(self, snippet_analyser, snippet, task_arguments, task_comment):
+
+    WILDCARD_PENALTY = 1.0                      # The cost of matching an argument of unknown type to a task argument
+    def __init__(self, snippet_analyser, snippet, task_arguments, task_comment, name_ranker=None):
         self.global_types = snippet_analyser.global_type_dict
         self.all_types = snippet_analyser.type_dict
         self.snippet = snippet
-        self.functions = snippet_analyser.functions
+        self.functions = copy.deepcopy(snippet_analyser.functions)     # Copied, as matching rewrites the entries
         self.helper = snippet_analyser.helper
         self.task_arguments = task_arguments            # { func1 {arg1 : type1, arg2 : type2 }, func2 ... }
         self.task_comment = task_comment
+        self.name_ranker = name_ranker
         self.matched_functions_arguments = []
         self.matched_functions_name = []
         self.matched_functions = []
@@ -57,8 +64,12 @@ class SnippetMatcher:
         """
         for function in self.functions.keys():
             arguments = self.functions[function][1]
-            temp_dict = dict()
+            temp_dict = OrderedDict()
             for argument_name in arguments.keys():
+                if arguments[argument_name]:
+                    # The type the function was seen being called with beats the type of any same-named variable
+                    temp_dict[argument_name] = arguments[argument_name]
+                    continue
                 try:
                     temp_dict[argument_name] = self.all_types[argument_name]
                 except KeyError:
@@ -68,14 +79,15 @@ class SnippetMatcher:
 
     def match_functions_argument_type(self):
         """ This function populates self.matched_functions_arguments with stub_functions that fit the bill
-        by argument type
+        by argument type. Each function's matchings are generated lazily, when iterated
 
         :return: None
         """
         for function in self.functions:
             all_combinations = self.match_argument_types(self.functions[function][1])
             self.functions[function] = [self.functions[function][0], self.functions[function][1], all_combinations]
-            if not len(all_combinations):
+            scores = self.get_argument_type_scores(self.functions[function][1])
+            if scores is None or not CandidateGenerator.can_complete_assignment(scores):
                 continue
             self.matched_functions_arguments.append(function)
 
@@ -85,59 +97,86 @@ class SnippetMatcher:
 
         :return: None
         """
-        self.matched_functions_name = \
-            process.extract(self.task_comment, self.functions.keys(), limit=len(self.functions.keys()))
+        if self.name_ranker is None:
+            self.matched_functions_name = \
+                process.extract(self.task_comment, self.functions.keys(), limit=len(self.functions.keys()))
+            return
+        self.matched_functions_name = self.name_ranker.rank(
+            [(function, self.get_function_docstring(function)) for function in self.functions.keys()]
+        )
+
+    def get_function_docstring(self, function):
+        """ This function finds the docstring of a stub_function in the snippet
+
+        :param function: The name of the stub_function
+        :type str
+
+        :return: The docstring of the stub_function, or an empty string if it has none
+        :rtype str
+        """
+        try:
+            extracted_functions = FunctionExtractor(''.join(self.functions[function][0][0])).extract()
+        except SyntaxError:
+            return ''
+        return extracted_functions[0].docstring if extracted_functions else ''
 
-    def match_argument_types(self, given_arguments):
-        """ This function takes in a dictionary of arguments and matches it against a dictionary of task requirements,
-        returning all possible valid matchings.
+    def get_argument_type_score(self, given_type, task_type):
+        """ This function scores binding a given argument of the given type to a task argument of the given type
 
-        For example, if given_arguments is {'x': int, 'y': int, 'z': list} and
-        self.task_arguments is {'a': int, 'b': int, 'c': list}, this function will return
-        [ [(x,a),(y,b),(c,z)] , [(x,b),(y,a),(c,z)] ]
+        :param given_type: The type of the given argument
+        :type str
 
-        :param given_arguments: A dictionary of arguments
-        :type dict
+        :param task_type: The type of the task argument
+        :type str
 
-        :returns: All possible, valid matchings of given and task arguments
-        :rtype: list of lists of tuples
+        :return: 0 for the same type, the negative wildcard penalty for a given argument of any type, or None if the
+        types are incompatible
+        :rtype float
         """
+        if given_type == task_type:
+            return 0.0
+        elif given_type == self.helper.word_wildcard:
+            return -SnippetMatcher.WILDCARD_PENALTY
+        return None
 
-        if len(given_arguments.values()) != len(self.task_arguments.values()):
-            return []
-
-        given_arguments_list = []
-        task_arguments_list = []
-        for key, value in given_arguments.iteritems():
-            given_arguments_list.append({key: value})
-        for key, value in self.task_arguments.iteritems():
-            task_arguments_list.append({key: value})
-
-        all_combinations = list(itertools.product(given_arguments_list, task_arguments_list))
+    def get_argument_type_scores(self, given_arguments):
+        """ This function scores binding each given argument to each task argument
 
-        for tup in all_combinations:
-            # tup is of form ( {'x' : type}, {'a' : type} )
-            if tup[0].values()[0] != tup[1].values()[0] and tup[0].values()[0] != self.helper.word_wildcard:
-                all_combinations.remove(tup)
+        :param given_arguments: An ordered dictionary of arguments to their types
+        :type OrderedDict
 
-        useful_combinations = []
-        one_combination = []
+        :return: A row of scores per given argument, in order, with a column per task argument, or None if the numbers
+        of arguments differ
+        :rtype list
+        """
+        if len(given_arguments) != len(self.task_arguments):
+            return None
+        return [[self.get_argument_type_score(given_type, task_type) for task_type in self.task_arguments.values()]
+                for given_type in given_arguments.values()]
 
-        for i in xrange(len(all_combinations)):
-            current_first_name = all_combinations[i][0].keys()[0]
-            current_second_name = all_combinations[i][1].keys()[0]
+    def match_argument_types(self, given_arguments):
+        """ This function takes in a dictionary of arguments and matches it against a dictionary of task requirements,
+        lazily generating all possible valid matchings, best first.
 
-            one_combination.append([current_first_name, current_second_name])
+        A given argument matches a task argument of the same type, or any task argument if its type is a wildcard, which
+        costs a penalty. Matchings are enumerated by a best-first search that only ever extends partial matchings that
+        can still be completed, so it stays polynomial per matching however many arguments there are.
 
-            for j in xrange(i + 1, len(all_combinations)):
-                tup = all_combinations[j]
-                if tup[0].keys()[0] == current_first_name or tup[1].keys()[0] == current_second_name:
-                    continue
-                else:
-                    one_combination.append([tup[0].keys()[0], tup[1].keys()[0]])
+        For example, if given_arguments is {'x': int, 'y': int, 'z': list} and
+        self.task_arguments is {'a': int, 'b': int, 'c': list}, this function will generate
+        [(x,a),(y,b),(z,c)] and [(x,b),(y,a),(z,c)]
 
-            if one_combination.sort() not in useful_combinations and len(one_combination) == len(given_arguments_list):
-                useful_combinations.append(one_combination)
-            one_combination = []
+        :param given_arguments: An ordered dictionary of arguments to their types
+        :type OrderedDict
 
-        return useful_combinations
+        :returns: An iterator over all possible, valid matchings of given and task arguments, each a list of
+        (given argument, task argument) tuples in the order of the given arguments
+        :rtype: iterator
+        """
+        scores = self.get_argument_type_scores(given_arguments)
+        if scores is None:
+            return
+        given_names = given_arguments.keys()
+        task_names = self.task_arguments.keys()
+        for _, columns in CandidateGenerator.iter_best_assignments(scores):
+            yield [(given_names[row], task_names[column]) for row, column in enumerate(columns)]
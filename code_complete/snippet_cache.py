@@ -0,0 +1,170 @@
+# -*- coding: utf-8 -*-
+
+""" Encapsulates a Persistent, Size-Bounded Cache for Snippet Data. """
+
+import cPickle
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+from config import CACHE_MAX_SIZE
+from config import CACHE_PATH
+from config import CACHE_TTL
+
+
+class SnippetCache(object):
+    """ Encapsulates a Persistent, Size-Bounded Cache for Snippet Data.
+
+    Entries live in a SQLite database and are grouped into namespaces. An entry expires once it is older than the
+    TTL, and the least recently used entries are evicted whenever the cache grows beyond its size cap.
+
+    :attr _path: The path of the database backing the cache.
+    :type _path: str
+    :attr _ttl: The number of seconds a cache entry stays fresh.
+    :type _ttl: float
+    :attr _max_size: The maximum number of bytes the cache may hold.
+    :type _max_size: int
+    :attr _connection: The connection to the database backing the cache.
+    :type _connection: sqlite3.Connection
+    :attr _lock: A lock serializing access to the connection.
+    :type _lock: threading.Lock
+    """
+    SEARCH_RESULTS_NAMESPACE = 'search_results'
+    FILE_BODIES_NAMESPACE = 'file_bodies'
+    SNIPPET_ANALYSES_NAMESPACE = 'snippet_analyses'
+    ANALYSIS_BLACKLIST_NAMESPACE = 'analysis_blacklist'
+
+    CREATE_TABLE_STATEMENT = 'CREATE TABLE IF NOT EXISTS entries (' \
+        'namespace TEXT, key TEXT, value BLOB, size INTEGER, created REAL, accessed REAL, ' \
+        'PRIMARY KEY (namespace, key))'
+    CREATE_INDEX_STATEMENT = 'CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed)'
+    SELECT_STATEMENT = 'SELECT value, created FROM entries WHERE namespace = ? AND key = ?'
+    TOUCH_STATEMENT = 'UPDATE entries SET accessed = ? WHERE namespace = ? AND key = ?'
+    INSERT_STATEMENT = 'INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?)'
+    DELETE_STATEMENT = 'DELETE FROM entries WHERE namespace = ? AND key = ?'
+    TOTAL_SIZE_STATEMENT = 'SELECT COALESCE(SUM(size), 0) FROM entries'
+    LRU_STATEMENT = 'SELECT namespace, key, size FROM entries ORDER BY accessed'
+
+    # The number of seconds to wait on another process holding the database lock.
+    DATABASE_TIMEOUT = 30
+
+    _shared_cache = None
+    _shared_cache_lock = threading.Lock()
+
+    def __init__(self, path=None, ttl=None, max_size=None):
+        """ Initializes the `SnippetCache` object.
+
+        :param path: The path of the database backing the cache (default: None).
+        :type path: str
+        :param ttl: The number of seconds a cache entry stays fresh (default: None).
+        :type ttl: float
+        :param max_size: The maximum number of bytes the cache may hold (default: None).
+        :type max_size: int
+        """
+        self._path = path or CACHE_PATH
+        self._ttl = ttl or CACHE_TTL
+        self._max_size = max_size or CACHE_MAX_SIZE
+        cache_dir = os.path.dirname(self._path)
+        if cache_dir and not os.path.isdir(cache_dir):
+            os.makedirs(cache_dir)
+        self._connection = sqlite3.connect(
+            self._path,
+            timeout=SnippetCache.DATABASE_TIMEOUT,
+            check_same_thread=False,
+        )
+        self._connection.text_factory = str
+        self._lock = threading.Lock()
+        with self._lock, self._connection:
+            self._connection.execute(SnippetCache.CREATE_TABLE_STATEMENT)
+            self._connection.execute(SnippetCache.CREATE_INDEX_STATEMENT)
+
+    @staticmethod
+    def get_shared():
+        """ Returns the cache shared by everything in this process, creating it on first use.
+
+        :return: The cache shared by everything in this process.
+        :rtype: SnippetCache
+        """
+        with SnippetCache._shared_cache_lock:
+            if SnippetCache._shared_cache is None:
+                SnippetCache._shared_cache = SnippetCache()
+            return SnippetCache._shared_cache
+
+    @staticmethod
+    def _hash_key(key):
+        """ Returns a fixed-length digest of the given key.
+
+        :param key: A key made up of strings, numbers and tuples thereof.
+        :type key: object
+
+        :return: A fixed-length digest of the given key.
+        :rtype: str
+        """
+        return hashlib.sha1(repr(key)).hexdigest()
+
+    def get(self, namespace, key):
+        """ Returns the value cached under the given key, or `None` if there is no fresh entry for it.
+
+        :param namespace: The namespace the key belongs to.
+        :type namespace: str
+        :param key: A key made up of strings, numbers and tuples thereof.
+        :type key: object
+
+        :return: The value cached under the given key, or `None` if there is no fresh entry for it.
+        :rtype: object
+        """
+        hashed_key = SnippetCache._hash_key(key)
+        now = time.time()
+        with self._lock, self._connection:
+            row = self._connection.execute(SnippetCache.SELECT_STATEMENT, (namespace, hashed_key)).fetchone()
+            if row is None:
+                return None
+            value, created = row
+            if now - created > self._ttl:
+                self._connection.execute(SnippetCache.DELETE_STATEMENT, (namespace, hashed_key))
+                return None
+            self._connection.execute(SnippetCache.TOUCH_STATEMENT, (now, namespace, hashed_key))
+        return cPickle.loads(str(value))
+
+    def set(self, namespace, key, value):
+        """ Caches the given value under the given key, evicting the least recently used entries if necessary.
+
+        :param namespace: The namespace the key belongs to.
+        :type namespace: str
+        :param key: A key made up of strings, numbers and tuples thereof.
+        :type key: object
+        :param value: A picklable value to cache.
+        :type value: object
+        """
+        pickled_value = cPickle.dumps(value, cPickle.HIGHEST_PROTOCOL)
+        if len(pickled_value) > self._max_size:
+            return
+        now = time.time()
+        with self._lock, self._connection:
+            self._connection.execute(SnippetCache.INSERT_STATEMENT, (
+                namespace,
+                SnippetCache._hash_key(key),
+                sqlite3.Binary(pickled_value),
+                len(pickled_value),
+                now,
+                now,
+            ))
+            self._evict()
+
+    def _evict(self):
+        """ Evicts the least recently used entries until the cache fits within its size cap.
+
+        The caller must hold `_lock`.
+        """
+        total_size = self._connection.execute(SnippetCache.TOTAL_SIZE_STATEMENT).fetchone()[0]
+        if total_size <= self._max_size:
+            return
+        evicted_entries = []
+        for namespace, hashed_key, size in self._connection.execute(SnippetCache.LRU_STATEMENT):
+            if total_size <= self._max_size:
+                break
+            evicted_entries.append((namespace, hashed_key))
+            total_size -= size
+        self._connection.executemany(SnippetCache.DELETE_STATEMENT, evicted_entries)
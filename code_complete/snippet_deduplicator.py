@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+
+""" Encapsulates Functionality for Removing Duplicate Code Snippets and Functions. """
+
+import ast
+import hashlib
+import threading
+
+
+class SnippetDeduplicator(object):
+    """ Encapsulates Functionality for Removing Duplicate Code Snippets and Functions.
+
+    Code is fingerprinted by its normalized AST, so copies differing only in whitespace, comments or docstrings share
+    a fingerprint.
+
+    :attr _num_snippets_seen: The number of code snippets passed through `iter_unique_snippets`.
+    :type _num_snippets_seen: int
+    :attr _num_snippets_removed: The number of duplicate code snippets removed by `iter_unique_snippets`.
+    :type _num_snippets_removed: int
+    :attr _function_fingerprints: A mapping of keys to the function fingerprints seen under them.
+    :type _function_fingerprints: dict
+    :attr _num_functions_seen: The number of functions passed through `is_duplicate_function`.
+    :type _num_functions_seen: int
+    :attr _num_functions_removed: The number of functions `is_duplicate_function` reported as duplicates.
+    :type _num_functions_removed: int
+    :attr _num_analyses_shared: The number of code snippet analyses reused for a duplicate code snippet.
+    :type _num_analyses_shared: int
+    :attr _lock: A lock guarding the state above, which is shared by the tasks being analysed concurrently.
+    :type _lock: threading.Lock
+    """
+    def __init__(self):
+        """ Initializes the `SnippetDeduplicator` object. """
+        self._num_snippets_seen = 0
+        self._num_snippets_removed = 0
+        self._function_fingerprints = {}
+        self._num_functions_seen = 0
+        self._num_functions_removed = 0
+        self._num_analyses_shared = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _strip_docstrings(tree):
+        """ Removes the docstrings of every module, class and function in the given AST.
+
+        :param tree: An AST.
+        :type tree: ast.AST
+        """
+        for node in ast.walk(tree):
+            if not isinstance(node, (ast.Module, ast.ClassDef, ast.FunctionDef)) or not node.body:
+                continue
+            first_statement = node.body[0]
+            if isinstance(first_statement, ast.Expr) and isinstance(first_statement.value, ast.Str):
+                # An empty body is not valid, so a body holding only a docstring is normalized to `pass`.
+                node.body = node.body[1:] or [ast.Pass()]
+
+    @staticmethod
+    def fingerprint(source):
+        """ Returns a fingerprint of the given source code that ignores whitespace, comments and docstrings.
+
+        Source code that cannot be parsed is fingerprinted by its whitespace-normalized text instead.
+
+        :param source: The source code to fingerprint.
+        :type source: str
+
+        :return: A fingerprint of the given source code.
+        :rtype: str
+        """
+        try:
+            tree = ast.parse(source)
+        except (SyntaxError, TypeError):
+            return hashlib.sha1(' '.join(source.split())).hexdigest()
+        SnippetDeduplicator._strip_docstrings(tree)
+        return hashlib.sha1(ast.dump(tree)).hexdigest()
+
+    def iter_unique_snippets(self, code_snippets):
+        """ Yields the given code snippets with duplicates removed, keeping the first, highest-ranked, copy.
+
+        :param code_snippets: An iterator over code snippets represented as strings.
+        :type code_snippets: iterator
+
+        :return: An iterator over the unique code snippets, in their original order.
+        :rtype: iterator
+        """
+        seen_fingerprints = set()
+        for code_snippet in code_snippets:
+            fingerprint = SnippetDeduplicator.fingerprint(code_snippet)
+            is_duplicate = fingerprint in seen_fingerprints
+            seen_fingerprints.add(fingerprint)
+            with self._lock:
+                self._num_snippets_seen += 1
+                self._num_snippets_removed += is_duplicate
+            if not is_duplicate:
+                yield code_snippet
+
+    def is_duplicate_function(self, key, function_source):
+        """ Returns whether a function with the same fingerprint was already seen under the given key.
+
+        :param key: The key to track fingerprints under, such as the task the function is a candidate for.
+        :type key: object
+        :param function_source: The source of the function.
+        :type function_source: str
+
+        :return: Whether a function with the same fingerprint was already seen under the given key.
+        :rtype: bool
+        """
+        fingerprint = SnippetDeduplicator.fingerprint(function_source)
+        with self._lock:
+            fingerprints = self._function_fingerprints.setdefault(key, set())
+            self._num_functions_seen += 1
+            if fingerprint in fingerprints:
+                self._num_functions_removed += 1
+                return True
+            fingerprints.add(fingerprint)
+            return False
+
+    def record_shared_analysis(self):
+        """ Records that an analysis was reused for a duplicate code snippet. """
+        with self._lock:
+            self._num_analyses_shared += 1
+
+    def get_report(self):
+        """ Returns a summary of how much the deduplication removed.
+
+        :return: A summary of how much the deduplication removed.
+        :rtype: str
+        """
+        return 'Deduplication removed %d of %d snippets and %d of %d functions, and shared %d analyses.' % (
+            self._num_snippets_removed,
+            self._num_snippets_seen,
+            self._num_functions_removed,
+            self._num_functions_seen,
+            self._num_analyses_shared,
+        )
@@ -0,0 +1,176 @@
+# -*- coding: utf-8 -*-
+
+""" Encapsulates a Streaming Pipeline of Task Solutions. """
+
+import Queue
+import threading
+
+from config import PIPELINE_PREFETCH_TASKS
+from config import PIPELINE_QUEUE_SIZE
+
+
+class _ProducerError(object):
+    """ Encapsulates an Error Raised While Producing the Task Solutions of a Task.
+
+    :attr error: The error raised.
+    :type error: Exception
+    """
+    def __init__(self, error):
+        """ Initializes the `_ProducerError` object.
+
+        :param error: The error raised.
+        :type error: Exception
+        """
+        self.error = error
+
+
+class _TaskStream(object):
+    """ Encapsulates the Bounded Stream of Task Solutions of a Single Task.
+
+    :attr task_index: The index of the task among all tasks.
+    :type task_index: int
+    :attr task_descriptor: The `TaskDescriptor` of the task.
+    :type task_descriptor: TaskDescriptor
+    :attr queue: The queue the task solutions are passed through.
+    :type queue: Queue.Queue
+    :attr cancelled: An event set once the consumer no longer wants task solutions for the task.
+    :type cancelled: threading.Event
+    """
+    def __init__(self, task_index, task_descriptor, queue_size):
+        """ Initializes the `_TaskStream` object.
+
+        :param task_index: The index of the task among all tasks.
+        :type task_index: int
+        :param task_descriptor: The `TaskDescriptor` of the task.
+        :type task_descriptor: TaskDescriptor
+        :param queue_size: The maximum number of task solutions to hold in the queue.
+        :type queue_size: int
+        """
+        self.task_index = task_index
+        self.task_descriptor = task_descriptor
+        self.queue = Queue.Queue(queue_size)
+        self.cancelled = threading.Event()
+
+
+class SnippetPipeline(object):
+    """ Encapsulates a Streaming Pipeline of Task Solutions.
+
+    The task solutions of every task are produced on a background thread and handed to the consumer through a bounded
+    queue, so the consumer can verify the first task solution of a task while later code snippets are still being
+    downloaded and analysed. A producer blocks once its queue is full, and producers are started in task order for at
+    most `_prefetch_tasks` tasks beyond the one being consumed, so memory stays flat however many tasks there are.
+
+    :attr _task_streams: A list of `_TaskStream` objects, one per task, in task order.
+    :type _task_streams: list
+    :attr _produce_task_solutions: A function taking the index of a task and its `TaskDescriptor`, and returning an
+        iterator over its task solutions.
+    :type _produce_task_solutions: callable
+    :attr _slots: A semaphore bounding the number of tasks in flight.
+    :type _slots: threading.Semaphore
+    """
+    # The number of seconds a blocked producer waits before checking whether its task was cancelled.
+    CANCELLATION_POLL_INTERVAL = 0.1
+
+    _END = object()
+
+    def __init__(self, task_descriptors, produce_task_solutions, queue_size=None, prefetch_tasks=None):
+        """ Initializes the `SnippetPipeline` object.
+
+        :param task_descriptors: A list of `TaskDescriptor` objects encapsulating the completion tasks.
+        :type task_descriptors: list
+        :param produce_task_solutions: A function taking the index of a task and its `TaskDescriptor`, and returning an
+            iterator over its task solutions.
+        :type produce_task_solutions: callable
+        :param queue_size: The maximum number of task solutions to buffer per task (default: None).
+        :type queue_size: int
+        :param prefetch_tasks: The number of tasks to produce task solutions for ahead of the one being consumed
+            (default: None).
+        :type prefetch_tasks: int
+        """
+        queue_size = queue_size or PIPELINE_QUEUE_SIZE
+        self._task_streams = [
+            _TaskStream(task_index, task_descriptor, queue_size)
+            for task_index, task_descriptor in enumerate(task_descriptors)
+        ]
+        self._produce_task_solutions = produce_task_solutions
+        self._slots = threading.Semaphore(1 + (prefetch_tasks or PIPELINE_PREFETCH_TASKS))
+
+    def _put(self, task_stream, item):
+        """ Puts the given item on the queue of the given task, blocking while the queue is full.
+
+        :param task_stream: The stream of the task.
+        :type task_stream: _TaskStream
+        :param item: The item to put on the queue.
+        :type item: object
+
+        :return: Whether the item was put on the queue, rather than dropped because the task was cancelled.
+        :rtype: bool
+        """
+        while not task_stream.cancelled.is_set():
+            try:
+                task_stream.queue.put(item, timeout=SnippetPipeline.CANCELLATION_POLL_INTERVAL)
+                return True
+            except Queue.Full:
+                continue
+        return False
+
+    def _produce(self, task_stream):
+        """ Produces the task solutions of the given task onto its queue.
+
+        :param task_stream: The stream of the task.
+        :type task_stream: _TaskStream
+        """
+        task_solutions = self._produce_task_solutions(task_stream.task_index, task_stream.task_descriptor)
+        try:
+            for task_solution in task_solutions:
+                if not self._put(task_stream, task_solution):
+                    return
+        except Exception as e:
+            self._put(task_stream, _ProducerError(e))
+            return
+        finally:
+            close = getattr(task_solutions, 'close', None)
+            if close is not None:
+                close()
+        self._put(task_stream, SnippetPipeline._END)
+
+    def _dispatch(self):
+        """ Starts a producer for every task, in task order, as slots become available. """
+        for task_stream in self._task_streams:
+            self._slots.acquire()
+            thread = threading.Thread(target=self._produce, args=(task_stream,))
+            thread.daemon = True
+            thread.start()
+
+    def _consume(self, task_stream):
+        """ Yields the task solutions of the given task as they are produced.
+
+        Closing the iterator early cancels the task's producer.
+
+        :param task_stream: The stream of the task.
+        :type task_stream: _TaskStream
+        """
+        try:
+            while True:
+                item = task_stream.queue.get()
+                if item is SnippetPipeline._END:
+                    return
+                if isinstance(item, _ProducerError):
+                    raise item.error
+                yield item
+        finally:
+            task_stream.cancelled.set()
+            self._slots.release()
+
+    def start(self):
+        """ Starts the pipeline and returns a stream of task solutions for every task.
+
+        The streams must be consumed in task order.
+
+        :return: A list holding an iterator over the task solutions of each task, in task order.
+        :rtype: list
+        """
+        thread = threading.Thread(target=self._dispatch)
+        thread.daemon = True
+        thread.start()
+        return [self._consume(task_stream) for task_stream in self._task_streams]
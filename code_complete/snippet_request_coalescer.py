@@ -0,0 +1,391 @@
+# -*- coding: utf-8 -*-
+
+""" Encapsulates Functionality for Coalescing Code Snippet Requests for Equivalent Task Descriptions. """
+
+import functools
+import re
+import threading
+
+from config import SNIPPET_REQUEST_BUFFER_SIZE
+
+
+class _Subscription(object):
+    """ Encapsulates an Iterator over Every Code Snippet of a `_SnippetRequest`, from the First.
+
+    A subscription is closed once exhausted, and may be closed early from any thread, even while another thread waits
+    on it, which then sees no more code snippets. A subscription that is dropped without being closed is closed when
+    it is garbage collected.
+
+    :attr _snippet_request: The request subscribed to.
+    :type _snippet_request: _SnippetRequest
+    :attr _token: The key of the subscription in the request.
+    :type _token: int
+    """
+    def __init__(self, snippet_request, token):
+        """ Initializes the `_Subscription` object.
+
+        :param snippet_request: The request subscribed to.
+        :type snippet_request: _SnippetRequest
+        :param token: The key of the subscription in the request.
+        :type token: int
+        """
+        self._snippet_request = snippet_request
+        self._token = token
+
+    def __iter__(self):
+        return self
+
+    def next(self):
+        """ Returns the next code snippet of the request, waiting for it to arrive.
+
+        :return: The next code snippet.
+        :rtype: str
+
+        :raises StopIteration: If the request has no more code snippets or the subscription was closed.
+        :raises Exception: The error the request raised, if any.
+        """
+        try:
+            code_snippet = self._snippet_request.read(self._token)
+        except Exception:
+            self.close()
+            raise
+        if code_snippet is _SnippetRequest.END:
+            self.close()
+            raise StopIteration
+        return code_snippet
+
+    def close(self):
+        """ Closes the subscription. """
+        self._snippet_request.unsubscribe(self._token)
+
+    def __del__(self):
+        self.close()
+
+
+class _SnippetRequest(object):
+    """ Encapsulates a Code Snippet Request Shared by Every Equivalent Task Description.
+
+    The code snippets are buffered as they arrive, so every subscription to the request can replay them from the start
+    while the request is live. The fetch pauses while any open subscription lags `_buffer_size` code snippets behind,
+    and stops if every subscription is closed before it completes. Once its last subscription is closed, the request is
+    released: its code snippets are dropped and it takes no new subscriptions.
+
+    :attr _code_snippets: The code snippets that have arrived so far.
+    :type _code_snippets: list
+    :attr _positions: A mapping of the tokens of the open subscriptions to the index of the next code snippet each
+        reads.
+    :type _positions: dict
+    :attr _next_token: The token of the next subscription.
+    :type _next_token: int
+    :attr _buffer_size: The maximum number of code snippets the fetch runs ahead of the slowest open subscription.
+    :type _buffer_size: int
+    :attr _on_release: A function called with the request once it is released.
+    :type _on_release: callable
+    :attr _done: Whether the request has completed.
+    :type _done: bool
+    :attr _released: Whether the request was released.
+    :type _released: bool
+    :attr _error: The error the request raised, if any.
+    :type _error: Exception
+    :attr _condition: A condition signalled whenever a code snippet arrives or is read, a subscription is closed or
+        the request completes.
+    :type _condition: threading.Condition
+    """
+    END = object()
+
+    def __init__(self, buffer_size, on_release):
+        """ Initializes the `_SnippetRequest` object.
+
+        :param buffer_size: The maximum number of code snippets the fetch runs ahead of the slowest open subscription.
+        :type buffer_size: int
+        :param on_release: A function called with the request once it is released.
+        :type on_release: callable
+        """
+        self._code_snippets = []
+        self._positions = {}
+        self._next_token = 0
+        self._buffer_size = buffer_size
+        self._on_release = on_release
+        self._done = False
+        self._released = False
+        self._error = None
+        self._condition = threading.Condition()
+
+    def subscribe(self):
+        """ Returns a new subscription to the request, replaying its code snippets from the first.
+
+        :return: A new subscription, or `None` if the request was released.
+        :rtype: _Subscription
+        """
+        with self._condition:
+            if self._released:
+                return None
+            token = self._next_token
+            self._next_token += 1
+            self._positions[token] = 0
+        return _Subscription(self, token)
+
+    def _is_ahead(self):
+        """ Returns whether the fetch must pause for the slowest open subscription. The caller must hold `_condition`.
+
+        :return: Whether the fetch is `_buffer_size` code snippets ahead of the slowest open subscription.
+        :rtype: bool
+        """
+        return bool(self._positions) and \
+            len(self._code_snippets) - min(self._positions.itervalues()) >= self._buffer_size
+
+    def run(self, code_snippets):
+        """ Buffers the given code snippets as they arrive and then completes the request.
+
+        :param code_snippets: An iterator over the code snippets for the request.
+        :type code_snippets: iterator
+        """
+        error = None
+        try:
+            for code_snippet in code_snippets:
+                with self._condition:
+                    while self._is_ahead() and not self._released:
+                        self._condition.wait()
+                    if self._released:
+                        break
+                    self._code_snippets.append(code_snippet)
+                    self._condition.notify_all()
+        except Exception as e:
+            error = e
+        finally:
+            close = getattr(code_snippets, 'close', None)
+            if close is not None:
+                close()
+        with self._condition:
+            self._done = True
+            self._error = error
+            self._condition.notify_all()
+
+    def read(self, token):
+        """ Returns the next code snippet for the given subscription, waiting for it to arrive.
+
+        :param token: The token of the subscription.
+        :type token: int
+
+        :return: The next code snippet, or `END` if there is none or the subscription was closed.
+        :rtype: str
+
+        :raises Exception: The error the request raised, if any.
+        """
+        with self._condition:
+            while True:
+                index = self._positions.get(token)
+                if index is None:
+                    return _SnippetRequest.END
+                if index < len(self._code_snippets):
+                    self._positions[token] = index + 1
+                    self._condition.notify_all()
+                    return self._code_snippets[index]
+                if self._done:
+                    if self._error is not None:
+                        raise self._error
+                    return _SnippetRequest.END
+                self._condition.wait()
+
+    def unsubscribe(self, token):
+        """ Closes the given subscription, releasing the request if it was the last one open.
+
+        :param token: The token of the subscription.
+        :type token: int
+        """
+        with self._condition:
+            if token not in self._positions:
+                return
+            del self._positions[token]
+            self._condition.notify_all()
+            if self._positions:
+                return
+            self._released = True
+            self._code_snippets = []
+        self._on_release(self)
+
+
+class SnippetRequestCoalescer(object):
+    """ Encapsulates Functionality for Coalescing Code Snippet Requests for Equivalent Task Descriptions.
+
+    Task descriptions are normalized to the set of their meaningful terms, so descriptions differing only in case,
+    punctuation, word order, filler words or plurals share one request and its result. Descriptions whose terms
+    overlap by at least `NEAR_DUPLICATE_THRESHOLD` are treated as equivalent, too.
+
+    A request only holds its code snippets while a task is reading them. Once released, only its terms and task
+    description are kept, so a later equivalent task description repeats the same request, which the snippet cache
+    then answers, rather than one merely similar to it.
+
+    :attr _iter_code_snippets: A function taking a task description and a request priority, and returning an iterator
+        over its code snippets.
+    :type _iter_code_snippets: callable
+    :attr _requests: A mapping of `(language, normalized terms)` keys to their live `_SnippetRequest` objects.
+    :type _requests: dict
+    :attr _task_descriptions: A mapping of every `(language, normalized terms)` key requested to the task description
+        first requested under it.
+    :type _task_descriptions: dict
+    :attr _buffer_size: The maximum number of code snippets a request runs ahead of the slowest task reading them.
+    :type _buffer_size: int
+    :attr _lock: A lock guarding `_requests` and `_task_descriptions`.
+    :type _lock: threading.Lock
+    :attr _num_requests: The number of code snippet requests made through the coalescer.
+    :type _num_requests: int
+    :attr _num_coalesced_requests: The number of code snippet requests answered by an equivalent live request.
+    :type _num_coalesced_requests: int
+    :attr _num_repeated_requests: The number of code snippet requests repeating an equivalent released request.
+    :type _num_repeated_requests: int
+    """
+    # The minimum Jaccard similarity between the terms of two task descriptions for them to be treated as equivalent.
+    NEAR_DUPLICATE_THRESHOLD = 0.8
+
+    TERM_REGEX = re.compile(r'[a-z0-9]+')
+    FILLER_WORDS = frozenset([
+        'a', 'an', 'and', 'the', 'to', 'of', 'in', 'on', 'for', 'from', 'with', 'into', 'that', 'which', 'all',
+        'function', 'method', 'please', 'some',
+    ])
+    PLURAL_SUFFIX = 's'
+    MIN_PLURAL_LENGTH = 4
+
+    def __init__(self, iter_code_snippets, buffer_size=None):
+        """ Initializes the `SnippetRequestCoalescer` object.
+
+        :param iter_code_snippets: A function taking a task description and a request priority, and returning an
+            iterator over its code snippets.
+        :type iter_code_snippets: callable
+        :param buffer_size: The maximum number of code snippets a request runs ahead of the slowest task reading them
+            (default: None).
+        :type buffer_size: int
+        """
+        self._iter_code_snippets = iter_code_snippets
+        self._requests = {}
+        self._task_descriptions = {}
+        self._buffer_size = buffer_size or SNIPPET_REQUEST_BUFFER_SIZE
+        self._lock = threading.Lock()
+        self._num_requests = 0
+        self._num_coalesced_requests = 0
+        self._num_repeated_requests = 0
+
+    @staticmethod
+    def normalize(task_description):
+        """ Returns the meaningful terms of the given task description.
+
+        :param task_description: A description of the task to complete.
+        :type task_description: str
+
+        :return: The lowercase, singularized terms of the task description, without filler words.
+        :rtype: frozenset
+
+        .. code-block:: python
+
+            task_description = 'Function to sort a list of Strings.'
+
+            # Returns ...
+
+                frozenset(['sort', 'list', 'string'])
+        """
+        terms = set()
+        for term in SnippetRequestCoalescer.TERM_REGEX.findall(task_description.lower()):
+            if term in SnippetRequestCoalescer.FILLER_WORDS:
+                continue
+            if len(term) >= SnippetRequestCoalescer.MIN_PLURAL_LENGTH and \
+                    term.endswith(SnippetRequestCoalescer.PLURAL_SUFFIX) and \
+                    not term.endswith(SnippetRequestCoalescer.PLURAL_SUFFIX * 2):
+                term = term[:-1]
+            terms.add(term)
+        return frozenset(terms)
+
+    def _find_equivalent_key(self, language, terms):
+        """ Returns the key of a request, live or released, equivalent to the given one, or `None` if there is none.
+
+        The caller must hold `_lock`.
+
+        :param language: The programming language the code snippets should be in.
+        :type language: str
+        :param terms: The normalized terms of the task description.
+        :type terms: frozenset
+
+        :return: The key of an equivalent request, or `None` if there is none.
+        :rtype: tuple
+        """
+        if (language, terms) in self._task_descriptions:
+            return language, terms
+        best_key, best_similarity = None, SnippetRequestCoalescer.NEAR_DUPLICATE_THRESHOLD
+        for key in self._task_descriptions:
+            key_language, key_terms = key
+            if key_language != language or not terms or not key_terms:
+                continue
+            similarity = float(len(terms & key_terms)) / len(terms | key_terms)
+            if similarity >= best_similarity:
+                best_key, best_similarity = key, similarity
+        return best_key
+
+    def iter_code_snippets(self, task_description, language, priority=None):
+        """ Yields the code snippets for the given task description, sharing the request of any equivalent task
+        description that was already requested or is in flight.
+
+        A new request runs on its own thread, ahead of the task descriptions sharing it by at most `_buffer_size` code
+        snippets. Closing the returned iterator stops the request, unless another task description still reads it.
+
+        :param task_description: A description of the task to complete.
+        :type task_description: str
+        :param language: The programming language the code snippets should be in.
+        :type language: str
+        :param priority: The priority of the web requests made for a new request, where lower priorities are sent
+            first (default: None).
+        :type priority: int
+
+        :return: An iterator over code snippets represented as strings.
+        :rtype: iterator
+        """
+        terms = SnippetRequestCoalescer.normalize(task_description)
+        with self._lock:
+            self._num_requests += 1
+            key = self._find_equivalent_key(language, terms)
+            if key is None:
+                key = (language, terms)
+                self._task_descriptions[key] = task_description
+            elif key in self._requests:
+                subscription = self._requests[key].subscribe()
+                if subscription is not None:
+                    self._num_coalesced_requests += 1
+                    return subscription
+                self._num_repeated_requests += 1
+            else:
+                self._num_repeated_requests += 1
+            snippet_request = self._requests[key] = _SnippetRequest(
+                self._buffer_size,
+                functools.partial(self._release, key),
+            )
+            subscription = snippet_request.subscribe()
+            task_description = self._task_descriptions[key]
+        thread = threading.Thread(
+            target=snippet_request.run,
+            args=(self._iter_code_snippets(task_description, priority),),
+        )
+        thread.daemon = True
+        thread.start()
+        return subscription
+
+    def _release(self, key, snippet_request):
+        """ Forgets the given released request, keeping only its key and task description.
+
+        :param key: The key of the request.
+        :type key: tuple
+        :param snippet_request: The released request.
+        :type snippet_request: _SnippetRequest
+        """
+        with self._lock:
+            if self._requests.get(key) is snippet_request:
+                del self._requests[key]
+
+    def get_report(self):
+        """ Returns a summary of how many code snippet requests were coalesced.
+
+        :return: A summary of how many code snippet requests were coalesced.
+        :rtype: str
+        """
+        return 'Coalesced %d of %d snippet requests into an equivalent request, and repeated %d released ones.' % (
+            self._num_coalesced_requests,
+            self._num_requests,
+            self._num_repeated_requests,
+        )
@@ -0,0 +1,362 @@
+# -*- coding: utf-8 -*-
+
+""" Encapsulates Functionality for Statically Inferring the Types of the Variables of Source Code. """
+
+import ast
+
+
+class _Scope(object):
+    """ Encapsulates the Types Inferred for the Names Bound in a Single Module or Function Body.
+
+    :attr types: A mapping of names to their inferred type names.
+    :type types: dict
+    :attr unresolved: The names bound in the scope whose type could not be inferred, or was inferred inconsistently.
+    :type unresolved: set
+    :attr parent: The enclosing scope, or `None` for the module scope.
+    :type parent: _Scope
+    """
+    def __init__(self, parent=None):
+        """ Initializes the `_Scope` object.
+
+        :param parent: The enclosing scope, or `None` for the module scope (default: None).
+        :type parent: _Scope
+        """
+        self.types = {}
+        self.unresolved = set()
+        self.parent = parent
+
+    def bind(self, name, type_name):
+        """ Records that the given name is bound to a value of the given type, or of an unknown type if `None`.
+
+        A name bound to values of different types has no single type and is left unresolved.
+
+        :param name: The bound name.
+        :type name: str
+        :param type_name: The type name of the bound value, or `None` if unknown.
+        :type type_name: str
+        """
+        if name in self.unresolved:
+            return
+        if type_name is None or self.types.get(name, type_name) != type_name:
+            self.types.pop(name, None)
+            self.unresolved.add(name)
+        else:
+            self.types[name] = type_name
+
+    def lookup(self, name):
+        """ Returns the type name of the given name as seen from this scope, or `None` if unknown.
+
+        :param name: The name to look up.
+        :type name: str
+
+        :return: The type name of the given name, or `None` if unknown.
+        :rtype: str
+        """
+        scope = self
+        while scope is not None:
+            if name in scope.types:
+                return scope.types[name]
+            if name in scope.unresolved:
+                return None
+            scope = scope.parent
+        return None
+
+
+class StaticTypeInferer(object):
+    """ Encapsulates Functionality for Statically Inferring the Types of the Variables of Source Code.
+
+    The source code is parsed, never executed. A variable gets a type when every value bound to it is a literal, a
+    comprehension, a call to a builtin of known result type such as `list()` or `open()`, a method of known result type
+    called on a value of known type, or an expression over variables whose types are already known. The arguments of a
+    function get a type from their literal default value or from the calls to the function made in the source code.
+    Every other variable is left unresolved, for dynamic inference to find out.
+
+    :attr _source: The source code to infer types from.
+    :type _source: str
+    :attr _functions: A mapping of the names of the functions defined in the source code to their AST nodes.
+    :type _functions: dict
+    :attr _argument_scopes: A mapping of function names to a `_Scope` holding the types of their arguments.
+    :type _argument_scopes: dict
+    :attr _function_scopes: A mapping of function names to the `_Scope` of their body.
+    :type _function_scopes: dict
+    :attr _pending_functions: The `(AST node, enclosing scope)` pairs of the functions whose bodies are yet to be
+        visited. A body is only visited once the body enclosing it has been, so every call to the function is known.
+    :type _pending_functions: list
+    :attr _called_functions: The names of the functions defined in the source code that it also calls.
+    :type _called_functions: set
+    """
+    LITERAL_TYPES = {
+        ast.List: 'list',
+        ast.ListComp: 'list',
+        ast.Dict: 'dict',
+        ast.DictComp: 'dict',
+        ast.Set: 'set',
+        ast.SetComp: 'set',
+        ast.Tuple: 'tuple',
+        ast.GeneratorExp: 'generator',
+        ast.Compare: 'bool',
+        ast.Repr: 'str',
+    }
+    CONSTANT_TYPES = {
+        'True': 'bool',
+        'False': 'bool',
+        'None': 'NoneType',
+    }
+
+    # The result types of calls to builtins, keyed by the name of the builtin.
+    CALL_TYPES = {
+        'bool': 'bool',
+        'dict': 'dict',
+        'enumerate': 'enumerate',
+        'file': 'file',
+        'float': 'float',
+        'frozenset': 'frozenset',
+        'int': 'int',
+        'len': 'int',
+        'list': 'list',
+        'long': 'long',
+        'open': 'file',
+        'range': 'list',
+        'raw_input': 'str',
+        'repr': 'str',
+        'set': 'set',
+        'sorted': 'list',
+        'str': 'str',
+        'tuple': 'tuple',
+        'unicode': 'unicode',
+        'xrange': 'xrange',
+        'zip': 'list',
+    }
+
+    # The result types of method calls, keyed by the type of the object the method is called on and then by its name.
+    METHOD_TYPES = {
+        'str': {
+            'format': 'str', 'join': 'str', 'lower': 'str', 'replace': 'str', 'split': 'list', 'splitlines': 'list',
+            'strip': 'str', 'upper': 'str', 'count': 'int', 'find': 'int', 'startswith': 'bool', 'endswith': 'bool',
+        },
+        'dict': {'copy': 'dict', 'items': 'list', 'keys': 'list', 'values': 'list'},
+        'list': {'count': 'int', 'index': 'int'},
+        'file': {'read': 'str', 'readline': 'str', 'readlines': 'list'},
+    }
+
+    # The types that arithmetic between two values of the same type yields again.
+    ARITHMETIC_TYPES = frozenset(['int', 'long', 'float', 'complex', 'str', 'unicode', 'list', 'tuple'])
+
+    # The element types of the iterables a `for` loop can run over.
+    ELEMENT_TYPES = {'str': 'str', 'unicode': 'unicode', 'xrange': 'int', 'file': 'str'}
+
+    def __init__(self, source):
+        """ Initializes the `StaticTypeInferer` object.
+
+        :param source: The source code to infer types from.
+        :type source: str
+        """
+        self._source = source
+        self._functions = {}
+        self._argument_scopes = {}
+        self._function_scopes = {}
+        self._pending_functions = []
+        self._called_functions = set()
+
+    def _get_type(self, node, scope):
+        """ Returns the type name of the value of the given expression, or `None` if it cannot be inferred.
+
+        :param node: The AST node of an expression.
+        :type node: ast.expr
+        :param scope: The scope the expression is evaluated in.
+        :type scope: _Scope
+
+        :return: The type name of the value of the given expression, such as `'list'`, or `None` if unknown.
+        :rtype: str
+        """
+        if isinstance(node, ast.Num):
+            return type(node.n).__name__
+        if isinstance(node, ast.Str):
+            return type(node.s).__name__
+        if isinstance(node, ast.Name):
+            return StaticTypeInferer.CONSTANT_TYPES.get(node.id) or scope.lookup(node.id)
+        if isinstance(node, ast.UnaryOp):
+            return 'bool' if isinstance(node.op, ast.Not) else self._get_type(node.operand, scope)
+        if isinstance(node, ast.BinOp):
+            left_type, right_type = self._get_type(node.left, scope), self._get_type(node.right, scope)
+            if isinstance(node.op, ast.Mod) and left_type in ('str', 'unicode'):
+                return left_type
+            if left_type == right_type and left_type in StaticTypeInferer.ARITHMETIC_TYPES:
+                return left_type
+            return None
+        if isinstance(node, ast.Call):
+            return self._get_call_type(node, scope)
+        return StaticTypeInferer.LITERAL_TYPES.get(type(node))
+
+    def _get_call_type(self, node, scope):
+        """ Returns the type name of the result of the given call, or `None` if it cannot be inferred.
+
+        :param node: The AST node of a call.
+        :type node: ast.Call
+        :param scope: The scope the call is evaluated in.
+        :type scope: _Scope
+
+        :return: The type name of the result of the given call, or `None` if unknown.
+        :rtype: str
+        """
+        function = node.func
+        if isinstance(function, ast.Name):
+            if function.id in self._functions or scope.lookup(function.id) is not None:
+                # A call to a function of the source code itself, or a builtin shadowed by a variable.
+                return None
+            return StaticTypeInferer.CALL_TYPES.get(function.id)
+        if isinstance(function, ast.Attribute):
+            receiver_type = self._get_type(function.value, scope)
+            return StaticTypeInferer.METHOD_TYPES.get(receiver_type, {}).get(function.attr)
+        return None
+
+    def _bind_target(self, target, type_name, value, scope):
+        """ Binds the names of the given assignment target in the given scope.
+
+        :param target: The AST node of an assignment target.
+        :type target: ast.expr
+        :param type_name: The type name of the assigned value, or `None` if unknown.
+        :type type_name: str
+        :param value: The AST node of the assigned value, or `None` if the value has no node of its own.
+        :type value: ast.expr
+        :param scope: The scope the assignment is made in.
+        :type scope: _Scope
+        """
+        if isinstance(target, ast.Name):
+            scope.bind(target.id, type_name)
+        elif isinstance(target, (ast.Tuple, ast.List)):
+            if isinstance(value, (ast.Tuple, ast.List)) and len(value.elts) == len(target.elts):
+                for element_target, element_value in zip(target.elts, value.elts):
+                    self._bind_target(element_target, self._get_type(element_value, scope), element_value, scope)
+            else:
+                for element_target in target.elts:
+                    self._bind_target(element_target, None, None, scope)
+
+    def _record_call(self, node, scope):
+        """ Records the types of the arguments passed by the given call to a function of the source code.
+
+        :param node: The AST node of a call.
+        :type node: ast.Call
+        :param scope: The scope the call is made in.
+        :type scope: _Scope
+        """
+        if not isinstance(node.func, ast.Name) or node.func.id not in self._functions:
+            return
+        self._called_functions.add(node.func.id)
+        argument_names = [argument.id for argument in self._functions[node.func.id].args.args
+                          if isinstance(argument, ast.Name)]
+        argument_scope = self._argument_scopes[node.func.id]
+        for argument_name, argument in zip(argument_names, node.args):
+            argument_scope.bind(argument_name, self._get_type(argument, scope))
+        for keyword in node.keywords:
+            if keyword.arg in argument_names:
+                argument_scope.bind(keyword.arg, self._get_type(keyword.value, scope))
+
+    def _visit_body(self, statements, scope):
+        """ Infers the types of the names bound by the given statements, in order.
+
+        :param statements: The AST nodes of the statements.
+        :type statements: list
+        :param scope: The scope the statements run in.
+        :type scope: _Scope
+        """
+        for statement in statements:
+            for node in ast.walk(statement):
+                if isinstance(node, ast.Call):
+                    self._record_call(node, scope)
+            if isinstance(statement, ast.FunctionDef):
+                scope.bind(statement.name, 'function')
+                self._pending_functions.append((statement, scope))
+            elif isinstance(statement, ast.Assign):
+                type_name = self._get_type(statement.value, scope)
+                for target in statement.targets:
+                    self._bind_target(target, type_name, statement.value, scope)
+            elif isinstance(statement, ast.AugAssign):
+                if isinstance(statement.target, ast.Name):
+                    target_type = scope.lookup(statement.target.id)
+                    value_type = self._get_type(statement.value, scope)
+                    scope.bind(statement.target.id, target_type if target_type == value_type else None)
+            elif isinstance(statement, ast.For):
+                iterable_type = self._get_type(statement.iter, scope)
+                if isinstance(statement.iter, ast.Call) and isinstance(statement.iter.func, ast.Name) and \
+                        statement.iter.func.id in ('range', 'xrange') and iterable_type is not None:
+                    iterable_type = 'xrange'
+                self._bind_target(statement.target, StaticTypeInferer.ELEMENT_TYPES.get(iterable_type), None, scope)
+                self._visit_body(statement.body + statement.orelse, scope)
+            elif isinstance(statement, ast.With):
+                if statement.optional_vars is not None:
+                    self._bind_target(statement.optional_vars, self._get_type(statement.context_expr, scope), None,
+                                      scope)
+                self._visit_body(statement.body, scope)
+            elif isinstance(statement, (ast.If, ast.While)):
+                self._visit_body(statement.body + statement.orelse, scope)
+            elif isinstance(statement, ast.TryExcept):
+                self._visit_body(statement.body + statement.orelse, scope)
+                for handler in statement.handlers:
+                    if handler.name is not None:
+                        self._bind_target(handler.name, None, None, scope)
+                    self._visit_body(handler.body, scope)
+            elif isinstance(statement, ast.TryFinally):
+                self._visit_body(statement.body + statement.finalbody, scope)
+
+    def infer(self):
+        """ Returns the types inferred for the variables of the source code, and the variables left unresolved.
+
+        :return: A mapping of `'globals'` and `'locals'` to mappings of variable names to their type names, of
+            `'arguments'` to a mapping of function names to such a mapping for their arguments, and of `'unresolved'`
+            to the set of names whose types only dynamic inference could find, namely the variables bound to a value
+            of unknown type or, in any scope, to values of different types, and the untyped arguments of the functions
+            the source code calls.
+        :rtype: dict
+
+        :raises SyntaxError: If the source code cannot be parsed.
+        """
+        try:
+            module = ast.parse(self._source)
+        except TypeError as e:
+            # `ast.parse` raises a `TypeError` rather than a `SyntaxError` for source code containing null bytes.
+            raise SyntaxError(str(e))
+        self._functions = dict((node.name, node) for node in ast.walk(module) if isinstance(node, ast.FunctionDef))
+        self._argument_scopes = {}
+        self._function_scopes = {}
+        self._pending_functions = []
+        self._called_functions = set()
+        for name, node in self._functions.iteritems():
+            argument_scope = _Scope()
+            arguments = [argument for argument in node.args.args if isinstance(argument, ast.Name)]
+            for argument, default in zip(arguments[len(arguments) - len(node.args.defaults):], node.args.defaults):
+                argument_scope.bind(argument.id, self._get_type(default, argument_scope))
+            self._argument_scopes[name] = argument_scope
+        module_scope = _Scope()
+        self._visit_body(module.body, module_scope)
+        while self._pending_functions:
+            node, enclosing_scope = self._pending_functions.pop(0)
+            # Arguments are looked up before the enclosing scope, and the function's own bindings before both.
+            argument_scope = self._argument_scopes[node.name]
+            argument_scope.parent = enclosing_scope
+            function_scope = _Scope(argument_scope)
+            self._visit_body(node.body, function_scope)
+            self._function_scopes[node.name] = function_scope
+        # The locals of every function are reported together, so a name bound to different types in different
+        # functions, or left unresolved in any of them, has no single type either.
+        local_scope, unresolved = _Scope(), set(module_scope.unresolved)
+        argument_types = {}
+        for name, node in self._functions.iteritems():
+            argument_scope = self._argument_scopes[name]
+            argument_types[name] = dict(argument_scope.types)
+            for variable, type_name in argument_scope.types.iteritems():
+                local_scope.bind(variable, type_name)
+            if name in self._function_scopes:
+                for variable in self._function_scopes[name].unresolved:
+                    local_scope.bind(variable, None)
+                for variable, type_name in self._function_scopes[name].types.iteritems():
+                    local_scope.bind(variable, type_name)
+            if name in self._called_functions:
+                unresolved.update(argument.id for argument in node.args.args
+                                  if isinstance(argument, ast.Name) and argument.id not in argument_scope.types)
+        unresolved.update(local_scope.unresolved)
+        global_types = dict((name, type_name) for name, type_name in module_scope.types.iteritems()
+                            if type_name != 'function')
+        local_types = dict((name, type_name) for name, type_name in local_scope.types.iteritems()
+                           if type_name != 'function')
+        return {'globals': global_types, 'locals': local_types, 'arguments': argument_types, 'unresolved': unresolved}
@@ -0,0 +1,257 @@
+# -*- coding: utf-8 -*-
+
+""" Encapsulates Functionality for Collecting the Outcome of Every Test of a `unittest` Run. """
+
+from collections import namedtuple
+from collections import OrderedDict
+import re
+import time
+import unittest
+
+
+# The outcome of a single test: its status and the number of seconds it took.
+TestOutcome = namedtuple('TestOutcome', ['status', 'duration'])
+
+
+class UnittestResultCollector(unittest.TextTestResult):
+    """ Encapsulates Functionality for Collecting the Outcome of Every Test of a `unittest` Run.
+
+    Alongside the usual `unittest` output, the status and duration of every test are recorded by test id, so runs
+    against different candidates can be compared test by test rather than by their number of failures.
+
+    Given the outcomes of a baseline run, the run stops as soon as it can no longer improve on the baseline: once a
+    test passing in the baseline fails, or once every test failing in the baseline has run and failed again.
+
+    An error raised by a class or module fixture, such as `setUpClass`, is recorded as an error of every test of the
+    class or module, as those tests either never run or run against a broken fixture.
+
+    :attr outcomes: A mapping of the ids of the tests run so far, in the order they ran, to their `TestOutcome`.
+    :type outcomes: collections.OrderedDict
+    :attr stopped_early: Why the run stopped before every test ran, or `None` if it did not.
+    :type stopped_early: str
+    :attr _baseline: A mapping of test ids to their `TestOutcome` in the baseline run, or `None` if there is none.
+    :type _baseline: dict
+    :attr _baseline_failing_tests: The ids of the tests failing in the baseline run.
+    :type _baseline_failing_tests: set
+    :attr _test_ids: The ids of the tests of the suite being run.
+    :type _test_ids: list
+    :attr _start_time: The time the test being run started.
+    :type _start_time: float
+    """
+    PASS = 'pass'
+    FAIL = 'fail'
+    ERROR = 'error'
+    SKIP = 'skip'
+
+    FAILING_STATUSES = frozenset([FAIL, ERROR])
+
+    # The description `unittest` gives an error raised by a class or module fixture, such as
+    # `setUpClass (tests.TestExample)`, naming the class or module it covers.
+    FIXTURE_DESCRIPTION_REGEX = re.compile(r'^\w+ \((?P<name>[\w.]+)\)$')
+
+    def __init__(self, stream, baseline=None):
+        """ Initializes the `UnittestResultCollector` object.
+
+        :param stream: The file object to write the `unittest` output to.
+        :type stream: file
+        :param baseline: A mapping of test ids to their `TestOutcome` in the baseline run, or `None` if there is none
+            (default: None).
+        :type baseline: dict
+        """
+        super(UnittestResultCollector, self).__init__(unittest.runner._WritelnDecorator(stream), True, 1)
+        self.outcomes = OrderedDict()
+        self.stopped_early = None
+        self._baseline = baseline
+        self._baseline_failing_tests = UnittestResultCollector.get_failing_tests(baseline or {})
+        self._test_ids = []
+        self._start_time = None
+
+    @staticmethod
+    def get_failing_tests(outcomes):
+        """ Returns the ids of the tests failing in the given outcomes.
+
+        :param outcomes: A mapping of test ids to their `TestOutcome`.
+        :type outcomes: dict
+
+        :return: The ids of the tests that failed or raised an error.
+        :rtype: set
+        """
+        return set(
+            test_id for test_id, outcome in outcomes.iteritems()
+            if outcome.status in UnittestResultCollector.FAILING_STATUSES
+        )
+
+    @staticmethod
+    def get_num_failing_tests(outcomes):
+        """ Returns the number of tests failing in the given outcomes.
+
+        :param outcomes: A mapping of test ids to their `TestOutcome`, or `None` if the tests failed to load.
+        :type outcomes: dict
+
+        :return: The number of tests that failed or raised an error, or `None` if the tests failed to load.
+        :rtype: int
+        """
+        return None if outcomes is None else len(UnittestResultCollector.get_failing_tests(outcomes))
+
+    @staticmethod
+    def _is_passing(outcomes, test_id):
+        """ Returns whether the given test passed in the given outcomes.
+
+        :param outcomes: A mapping of test ids to their `TestOutcome`.
+        :type outcomes: dict
+        :param test_id: The id of the test.
+        :type test_id: str
+
+        :return: Whether the test ran and passed.
+        :rtype: bool
+        """
+        return test_id in outcomes and outcomes[test_id].status == UnittestResultCollector.PASS
+
+    @staticmethod
+    def get_changes(baseline, outcomes):
+        """ Returns the tests the given outcomes fixed and broke relative to the given baseline.
+
+        :param baseline: A mapping of test ids to their `TestOutcome` in the baseline run, or `None` if the tests
+            failed to load.
+        :type baseline: dict
+        :param outcomes: A mapping of test ids to their `TestOutcome`, or `None` if the tests failed to load.
+        :type outcomes: dict
+
+        :return: The sorted ids of the tests passing now but not in the baseline, and of those passing in the baseline
+            but not now, including those that did not run.
+        :rtype: tuple
+        """
+        baseline, outcomes = baseline or {}, outcomes or {}
+        is_passing = UnittestResultCollector._is_passing
+        fixed = [test_id for test_id in outcomes if is_passing(outcomes, test_id) and not is_passing(baseline, test_id)]
+        broken = [
+            test_id for test_id in baseline if is_passing(baseline, test_id) and not is_passing(outcomes, test_id)
+        ]
+        return sorted(fixed), sorted(broken)
+
+    @staticmethod
+    def is_improvement(baseline, outcomes):
+        """ Returns whether the given outcomes fix a test without breaking one relative to the given baseline.
+
+        :param baseline: A mapping of test ids to their `TestOutcome` in the baseline run, or `None` if the tests
+            failed to load.
+        :type baseline: dict
+        :param outcomes: A mapping of test ids to their `TestOutcome`, or `None` if the tests failed to load.
+        :type outcomes: dict
+
+        :return: Whether the outcomes fix a test without breaking one.
+        :rtype: bool
+        """
+        if outcomes is None:
+            return False
+        fixed, broken = UnittestResultCollector.get_changes(baseline, outcomes)
+        return bool(fixed) and not broken
+
+    def _record(self, test_id, status, duration):
+        """ Records the outcome of the given test, stopping the run if it can no longer improve on the baseline.
+
+        :param test_id: The id of the test that ran.
+        :type test_id: str
+        :param status: The status of the test.
+        :type status: str
+        :param duration: The number of seconds the test took.
+        :type duration: float
+        """
+        self.outcomes[test_id] = TestOutcome(status, duration)
+        if self._baseline is None or self.stopped_early is not None:
+            return
+        baseline_outcome = self._baseline.get(test_id)
+        if status in UnittestResultCollector.FAILING_STATUSES and baseline_outcome is not None and \
+                baseline_outcome.status == UnittestResultCollector.PASS:
+            self.stopped_early = 'Broke %s' % test_id
+        elif self._baseline_failing_tests <= UnittestResultCollector.get_failing_tests(self.outcomes):
+            self.stopped_early = 'Fixed no test failing before'
+        if self.stopped_early is not None:
+            self.stop()
+
+    def _record_test(self, test, status):
+        """ Records the outcome of the given test, timed from its start.
+
+        :param test: The test that ran.
+        :type test: unittest.TestCase
+        :param status: The status of the test.
+        :type status: str
+        """
+        self._record(test.id(), status, time.time() - self._start_time)
+
+    def _record_fixture_error(self, fixture):
+        """ Records an error of every test covered by the given failed class or module fixture.
+
+        :param fixture: The placeholder `unittest` reports the fixture's error against.
+        :type fixture: unittest.suite._ErrorHolder
+        """
+        match = UnittestResultCollector.FIXTURE_DESCRIPTION_REGEX.match(fixture.id())
+        prefix = match.group('name') + '.' if match is not None else None
+        test_ids = [test_id for test_id in self._test_ids if prefix is not None and test_id.startswith(prefix)]
+        for test_id in test_ids or [fixture.id()]:
+            self._record(test_id, UnittestResultCollector.ERROR, 0.0)
+
+    def startTest(self, test):
+        self._start_time = time.time()
+        super(UnittestResultCollector, self).startTest(test)
+
+    def addSuccess(self, test):
+        super(UnittestResultCollector, self).addSuccess(test)
+        self._record_test(test, UnittestResultCollector.PASS)
+
+    def addFailure(self, test, err):
+        super(UnittestResultCollector, self).addFailure(test, err)
+        self._record_test(test, UnittestResultCollector.FAIL)
+
+    def addError(self, test, err):
+        super(UnittestResultCollector, self).addError(test, err)
+        if isinstance(test, unittest.TestCase):
+            self._record_test(test, UnittestResultCollector.ERROR)
+        else:
+            self._record_fixture_error(test)
+
+    def addSkip(self, test, reason):
+        super(UnittestResultCollector, self).addSkip(test, reason)
+        self._record_test(test, UnittestResultCollector.SKIP)
+
+    def addExpectedFailure(self, test, err):
+        super(UnittestResultCollector, self).addExpectedFailure(test, err)
+        self._record_test(test, UnittestResultCollector.PASS)
+
+    def addUnexpectedSuccess(self, test):
+        super(UnittestResultCollector, self).addUnexpectedSuccess(test)
+        self._record_test(test, UnittestResultCollector.FAIL)
+
+    @staticmethod
+    def _iter_tests(suite):
+        """ Yields the tests of the given, possibly nested, test suite.
+
+        :param suite: The test suite.
+        :type suite: unittest.TestSuite
+
+        :return: An iterator over the `unittest.TestCase` objects of the suite.
+        :rtype: iterator
+        """
+        for test in suite:
+            if isinstance(test, unittest.TestSuite):
+                for nested_test in UnittestResultCollector._iter_tests(test):
+                    yield nested_test
+            else:
+                yield test
+
+    def run_suite(self, suite):
+        """ Runs the given test suite, writing the `unittest` output and a summary of the outcomes to the stream.
+
+        :param suite: The test suite to run.
+        :type suite: unittest.TestSuite
+        """
+        self._test_ids = [test.id() for test in UnittestResultCollector._iter_tests(suite)]
+        start_time = time.time()
+        suite(self)
+        self.printErrors()
+        self.stream.writeln(self.separator2)
+        self.stream.writeln('Ran %d tests in %.3fs' % (self.testsRun, time.time() - start_time))
+        num_failed = UnittestResultCollector.get_num_failing_tests(self.outcomes)
+        self.stream.writeln('FAILED (%d of %d)' % (num_failed, len(self.outcomes)) if num_failed else 'OK')
+        if self.stopped_early is not None:
+            self.stream.writeln('Stopped early: %s' % self.stopped_early)
@@ -1 +1,8 @@
 # -*- coding: utf-8 -*-
+
+import os
+import sys
+
+
+# The modules of `code_complete` import each other by their bare names, as when run from within it.
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'code_complete'))
@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+
+import unittest
+
+from analysis_budget import AnalysisBudget
+from analysis_budget import AnalysisBudgetExceededError
+
+
+def make_budgets(task_wall_time=60):
+    """ Returns a snippet budget and the task budget it is charged to. """
+    task_budget = AnalysisBudget(AnalysisBudget.TASK_BUDGET_NAME, task_wall_time, 30, 100)
+    snippet_budget = AnalysisBudget(AnalysisBudget.SNIPPET_BUDGET_NAME, 10, 5, 4, parent=task_budget)
+    return snippet_budget, task_budget
+
+
+class AnalysisBudgetTest(unittest.TestCase):
+
+    def assertExceeded(self, budget, timeout, name, reason):
+        with self.assertRaises(AnalysisBudgetExceededError) as context:
+            budget.start_execution(timeout)
+        self.assertEqual((context.exception.budget.name, context.exception.reason), (name, reason))
+
+    def test_timed_out_execution_uses_up_budget(self):
+        snippet_budget, task_budget = make_budgets()
+        snippet_budget.start_execution(1)
+        with self.assertRaises(AnalysisBudgetExceededError) as context:
+            snippet_budget.charge(1, 0.5, timed_out=True)
+        self.assertEqual(context.exception.reason, AnalysisBudget.WALL_TIME_REASON)
+        self.assertExceeded(snippet_budget, 1, AnalysisBudget.SNIPPET_BUDGET_NAME, AnalysisBudget.WALL_TIME_REASON)
+        # The task only pays for the time the snippet took.
+        self.assertEqual(task_budget.start_execution(1), 1)
+
+    def test_memory_exceeded_execution_uses_up_budget(self):
+        snippet_budget, _ = make_budgets()
+        with self.assertRaises(AnalysisBudgetExceededError) as context:
+            snippet_budget.charge(0.1, 0.1, memory_exceeded=True)
+        self.assertEqual(context.exception.reason, AnalysisBudget.MEMORY_REASON)
+
+    def test_used_up_parent_stops_child(self):
+        snippet_budget, task_budget = make_budgets(task_wall_time=2)
+        other_snippet_budget = AnalysisBudget(AnalysisBudget.SNIPPET_BUDGET_NAME, 10, 5, 4, parent=task_budget)
+        snippet_budget.charge(1, 0.1)
+        with self.assertRaises(AnalysisBudgetExceededError):
+            other_snippet_budget.charge(1.5, 0.1)
+        self.assertExceeded(snippet_budget, 1, AnalysisBudget.TASK_BUDGET_NAME, AnalysisBudget.WALL_TIME_REASON)
+
+    def test_executions_are_counted(self):
+        snippet_budget, _ = make_budgets()
+        for _ in xrange(4):
+            snippet_budget.start_execution(1)
+            snippet_budget.charge(0.01, 0.01)
+        self.assertExceeded(snippet_budget, 1, AnalysisBudget.SNIPPET_BUDGET_NAME, AnalysisBudget.EXECUTIONS_REASON)
+
+    def test_timeout_is_clamped_to_time_left(self):
+        snippet_budget, _ = make_budgets(task_wall_time=8)
+        self.assertEqual(snippet_budget.start_execution(3), 3)
+        snippet_budget.charge(2.5, 1)
+        # The snippet has 7.5s of wall time left, but only 4s of CPU time.
+        self.assertEqual(snippet_budget.start_execution(30), 4)
+        snippet_budget.charge(0.5, 0.5)
+        # The task has 5s of wall time left, and the snippet 3.5s of CPU time.
+        self.assertEqual(snippet_budget.start_execution(30), 3.5)
+        snippet_budget.charge(3, 0.5)
+        # The task has 2s of wall time left.
+        self.assertEqual(snippet_budget.start_execution(30), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
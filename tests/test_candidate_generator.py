@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+
+import itertools
+import random
+import unittest
+
+from candidate_generator import CandidateGenerator
+
+
+# The number of random score matrices to compare against brute force.
+NUM_CASES = 2000
+
+MAX_ROWS = 5
+MAX_COLUMNS = 5
+
+
+def make_scores(rng):
+    """ Returns a random score matrix, where some assignments are not allowed and many scores tie. """
+    num_rows, num_columns = rng.randint(0, MAX_ROWS), rng.randint(0, MAX_COLUMNS)
+    return [
+        [None if rng.random() < 0.3 else float(rng.randint(0, 3)) for _ in xrange(num_columns)]
+        for _ in xrange(num_rows)
+    ]
+
+
+def get_all_assignments(scores):
+    """ Returns a mapping of every allowed assignment, by brute force, to its total score. """
+    num_columns = len(scores[0]) if scores else 0
+    assignments = {}
+    for permutation in itertools.permutations(xrange(num_columns), len(scores)):
+        row_scores = [scores[row][column] for row, column in enumerate(permutation)]
+        if None not in row_scores:
+            assignments[permutation] = sum(row_scores)
+    return assignments
+
+
+def can_complete_by_brute_force(scores, columns):
+    """ Returns whether some permutation of the columns left gives every row left an allowed column. """
+    rows_left = scores[len(columns):]
+    columns_left = [column for column in xrange(len(scores[0])) if column not in columns]
+    return any(
+        all(row[column] is not None for row, column in zip(rows_left, permutation))
+        for permutation in itertools.permutations(columns_left, len(rows_left))
+    )
+
+
+class CandidateGeneratorAssignmentTest(unittest.TestCase):
+
+    def test_matches_brute_force(self):
+        rng = random.Random(0)
+        for _ in xrange(NUM_CASES):
+            scores = make_scores(rng)
+            expected = get_all_assignments(scores)
+            assignments = list(CandidateGenerator.iter_best_assignments(scores))
+            self.assertEqual(dict((columns, score) for score, columns in assignments), expected, scores)
+            self.assertEqual(len(assignments), len(expected), scores)
+            totals = [score for score, _ in assignments]
+            self.assertEqual(totals, sorted(totals, reverse=True), scores)
+
+    def test_feasibility_matches_brute_force(self):
+        rng = random.Random(1)
+        for _ in xrange(NUM_CASES):
+            scores = make_scores(rng)
+            self.assertEqual(CandidateGenerator.can_complete_assignment(scores), bool(get_all_assignments(scores)),
+                             scores)
+            if not scores or not scores[0]:
+                continue
+            # Some distinct columns assigned to the leading rows.
+            num_assigned = rng.randint(1, min(len(scores), len(scores[0])))
+            columns = tuple(rng.sample(xrange(len(scores[0])), num_assigned))
+            self.assertEqual(CandidateGenerator.can_complete_assignment(scores, columns),
+                             can_complete_by_brute_force(scores, columns), (scores, columns))
+
+    def test_best_assignment_first(self):
+        scores = [[1.0, 3.0, None], [2.0, 3.0, 0.0]]
+        self.assertEqual(list(CandidateGenerator.iter_best_assignments(scores)), [
+            (5.0, (1, 0)),
+            (4.0, (0, 1)),
+            (3.0, (1, 2)),
+            (1.0, (0, 2)),
+        ])
+
+    def test_no_assignment(self):
+        self.assertEqual(list(CandidateGenerator.iter_best_assignments([[1.0, None], [2.0, None]])), [])
+        self.assertEqual(list(CandidateGenerator.iter_best_assignments([[None, None]])), [])
+        self.assertEqual(list(CandidateGenerator.iter_best_assignments([])), [(0.0, ())])
+
+
+if __name__ == '__main__':
+    unittest.main()
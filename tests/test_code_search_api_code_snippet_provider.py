@@ -0,0 +1,165 @@
+# -*- coding: utf-8 -*-
+
+import BaseHTTPServer
+import json
+import os
+import shutil
+import socket
+import SocketServer
+import sys
+import tempfile
+import threading
+import unittest
+
+from code_snippet_providers import code_search_api_code_snippet_provider
+from code_snippet_providers.code_search_api_code_snippet_provider import CodeSearchApiCodeSnippetProvider
+from snippet_cache import SnippetCache
+
+
+RAW_PATH = '/raw/mathops.py'
+
+# The head of the raw file, where the fragment on line 7 sits in `add_two_numbers`.
+RAW_FILE_HEAD = (
+    'import os\n'
+    '\n'
+    '\n'
+    'def add_two_numbers(a, b):\n'
+    '    # Adds the numbers.\n'
+    '    total = a + b\n'
+    '    return total\n'
+    '\n'
+    '\n'
+    'def multiply(a, b):\n'
+    '    return a * b\n'
+)
+FRAGMENT_LINE_START = 7
+
+# The raw file goes on far longer than the socket buffers between the server and the provider can hold, so the server
+# only finishes sending it if the provider reads it to the end.
+RAW_FILE_TAIL_LINE = 'x = 1\n'
+RAW_FILE_TAIL_SIZE = 64 * 1024 * 1024
+RAW_FILE_CHUNK_SIZE = 64 * 1024
+
+# The number of seconds to wait on the server to stop sending the raw file.
+RAW_FILE_TIMEOUT = 10
+
+
+class _StandInRequestHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+    """ Answers searches with the fixture JSON and serves the raw file it points at. """
+
+    def do_GET(self):
+        if self.path.startswith(CodeSearchApiCodeSnippetProvider.SEARCH_PATH):
+            self._send(json.dumps(self.server.search_response))
+        elif self.path == RAW_PATH:
+            self._send_raw_file()
+        else:
+            self.send_error(404)
+
+    def _send(self, body):
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_raw_file(self):
+        tail_chunk = RAW_FILE_TAIL_LINE * (RAW_FILE_CHUNK_SIZE / len(RAW_FILE_TAIL_LINE))
+        num_tail_chunks = RAW_FILE_TAIL_SIZE / len(tail_chunk)
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(RAW_FILE_HEAD) + num_tail_chunks * len(tail_chunk)))
+        self.end_headers()
+        try:
+            self.wfile.write(RAW_FILE_HEAD)
+            for _ in xrange(num_tail_chunks):
+                self.wfile.write(tail_chunk)
+                self.server.num_tail_bytes_sent += len(tail_chunk)
+            self.server.raw_file_finished = True
+        except socket.error:
+            # The provider closed the connection.
+            pass
+        finally:
+            self.server.raw_file_done.set()
+
+    def log_message(self, format, *args):
+        pass
+
+
+class _StandInServer(SocketServer.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+    """ Stands in for the code search API and the host of the raw files it points at. """
+    daemon_threads = True
+
+    def __init__(self):
+        BaseHTTPServer.HTTPServer.__init__(self, ('127.0.0.1', 0), _StandInRequestHandler)
+        self.search_response = None
+        self.num_tail_bytes_sent = 0
+        self.raw_file_finished = False
+        self.raw_file_done = threading.Event()
+
+    def handle_error(self, request, client_address):
+        # Sending the rest of the raw file after the provider closed the connection fails, as expected.
+        if not issubclass(sys.exc_info()[0], socket.error):
+            BaseHTTPServer.HTTPServer.handle_error(self, request, client_address)
+
+    def get_domain(self):
+        return '%s:%d' % self.server_address[:2]
+
+
+class CodeSearchApiCodeSnippetProviderTest(unittest.TestCase):
+
+    def setUp(self):
+        self._server = _StandInServer()
+        thread = threading.Thread(target=self._server.serve_forever)
+        thread.daemon = True
+        thread.start()
+        self._cache_dir = tempfile.mkdtemp()
+        self._shared_cache = SnippetCache._shared_cache
+        SnippetCache._shared_cache = SnippetCache(path=os.path.join(self._cache_dir, 'cache.db'))
+        self._settings = (
+            code_search_api_code_snippet_provider.CODE_SEARCH_API_DOMAIN,
+            code_search_api_code_snippet_provider.CODE_SEARCH_API_SCHEME,
+        )
+        code_search_api_code_snippet_provider.CODE_SEARCH_API_DOMAIN = self._server.get_domain()
+        code_search_api_code_snippet_provider.CODE_SEARCH_API_SCHEME = 'http'
+
+    def tearDown(self):
+        (
+            code_search_api_code_snippet_provider.CODE_SEARCH_API_DOMAIN,
+            code_search_api_code_snippet_provider.CODE_SEARCH_API_SCHEME,
+        ) = self._settings
+        SnippetCache._shared_cache = self._shared_cache
+        shutil.rmtree(self._cache_dir)
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _get_code_snippets(self, search_results):
+        self._server.search_response = {CodeSearchApiCodeSnippetProvider.RESULTS_KEY: search_results}
+        return CodeSearchApiCodeSnippetProvider('add two numbers', 'python').get_code_snippets()
+
+    def _make_search_result(self, raw_url=True):
+        search_result = {
+            'fragment': '    return total',
+            'line_start': FRAGMENT_LINE_START,
+            'line_end': FRAGMENT_LINE_START,
+        }
+        if raw_url:
+            search_result['raw_url'] = 'http://%s%s' % (self._server.get_domain(), RAW_PATH)
+        return search_result
+
+    def test_returns_only_the_enclosing_function(self):
+        code_snippets = self._get_code_snippets([self._make_search_result()])
+        self.assertEqual(code_snippets, ['def add_two_numbers(a, b):\n    # Adds the numbers.\n'
+                                         '    total = a + b\n    return total\n'])
+
+    def test_stops_reading_after_the_enclosing_function(self):
+        self._get_code_snippets([self._make_search_result()])
+        self.assertTrue(self._server.raw_file_done.wait(RAW_FILE_TIMEOUT))
+        self.assertFalse(self._server.raw_file_finished)
+        self.assertLess(self._server.num_tail_bytes_sent, RAW_FILE_TAIL_SIZE / 2)
+
+    def test_skips_search_results_without_raw_url(self):
+        code_snippets = self._get_code_snippets([self._make_search_result(raw_url=False), self._make_search_result()])
+        self.assertEqual(len(code_snippets), 1)
+        self.assertTrue(code_snippets[0].startswith('def add_two_numbers(a, b):\n'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+
+import os
+import signal
+import time
+import unittest
+
+from analysis_budget import AnalysisBudget
+from analysis_budget import AnalysisBudgetExceededError
+from execution_service import ExecutionService
+
+
+# The number of seconds a single piece of code is given to run.
+TIMEOUT = 1
+
+# The number of seconds to wait on a process to exit.
+EXIT_TIMEOUT = 5
+
+
+def make_budget():
+    """ Returns a budget roomy enough for any single run of the tests. """
+    return AnalysisBudget('test', 60, 60, 100)
+
+
+def is_running(pid):
+    """ Returns whether the process with the given id exists and is not a zombie. """
+    try:
+        with open('/proc/%d/stat' % pid) as f:
+            stat = f.read()
+    except IOError:
+        return False
+    return stat[stat.rindex(')') + 2] != 'Z'
+
+
+class ExecutionServiceTest(unittest.TestCase):
+
+    def setUp(self):
+        self.service = ExecutionService(num_workers=1, timeout=TIMEOUT, preloaded_modules=[])
+
+    def tearDown(self):
+        self.service.shutdown()
+
+    def assertExceeds(self, code, reason):
+        budget = make_budget()
+        with self.assertRaises(AnalysisBudgetExceededError) as context:
+            self.service.execute(code, budget=budget)
+        self.assertEqual(context.exception.reason, reason)
+
+    def test_returns_printed_output(self):
+        self.assertEqual(self.service.execute('print x * 2', {'x': 21}), '42\n')
+
+    def test_failing_code_returns_none(self):
+        self.assertIsNone(self.service.execute('raise ValueError()'))
+        self.assertIsNone(self.service.execute('import sys\nsys.exit(0)'))
+
+    def test_infinite_loop_times_out(self):
+        start = time.time()
+        self.assertExceeds('while True:\n    pass', AnalysisBudget.WALL_TIME_REASON)
+        self.assertLess(time.time() - start, TIMEOUT + EXIT_TIMEOUT)
+        self.assertEqual(self.service.execute('print 1'), '1\n')
+
+    def test_memory_exceeded(self):
+        self.assertExceeds('x = [0] * 10 ** 10', AnalysisBudget.MEMORY_REASON)
+        self.assertEqual(self.service.execute('print 1'), '1\n')
+
+    def test_dead_worker_is_replaced(self):
+        worker, = self.service._workers
+        os.kill(worker._pid, signal.SIGKILL)
+        self.assertExceeds('print 1', AnalysisBudget.WALL_TIME_REASON)
+        new_worker, = self.service._workers
+        self.assertNotEqual(new_worker._pid, worker._pid)
+        self.assertEqual(self.service.execute('print 1'), '1\n')
+
+    def test_shutdown_leaves_no_workers(self):
+        service = ExecutionService(num_workers=2, timeout=TIMEOUT, preloaded_modules=[])
+        pids = [worker._pid for worker in service._workers] + [service._spawner._process.pid]
+        self.assertEqual(service.execute('print 1'), '1\n')
+        service.shutdown()
+        deadline = time.time() + EXIT_TIMEOUT
+        while any(is_running(pid) for pid in pids) and time.time() < deadline:
+            time.sleep(0.01)
+        self.assertEqual([pid for pid in pids if is_running(pid)], [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,152 @@
+# -*- coding: utf-8 -*-
+
+import glob
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+from fork_test_runner import ForkTestRunner
+from unittest_result_collector import UnittestResultCollector
+
+
+TESTS = '''import unittest
+
+from example import add
+
+
+class TestExample(unittest.TestCase):
+
+    def test_add(self):
+        self.assertEqual(add(1, 2), 3)
+
+    def test_add_negative(self):
+        self.assertEqual(add(-1, -2), -3)
+'''
+
+GOOD_CODE = 'def add(a, b):\n    return a + b\n'
+HALF_GOOD_CODE = 'def add(a, b):\n    return abs(a) + abs(b)\n'
+BAD_CODE = 'def add(a, b):\n    return a - b\n'
+LOOPING_CODE = 'def add(a, b):\n    while True:\n        pass\n'
+BROKEN_CODE = 'def add(a, b:\n    return a + b\n'
+# Takes half the timeout to load, so the candidates after it start well after those before it.
+SLOW_GOOD_CODE = 'import time\n\ntime.sleep(0.5)\n\n\n' + GOOD_CODE
+
+TEST_ADD_ID = 'test.TestExample.test_add'
+TEST_ADD_NEGATIVE_ID = 'test.TestExample.test_add_negative'
+
+# The number of seconds the tests are given to run against a single candidate.
+TIMEOUT = 1
+
+
+def get_child_pids(pid):
+    """ Returns the ids of the processes, zombies included, whose parent is the given process. """
+    child_pids = []
+    for name in os.listdir('/proc'):
+        if not name.isdigit():
+            continue
+        try:
+            with open(os.path.join('/proc', name, 'stat')) as f:
+                stat = f.read()
+        except IOError:
+            continue
+        # The command name in parentheses may hold spaces, so the fields are counted from its end.
+        if int(stat[stat.rindex(')') + 2:].split()[1]) == pid:
+            child_pids.append(int(name))
+    return child_pids
+
+
+class ForkTestRunnerTestCase(unittest.TestCase):
+    """ Runs a `ForkTestRunner` on a tiny code file and its tests in a temporary directory. """
+
+    def setUp(self):
+        self.tests_dir = tempfile.mkdtemp()
+        self.code_f = os.path.join(self.tests_dir, 'example.py')
+        self.tests_f = os.path.join(self.tests_dir, 'test.py')
+        with open(self.code_f, 'w') as f:
+            f.write(BAD_CODE)
+        with open(self.tests_f, 'w') as f:
+            f.write(TESTS)
+        self.runner = ForkTestRunner(self.code_f, self.tests_f, TIMEOUT)
+
+    def tearDown(self):
+        self.runner.stop()
+        shutil.rmtree(self.tests_dir)
+
+    def assertNoChildren(self):
+        self.assertEqual(get_child_pids(self.runner._process.pid), [])
+
+
+class ForkTestRunnerTest(ForkTestRunnerTestCase):
+
+    def test_reports_outcome_of_every_test(self):
+        outcomes, output = self.runner.run(HALF_GOOD_CODE)
+        self.assertEqual(
+            [(test_id, outcome.status) for test_id, outcome in outcomes.items()],
+            [(TEST_ADD_ID, UnittestResultCollector.PASS), (TEST_ADD_NEGATIVE_ID, UnittestResultCollector.FAIL)],
+        )
+        self.assertIn('test_add_negative', output)
+        self.assertNoChildren()
+
+    def test_looping_candidate_times_out(self):
+        self.assertEqual(self.runner.run(LOOPING_CODE), (None, 'Timed out after %ds' % TIMEOUT))
+        self.assertNoChildren()
+        outcomes, _ = self.runner.run(GOOD_CODE)
+        self.assertEqual([outcome.status for outcome in outcomes.values()], [UnittestResultCollector.PASS] * 2)
+
+    def test_broken_candidate_fails_to_load(self):
+        self.assertEqual(self.runner.run(BROKEN_CODE), (None, 'Failed to load the code or the tests'))
+        self.assertNoChildren()
+
+    def test_code_file_is_not_rewritten(self):
+        self.runner.run(GOOD_CODE)
+        with open(self.code_f) as f:
+            self.assertEqual(f.read(), BAD_CODE)
+
+
+class ForkTestRunnerParallelTest(ForkTestRunnerTestCase):
+
+    def setUp(self):
+        # The server makes the workspaces in the temporary directory it inherits, so they can be checked on.
+        self.temp_dir = tempfile.mkdtemp()
+        self.saved_temp_dir, tempfile.tempdir = tempfile.tempdir, self.temp_dir
+        try:
+            ForkTestRunnerTestCase.setUp(self)
+        finally:
+            tempfile.tempdir = self.saved_temp_dir
+        self.baseline, _ = self.runner.run(BAD_CODE)
+
+    def tearDown(self):
+        ForkTestRunnerTestCase.tearDown(self)
+        shutil.rmtree(self.temp_dir)
+
+    def assertNoWorkspaces(self):
+        self.assertEqual(glob.glob(os.path.join(self.temp_dir, ForkTestRunner.WORKSPACE_PREFIX + '*')), [])
+
+    def test_winner_waits_on_better_ranked_candidates(self):
+        start = time.time()
+        winner, results = self.runner.run_parallel([LOOPING_CODE, GOOD_CODE, GOOD_CODE], self.baseline, 3)
+        self.assertGreaterEqual(time.time() - start, TIMEOUT)
+        self.assertEqual(winner, 1)
+        self.assertEqual(results[0], (None, 'Timed out after %ds' % TIMEOUT))
+        self.assertEqual([outcome.status for outcome in results[1][0].values()], [UnittestResultCollector.PASS] * 2)
+        self.assertNoChildren()
+        self.assertNoWorkspaces()
+
+    def test_worse_ranked_candidates_are_cancelled_or_never_started(self):
+        winner, results = self.runner.run_parallel(
+            [LOOPING_CODE, SLOW_GOOD_CODE, LOOPING_CODE, GOOD_CODE],
+            self.baseline,
+            2,
+        )
+        self.assertEqual(winner, 1)
+        self.assertEqual(results[0], (None, 'Timed out after %ds' % TIMEOUT))
+        self.assertEqual(results[2], (None, ForkTestRunner.CANCELLED))
+        self.assertIsNone(results[3])
+        self.assertNoChildren()
+        self.assertNoWorkspaces()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from code_snippet_providers.utils.inverted_index import InvertedIndex
+
+
+SOURCE = '''def add_two_numbers(a, b):
+    return a + b
+
+
+def sort_list(my_list):
+    return sorted(my_list)
+'''
+
+# Files that cannot be unpickled, each failing in its own way.
+CORRUPT_PICKLES = [
+    '',
+    'not a pickle',
+    'cno_such_module\nInvertedIndex\n.',
+    'cos\nno_such_attribute\n.',
+    'I12x\n.',
+    'N)a.',
+    'cos\ngetcwd\n(I1\ntR.',
+]
+
+
+class InvertedIndexTest(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.root = os.path.join(self.temp_dir, 'corpus')
+        os.mkdir(self.root)
+        with open(os.path.join(self.root, 'mathops.py'), 'w') as f:
+            f.write(SOURCE)
+        self.index_path = os.path.join(self.temp_dir, 'index', 'index.pickle')
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def _save_index(self):
+        index = InvertedIndex(self.root)
+        index.update()
+        index.save(self.index_path)
+        return index
+
+    def assertEmpty(self, index):
+        self.assertEqual(index.search('add two numbers', 10), [])
+        self.assertTrue(index.update())
+
+    def test_search(self):
+        index = InvertedIndex(self.root)
+        self.assertTrue(index.update())
+        self.assertFalse(index.update())
+        self.assertEqual(index.search('sort a list', 1), ['def sort_list(my_list):\n    return sorted(my_list)\n'])
+
+    def test_load_saved_index(self):
+        self._save_index()
+        index = InvertedIndex.load(self.index_path, self.root)
+        self.assertFalse(index.update())
+        self.assertEqual(index.search('add two numbers', 10), ['def add_two_numbers(a, b):\n    return a + b\n'])
+
+    def test_load_missing_index(self):
+        self.assertEmpty(InvertedIndex.load(self.index_path, self.root))
+
+    def test_load_index_of_other_root(self):
+        self._save_index()
+        self.assertEmpty(InvertedIndex.load(self.index_path, self.temp_dir))
+
+    def test_load_index_of_other_format_version(self):
+        index = self._save_index()
+        del index._format_version
+        index.save(self.index_path)
+        self.assertEmpty(InvertedIndex.load(self.index_path, self.root))
+        index._format_version = InvertedIndex.FORMAT_VERSION - 1
+        index.save(self.index_path)
+        self.assertEmpty(InvertedIndex.load(self.index_path, self.root))
+
+    def test_load_corrupt_index(self):
+        os.mkdir(os.path.dirname(self.index_path))
+        for data in CORRUPT_PICKLES:
+            with open(self.index_path, 'wb') as f:
+                f.write(data)
+            self.assertEmpty(InvertedIndex.load(self.index_path, self.root))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+
+import unittest
+
+from fuzzywuzzy import process
+
+from name_similarity_ranker import NameSimilarityRanker
+
+
+# Functions a snippet search may turn up for the tasks of the examples.
+FUNCTION_NAMES = [
+    'add', 'add_two_numbers', 'sum_numbers', 'multiply', 'multiply_numbers', 'product', 'subtract', 'difference',
+    'divide', 'quotient', 'read_lines', 'readFileLines', 'open_file', 'write_file', 'strings_to_ints',
+    'convert_to_int', 'parse_list', 'sort_list', 'sorted_copy', 'quick_sort', 'median', 'get_median', 'mean',
+    'average', 'reverse_string', 'main', 'helper', 'get_list', 'list_to_string', 'count_lines',
+]
+
+# The task descriptions of the examples, with the functions that fit them.
+TASKS = [
+    ('add two numbers', ['add', 'add_two_numbers', 'sum_numbers']),
+    ('multiply two numbers', ['multiply', 'multiply_numbers', 'product']),
+    ('subtract two numbers', ['subtract', 'difference']),
+    ('divide two numbers', ['divide', 'quotient']),
+    ('open file and read and return lines', ['read_lines', 'readFileLines']),
+    ('open file and read lines', ['read_lines', 'readFileLines']),
+    ('convert list of strings to list of ints', ['strings_to_ints', 'convert_to_int']),
+    ('function to sort a list', ['sort_list', 'sorted_copy', 'quick_sort']),
+    ('get median of list', ['median', 'get_median']),
+    ('get mean of list', ['mean', 'average']),
+]
+
+
+def _get_first_fitting_rank(ranked_names, fitting_names):
+    return min(ranked_names.index(name) for name in fitting_names)
+
+
+class NameSimilarityRankerTest(unittest.TestCase):
+
+    def _rank(self, task_description):
+        ranker = NameSimilarityRanker(task_description)
+        return [name for name, _ in ranker.rank([(name, '') for name in FUNCTION_NAMES])]
+
+    def test_orders_at_least_as_well_as_fuzzywuzzy(self):
+        ranker_reciprocal_ranks, fuzzywuzzy_reciprocal_ranks = [], []
+        for task_description, fitting_names in TASKS:
+            ranker_reciprocal_ranks.append(1.0 / (1 + _get_first_fitting_rank(
+                self._rank(task_description),
+                fitting_names,
+            )))
+            fuzzywuzzy_reciprocal_ranks.append(1.0 / (1 + _get_first_fitting_rank(
+                [name for name, _ in process.extract(task_description, FUNCTION_NAMES, limit=len(FUNCTION_NAMES))],
+                fitting_names,
+            )))
+        self.assertGreaterEqual(sum(ranker_reciprocal_ranks), sum(fuzzywuzzy_reciprocal_ranks))
+
+    def test_ranks_a_fitting_function_near_the_top(self):
+        for task_description, fitting_names in TASKS:
+            self.assertLess(_get_first_fitting_rank(self._rank(task_description), fitting_names), 2, task_description)
+
+    def test_docstring_breaks_ties(self):
+        ranker = NameSimilarityRanker('get median of list')
+        ranked_names = [name for name, _ in ranker.rank([
+            ('compute', 'Returns the mean of the list.'),
+            ('calculate', 'Returns the median of the list.'),
+        ])]
+        self.assertEqual(ranked_names, ['calculate', 'compute'])
+
+
+if __name__ == '__main__':
+    unittest.main()
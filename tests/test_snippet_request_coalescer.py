@@ -0,0 +1,147 @@
+# -*- coding: utf-8 -*-
+
+import threading
+import time
+import unittest
+
+from snippet_request_coalescer import SnippetRequestCoalescer
+
+
+BUFFER_SIZE = 3
+
+# The number of seconds to wait on the fetch thread, and to give it to run ahead when it should not.
+WAIT_TIMEOUT = 5
+SETTLE_TIME = 0.1
+
+
+def wait_for(predicate):
+    """ Waits for the given predicate to hold, returning whether it did in time. """
+    deadline = time.time() + WAIT_TIMEOUT
+    while not predicate():
+        if time.time() > deadline:
+            return False
+        time.sleep(0.001)
+    return True
+
+
+class FakeCodeSnippets(object):
+    """ An endless iterator over numbered code snippets, counting how many were fetched.
+
+    :attr num_fetched: The number of code snippets fetched so far.
+    :type num_fetched: int
+    :attr closed: Set once the iterator is closed.
+    :type closed: threading.Event
+    """
+    def __init__(self, blocker=None):
+        self.num_fetched = 0
+        self.closed = threading.Event()
+        self._blocker = blocker
+
+    def __iter__(self):
+        return self
+
+    def next(self):
+        if self._blocker is not None:
+            self._blocker.wait()
+        self.num_fetched += 1
+        return 'snippet %d' % (self.num_fetched - 1)
+
+    def close(self):
+        self.closed.set()
+
+
+class SnippetRequestCoalescerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.blocker = None
+        self.sources = []
+        self.coalescer = SnippetRequestCoalescer(self._iter_code_snippets, BUFFER_SIZE)
+
+    def tearDown(self):
+        if self.blocker is not None:
+            self.blocker.set()
+
+    def _iter_code_snippets(self, task_description, priority):
+        source = FakeCodeSnippets(self.blocker)
+        self.sources.append(source)
+        return source
+
+    def assertFetches(self, source, num_fetched):
+        # One more is fetched than buffered, as the fetch holds it while paused.
+        self.assertTrue(wait_for(lambda: source.num_fetched >= num_fetched + 1))
+        time.sleep(SETTLE_TIME)
+        self.assertEqual(source.num_fetched, num_fetched + 1)
+
+    def test_fetch_pauses_ahead_of_slowest_subscription(self):
+        subscription = self.coalescer.iter_code_snippets('sort a list', 'python')
+        source, = self.sources
+        self.assertFetches(source, BUFFER_SIZE)
+        self.assertEqual([next(subscription) for _ in xrange(2)], ['snippet 0', 'snippet 1'])
+        self.assertFetches(source, BUFFER_SIZE + 2)
+
+    def test_subscription_replays_from_start(self):
+        subscription = self.coalescer.iter_code_snippets('sort a list', 'python')
+        source, = self.sources
+        self.assertEqual([next(subscription) for _ in xrange(2)], ['snippet 0', 'snippet 1'])
+        self.assertFetches(source, BUFFER_SIZE + 2)
+        other_subscription = self.coalescer.iter_code_snippets('Sort lists.', 'python')
+        self.assertEqual(len(self.sources), 1)
+        self.assertEqual(next(other_subscription), 'snippet 0')
+        # The new subscription is now the slowest, so the fetch stays paused until it catches up.
+        self.assertEqual([next(subscription) for _ in xrange(3)], ['snippet 2', 'snippet 3', 'snippet 4'])
+        self.assertFetches(source, BUFFER_SIZE + 2)
+        self.assertEqual([next(other_subscription) for _ in xrange(4)],
+                         ['snippet 1', 'snippet 2', 'snippet 3', 'snippet 4'])
+        self.assertFetches(source, BUFFER_SIZE + 5)
+
+    def test_closing_every_subscription_stops_fetch(self):
+        subscription = self.coalescer.iter_code_snippets('sort a list', 'python')
+        other_subscription = self.coalescer.iter_code_snippets('sort list', 'python')
+        source, = self.sources
+        snippet_request = self.coalescer._requests.values()[0]
+        self.assertFetches(source, BUFFER_SIZE)
+        subscription.close()
+        self.assertFalse(source.closed.wait(SETTLE_TIME))
+        other_subscription.close()
+        self.assertTrue(source.closed.wait(WAIT_TIMEOUT))
+        self.assertEqual(source.num_fetched, BUFFER_SIZE + 1)
+        # The released request drops its code snippets, and an equivalent request fetches them afresh.
+        self.assertEqual(snippet_request._code_snippets, [])
+        self.assertEqual(self.coalescer._requests, {})
+        self.assertEqual(next(self.coalescer.iter_code_snippets('sort a list', 'python')), 'snippet 0')
+        self.assertEqual(len(self.sources), 2)
+
+    def test_closing_from_another_thread_unblocks_next(self):
+        self.blocker = threading.Event()
+        subscription = self.coalescer.iter_code_snippets('sort a list', 'python')
+        results = []
+
+        def read():
+            results.append(list(subscription))
+        thread = threading.Thread(target=read)
+        thread.daemon = True
+        thread.start()
+        time.sleep(SETTLE_TIME)
+        self.assertTrue(thread.is_alive())
+        subscription.close()
+        thread.join(WAIT_TIMEOUT)
+        self.assertFalse(thread.is_alive())
+        self.assertEqual(results, [[]])
+        # The fetch stops as soon as its pending code snippet arrives.
+        self.blocker.set()
+        self.assertTrue(self.sources[0].closed.wait(WAIT_TIMEOUT))
+
+    def test_error_reaches_every_subscription(self):
+        def iter_code_snippets(task_description, priority):
+            yield 'snippet 0'
+            raise ValueError('search failed')
+        coalescer = SnippetRequestCoalescer(iter_code_snippets, BUFFER_SIZE)
+        subscription = coalescer.iter_code_snippets('sort a list', 'python')
+        other_subscription = coalescer.iter_code_snippets('sort list', 'python')
+        for each_subscription in [subscription, other_subscription]:
+            self.assertEqual(next(each_subscription), 'snippet 0')
+            self.assertRaises(ValueError, next, each_subscription)
+
+
+if __name__ == '__main__':
+    unittest.main()
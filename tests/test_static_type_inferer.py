@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+
+import unittest
+
+from static_type_inferer import StaticTypeInferer
+
+
+class StaticTypeInfererTest(unittest.TestCase):
+
+    def test_literals_and_builtins(self):
+        types = StaticTypeInferer(
+            'x = [1]\n'
+            'y = x + [2]\n'
+            'n = len(y)\n'
+            'for c in "ab":\n'
+            '    pass\n'
+            'with open("f") as f:\n'
+            '    lines = f.readlines()\n'
+        ).infer()
+        self.assertEqual(types['globals'], {
+            'x': 'list', 'y': 'list', 'n': 'int', 'c': 'str', 'f': 'file', 'lines': 'list',
+        })
+        self.assertEqual(types['unresolved'], set())
+
+    def test_unknown_value_is_unresolved(self):
+        types = StaticTypeInferer('x = foo()\ny = 1\n').infer()
+        self.assertEqual(types['globals'], {'y': 'int'})
+        self.assertEqual(types['unresolved'], {'x'})
+
+    def test_rebinding_to_different_type_is_unresolved(self):
+        types = StaticTypeInferer('x = 1\nx = "a"\n').infer()
+        self.assertEqual(types['globals'], {})
+        self.assertEqual(types['unresolved'], {'x'})
+
+    def test_arguments_are_typed_from_defaults_and_calls(self):
+        types = StaticTypeInferer(
+            'def add(a, b=1):\n'
+            '    total = a + b\n'
+            '    return total\n'
+            'print add(2)\n'
+        ).infer()
+        self.assertEqual(types['arguments'], {'add': {'a': 'int', 'b': 'int'}})
+        self.assertEqual(types['locals'], {'a': 'int', 'b': 'int', 'total': 'int'})
+        self.assertEqual(types['unresolved'], set())
+
+    def test_untyped_argument_of_called_function_is_unresolved(self):
+        types = StaticTypeInferer('def add(a, b):\n    return a + b\nprint add(foo(), 2)\n').infer()
+        self.assertEqual(types['arguments'], {'add': {'b': 'int'}})
+        self.assertEqual(types['unresolved'], {'a'})
+
+    def test_same_type_in_different_functions(self):
+        types = StaticTypeInferer('def f():\n    x = 1\ndef g():\n    x = 2\n').infer()
+        self.assertEqual(types['locals'], {'x': 'int'})
+        self.assertEqual(types['unresolved'], set())
+
+    def test_different_types_in_different_functions_are_unresolved(self):
+        types = StaticTypeInferer('def f():\n    x = 1\ndef g():\n    x = "a"\n').infer()
+        self.assertEqual(types['locals'], {})
+        self.assertEqual(types['unresolved'], {'x'})
+
+    def test_unresolved_in_one_function_is_unresolved_in_all(self):
+        for source in ['def f():\n    x = 1\ndef g():\n    x = y\n', 'def g():\n    x = y\ndef f():\n    x = 1\n']:
+            types = StaticTypeInferer(source).infer()
+            self.assertEqual(types['locals'], {})
+            self.assertEqual(types['unresolved'], {'x'})
+
+    def test_argument_and_local_of_different_types_are_unresolved(self):
+        types = StaticTypeInferer('def f(n=1):\n    return n\ndef g():\n    n = "a"\n').infer()
+        self.assertEqual(types['arguments']['f'], {'n': 'int'})
+        self.assertEqual(types['locals'], {})
+        self.assertEqual(types['unresolved'], {'n'})
+
+    def test_invalid_source_raises(self):
+        with self.assertRaises(SyntaxError):
+            StaticTypeInferer('def f(:\n').infer()
+        with self.assertRaises(SyntaxError):
+            StaticTypeInferer('x = 1\0\n').infer()
+
+
+if __name__ == '__main__':
+    unittest.main()
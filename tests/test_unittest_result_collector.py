@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+
+from StringIO import StringIO
+import unittest
+
+from unittest_result_collector import TestOutcome
+from unittest_result_collector import UnittestResultCollector
+
+
+def _make_suite(broken_fixture):
+    """ Returns a suite of two test classes, `A` whose `setUpClass` raises if asked to, and `B`. """
+
+    class A(unittest.TestCase):
+
+        @classmethod
+        def setUpClass(cls):
+            if broken_fixture:
+                raise RuntimeError('broken fixture')
+
+        def test_a(self):
+            pass
+
+    class B(unittest.TestCase):
+
+        def test_b(self):
+            pass
+
+    loader = unittest.TestLoader()
+    return unittest.TestSuite([loader.loadTestsFromTestCase(A), loader.loadTestsFromTestCase(B)])
+
+
+class UnittestResultCollectorTest(unittest.TestCase):
+
+    def _run(self, suite, baseline=None):
+        result_collector = UnittestResultCollector(StringIO(), baseline)
+        result_collector.run_suite(suite)
+        return result_collector.outcomes
+
+    def test_records_every_test(self):
+        outcomes = self._run(_make_suite(broken_fixture=False))
+        self.assertEqual(
+            [(test_id.rsplit('.', 2)[-2:], outcome.status) for test_id, outcome in outcomes.items()],
+            [(['A', 'test_a'], UnittestResultCollector.PASS), (['B', 'test_b'], UnittestResultCollector.PASS)],
+        )
+
+    def test_fixture_error_is_an_error_of_the_tests_it_covers(self):
+        suite = _make_suite(broken_fixture=True)
+        test_a_id, test_b_id = [test.id() for test in UnittestResultCollector._iter_tests(suite)]
+        baseline = {
+            test_a_id: TestOutcome(UnittestResultCollector.PASS, 0.0),
+            test_b_id: TestOutcome(UnittestResultCollector.FAIL, 0.0),
+        }
+        outcomes = self._run(suite, baseline)
+        self.assertEqual(outcomes[test_a_id].status, UnittestResultCollector.ERROR)
+        self.assertFalse(UnittestResultCollector.is_improvement(baseline, outcomes))
+
+    def test_missing_baseline_pass_is_broken(self):
+        baseline = {
+            'A.test_a': TestOutcome(UnittestResultCollector.PASS, 0.0),
+            'B.test_b': TestOutcome(UnittestResultCollector.FAIL, 0.0),
+        }
+        outcomes = {'B.test_b': TestOutcome(UnittestResultCollector.PASS, 0.0)}
+        self.assertEqual(UnittestResultCollector.get_changes(baseline, outcomes), (['B.test_b'], ['A.test_a']))
+        self.assertFalse(UnittestResultCollector.is_improvement(baseline, outcomes))
+
+    def test_fix_without_regression_is_an_improvement(self):
+        baseline = {
+            'A.test_a': TestOutcome(UnittestResultCollector.PASS, 0.0),
+            'B.test_b': TestOutcome(UnittestResultCollector.FAIL, 0.0),
+        }
+        outcomes = {
+            'A.test_a': TestOutcome(UnittestResultCollector.PASS, 0.0),
+            'B.test_b': TestOutcome(UnittestResultCollector.PASS, 0.0),
+        }
+        self.assertTrue(UnittestResultCollector.is_improvement(baseline, outcomes))
+
+
+if __name__ == '__main__':
+    unittest.main()